@@ -1,8 +1,10 @@
 import sys
 from pathlib import Path
+import argparse
 import asyncio
 import time
-from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 
 src_path = Path(__file__).parent.parent
 if str(src_path) not in sys.path:
@@ -10,11 +12,14 @@ if str(src_path) not in sys.path:
 
 from services.csv import (
     collect_csv_files,
-    merge_csv_files,
-    reformat_data,
+    ingest_csv_files,
     create_timeframes_csv,
+    plan_timeframe_partitions,
+    create_timeframe_partition,
+    stitch_timeframe_partitions,
+    remove_timeframe_partitions,
 )
-from config.settings import DATA_PATH
+from config.settings import DATA_PATH, EXECUTION_SETTINGS, SESSION_SWEEP_SETTINGS
 from utils.profile_metrics import (
     get_metrics_for_profile,
     group_metrics_by_category,
@@ -28,58 +33,194 @@ from config.notion_settings import (
     get_database_id,
 )
 from services.metrics_service import MetricsService
+from services.metrics.session_sweep import load_sweep_spec, run_session_sweep
+from services.performance import ConfigManager
+from services.storage import (
+    SharedSegments,
+    attach_shared_segments,
+    get_storage,
+    shared_segments_run,
+)
 
+EXECUTOR_TYPES = ["auto", "threads", "processes"]
 
-async def process_single_symbol(
+
+def process_symbol_data(
     symbol_dir: Path,
-    processed_data_root: Path,
     formatted_data_root: Path,
     timeframes_data_root: Path,
-    executor: ThreadPoolExecutor,
 ) -> tuple[str, dict] | None:
-    """Process a single symbol using thread executor for CPU-intensive tasks"""
-    try:
-        symbol = symbol_dir.name
-        print(f"🔄 Processing {symbol}...")
+    """
+    Run all CPU-heavy stages for one symbol and return its flat metrics.
+    Kept at module level so process pools can pickle it.
+    """
+    formatted_path = ingest_symbol_data(symbol_dir, formatted_data_root)
 
-        loop = asyncio.get_event_loop()
+    if formatted_path is None:
+        return None
 
-        collected_files = await loop.run_in_executor(
-            executor, collect_csv_files, symbol_dir
-        )
+    return calculate_symbol_metrics(
+        formatted_path, timeframes_data_root, symbol_dir.name
+    )
 
-        merged_file = await loop.run_in_executor(
-            executor, merge_csv_files, collected_files, processed_data_root, symbol
-        )
 
-        if merged_file is None:
-            return None
+def ingest_symbol_data(symbol_dir: Path, formatted_data_root: Path) -> Path | None:
+    """Ingest the raw files of one symbol, returns its formatted store"""
+    symbol = symbol_dir.name
+    print(f"🔄 Processing {symbol}...")
 
-        year = merged_file.stem.split("_")[-1]
-        formatted_file = formatted_data_root / f"{symbol}_formatted_{year}.csv"
+    collected_files = collect_csv_files(symbol_dir)
+    return ingest_csv_files(collected_files, formatted_data_root, symbol)
 
-        formatted_path = await loop.run_in_executor(
-            executor, reformat_data, merged_file, formatted_file
-        )
 
-        if formatted_path is None:
-            return None
+def calculate_symbol_metrics(
+    formatted_path: Path, timeframes_data_root: Path, symbol: str
+) -> tuple[str, dict]:
+    """Build the timeframes of one symbol and return its flat metrics"""
+    create_timeframes_csv(formatted_path, timeframes_data_root, symbol)
+
+    print(f"✅ Successfully processed {symbol} data")
+
+    metrics_service = MetricsService(timeframes_data_root)
+    return symbol, metrics_service.calculate_all_metrics(symbol)
+
+
+def symbol_history_spans(timeframes_data_root: Path, symbol: str) -> list[tuple]:
+    return MetricsService(timeframes_data_root).history_spans(symbol)
+
+
+def calculate_partial_metrics(
+    timeframes_data_root: Path, symbol: str, span: tuple
+) -> dict:
+    return MetricsService(timeframes_data_root).calculate_partials(symbol, *span)
 
-        await loop.run_in_executor(
-            executor,
-            create_timeframes_csv,
+
+def reduce_partial_metrics(
+    timeframes_data_root: Path, symbol: str, partials: list[dict]
+) -> tuple[str, dict]:
+    return symbol, MetricsService(timeframes_data_root).reduce_partials(
+        symbol, partials
+    )
+
+
+async def process_partitioned_symbol(
+    formatted_path: Path,
+    timeframes_data_root: Path,
+    symbol: str,
+    executor: Executor,
+) -> tuple[str, dict]:
+    """
+    Resample and accumulate the metrics of one symbol in week-aligned year
+    partitions, each an executor task of its own, so a long history is
+    spread over every worker. Partitions are stitched (timeframes) and
+    reduced (metrics) into exactly the results of one piece.
+    """
+    loop = asyncio.get_running_loop()
+
+    def run(function, *args):
+        return loop.run_in_executor(executor, function, *args)
+
+    spans = await run(
+        plan_timeframe_partitions, formatted_path, timeframes_data_root, symbol
+    )
+    if spans:
+        print(f"🧩 Resampling {symbol} in {len(spans)} partitions...")
+        results = await asyncio.gather(
+            *(
+                run(
+                    create_timeframe_partition,
+                    formatted_path,
+                    timeframes_data_root,
+                    symbol,
+                    *span,
+                )
+                for span in spans
+            ),
+            return_exceptions=True,
+        )
+        partitions = [
+            result for result in results if not isinstance(result, BaseException)
+        ]
+        if len(partitions) < len(results):
+            # Stitching cleans partitions up, without it the others stay behind
+            await run(
+                remove_timeframe_partitions, timeframes_data_root, symbol, partitions
+            )
+            raise next(
+                result for result in results if isinstance(result, BaseException)
+            )
+        await run(
+            stitch_timeframe_partitions,
             formatted_path,
             timeframes_data_root,
             symbol,
+            partitions,
         )
+    else:
+        await run(create_timeframes_csv, formatted_path, timeframes_data_root, symbol)
 
-        print(f"✅ Successfully processed {symbol} data")
+    print(f"✅ Successfully processed {symbol} data")
 
-        metrics_service = MetricsService(timeframes_data_root)
-        flat_metrics = await loop.run_in_executor(
-            executor, metrics_service.calculate_all_metrics, symbol
+    spans = await run(symbol_history_spans, timeframes_data_root, symbol)
+    print(f"🧩 Calculating {symbol} metrics in {len(spans)} partitions...")
+    partials = await asyncio.gather(
+        *(
+            run(calculate_partial_metrics, timeframes_data_root, symbol, span)
+            for span in spans
         )
+    )
+    return await run(
+        reduce_partial_metrics, timeframes_data_root, symbol, list(partials)
+    )
+
 
+async def process_single_symbol(
+    symbol_dir: Path,
+    formatted_data_root: Path,
+    timeframes_data_root: Path,
+    executor: Executor,
+    partition_min_mb: float | None = EXECUTION_SETTINGS["partition_min_mb"],
+) -> tuple[str, dict] | None:
+    """
+    Process a single symbol in the executor (threads or worker processes).
+    Symbols with a formatted store above partition_min_mb are processed in
+    partitions (see process_partitioned_symbol).
+    """
+    symbol = symbol_dir.name
+    try:
+        loop = asyncio.get_running_loop()
+
+        if partition_min_mb is None:
+            result = await loop.run_in_executor(
+                executor,
+                process_symbol_data,
+                symbol_dir,
+                formatted_data_root,
+                timeframes_data_root,
+            )
+        else:
+            formatted_path = await loop.run_in_executor(
+                executor, ingest_symbol_data, symbol_dir, formatted_data_root
+            )
+            if formatted_path is None:
+                result = None
+            elif get_storage().size_bytes(formatted_path) > partition_min_mb * 1024**2:
+                result = await process_partitioned_symbol(
+                    formatted_path, timeframes_data_root, symbol, executor
+                )
+            else:
+                result = await loop.run_in_executor(
+                    executor,
+                    calculate_symbol_metrics,
+                    formatted_path,
+                    timeframes_data_root,
+                    symbol,
+                )
+
+        if result is None:
+            return None
+
+        symbol, flat_metrics = result
         grouped_metrics = group_metrics_by_category(flat_metrics)
         print(f"✅ Calculated metrics for {symbol}")
         return symbol, grouped_metrics
@@ -89,19 +230,61 @@ async def process_single_symbol(
         return None
 
 
-async def process_data_and_calculate_metrics():
+def resolve_executor_settings(
+    executor_type: str, max_workers: int | None, symbols_count: int | None
+) -> tuple[str, int]:
+    """
+    Pick executor backend and worker count.
+    "auto" uses worker processes whenever more than one worker is available,
+    since most of the per-symbol work holds the GIL. Without a symbols
+    count (symbols may be split into partitions) the worker count is not
+    capped by it.
+    """
+    if executor_type not in EXECUTOR_TYPES:
+        raise ValueError(f"Unknown executor type: {executor_type}")
+
+    if max_workers is None:
+        max_workers = ConfigManager.get_optimal_concurrency()
+    if symbols_count is not None:
+        max_workers = min(max_workers, symbols_count)
+    max_workers = max(1, max_workers)
+
+    if executor_type == "auto":
+        executor_type = "processes" if max_workers > 1 else "threads"
+
+    return executor_type, max_workers
+
+
+def create_executor(
+    executor_type: str, max_workers: int, segments: SharedSegments | None = None
+) -> Executor:
+    """Worker processes join the shared memory run of segments, if any"""
+    if executor_type == "processes":
+        if segments is None:
+            return ProcessPoolExecutor(max_workers=max_workers)
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=attach_shared_segments,
+            initargs=(segments.run_id,),
+        )
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+async def process_data_and_calculate_metrics(
+    executor_type: str = EXECUTION_SETTINGS["executor"],
+    max_workers: int | None = EXECUTION_SETTINGS["max_workers"],
+):
     """Process all symbols in parallel with limited concurrency"""
     start_time = time.time()
 
     src_path = Path(__file__).parent.parent
 
     raw_data_root = src_path / DATA_PATH["raw_data_path"]
-    processed_data_root = src_path / DATA_PATH["processed_data_path"]
     formatted_data_root = src_path / DATA_PATH["formated_data_path"]
     timeframes_data_root = src_path / DATA_PATH["timeframes_data_path"]
 
     # Create directories
-    for directory in [formatted_data_root, processed_data_root, timeframes_data_root]:
+    for directory in [formatted_data_root, timeframes_data_root]:
         directory.mkdir(parents=True, exist_ok=True)
 
     # Get all symbol directories
@@ -113,10 +296,20 @@ async def process_data_and_calculate_metrics():
 
     print(f"🚀 Starting parallel processing of {len(symbol_dirs)} symbols...")
 
-    # Create thread executor for CPU-intensive tasks
-    max_workers = min(5, len(symbol_dirs))  # Adjust based on your system
+    partition_min_mb = EXECUTION_SETTINGS["partition_min_mb"]
+    executor_type, max_workers = resolve_executor_settings(
+        executor_type,
+        max_workers,
+        len(symbol_dirs) if partition_min_mb is None else None,
+    )
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    # Threads share loaded data through the process-wide cache already
+    segments_run = (
+        shared_segments_run() if executor_type == "processes" else nullcontext()
+    )
+    with segments_run as segments, create_executor(
+        executor_type, max_workers, segments
+    ) as executor:
         # Create semaphore to limit concurrent processing
         semaphore = asyncio.Semaphore(max_workers)
 
@@ -124,16 +317,17 @@ async def process_data_and_calculate_metrics():
             async with semaphore:
                 return await process_single_symbol(
                     symbol_dir,
-                    processed_data_root,
                     formatted_data_root,
                     timeframes_data_root,
                     executor,
+                    partition_min_mb,
                 )
 
         # Process all symbols in parallel
         tasks = [process_with_semaphore(symbol_dir) for symbol_dir in symbol_dirs]
         print(
-            f"📊 Processing {len(tasks)} symbols in parallel (max {max_workers} concurrent)..."
+            f"📊 Processing {len(tasks)} symbols in parallel "
+            f"(max {max_workers} concurrent, {executor_type})..."
         )
         results = await asyncio.gather(*tasks, return_exceptions=True)
 
@@ -271,7 +465,56 @@ async def upload_metrics_to_notion(metrics: dict):
     return successful_profiles == len(PROFILES)
 
 
-async def main():
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Forex data processing pipeline")
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTOR_TYPES,
+        default=EXECUTION_SETTINGS["executor"],
+        help="Backend for per-symbol processing (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=EXECUTION_SETTINGS["max_workers"],
+        help="Maximum number of symbols (or partitions of large symbols) "
+        "processed concurrently (default: based on CPU count and memory)",
+    )
+    parser.add_argument(
+        "--session-sweep",
+        type=Path,
+        metavar="SPEC",
+        help="Evaluate the session metrics for every session layout of a JSON "
+        "sweep spec on the existing timeframe data instead of running the "
+        "pipeline",
+    )
+    return parser.parse_args(argv)
+
+
+def session_sweep(spec_path: Path, max_workers: int | None = None):
+    """Run a session layout sweep and write its results table"""
+    src_path = Path(__file__).parent.parent
+    variants = load_sweep_spec(spec_path)
+    if max_workers is None:
+        max_workers = SESSION_SWEEP_SETTINGS["max_workers"]
+
+    start_time = time.time()
+    results = run_session_sweep(
+        src_path / DATA_PATH["timeframes_data_path"],
+        variants,
+        output_dir=src_path / SESSION_SWEEP_SETTINGS["output_path"],
+        max_workers=max_workers,
+    )
+    print(
+        f"✅ Evaluated {len(results)} layout/symbol pairs in {time.time() - start_time:.2f}s"
+    )
+    return results
+
+
+async def main(
+    executor_type: str = EXECUTION_SETTINGS["executor"],
+    max_workers: int | None = EXECUTION_SETTINGS["max_workers"],
+):
     """Main function with optimized error handling and performance monitoring"""
     try:
         print("🚀 Starting Forex Data Processing Pipeline...")
@@ -279,7 +522,7 @@ async def main():
 
         # Step 1: Process data and calculate metrics
         print("\n📊 Step 1: Processing data and calculating metrics...")
-        metrics = await process_data_and_calculate_metrics()
+        metrics = await process_data_and_calculate_metrics(executor_type, max_workers)
 
         if not metrics:
             print("❌ No metrics calculated. Exiting.")
@@ -319,4 +562,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.session_sweep is not None:
+        session_sweep(args.session_sweep, args.max_workers)
+    else:
+        asyncio.run(main(args.executor, args.max_workers))
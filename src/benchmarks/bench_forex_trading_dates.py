@@ -0,0 +1,90 @@
+"""
+Benchmark of forex trading-date resolution on a multi-year weekday 1m
+series: the scalar per-timestamp functions (pytz localize/dst() per row, as
+they were before the vectorized versions) mapped over the index, against
+get_forex_trading_dates on the whole index. Results are checked to match.
+
+Usage (from src):
+    python benchmarks/bench_forex_trading_dates.py [--start 2019-01-01]
+        [--end 2024-01-01] [--scalar-rows N]
+
+--scalar-rows times the scalar version on the first N rows only and
+extrapolates, for a quick run.
+"""
+
+import argparse
+import datetime
+import sys
+import time
+from pathlib import Path
+import pandas as pd  # type: ignore
+import pytz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.datetime_utils import get_forex_trading_dates  # noqa: E402
+
+
+def scalar_day_start_hour(date: datetime.datetime) -> int:
+    eastern = pytz.timezone("US/Eastern")
+
+    if date.tzinfo is None:
+        date = pytz.utc.localize(date)
+
+    date_eastern = date.astimezone(eastern)
+    is_dst = date_eastern.dst() != datetime.timedelta(0)
+    return 21 if is_dst else 22
+
+
+def scalar_trading_date(timestamp: datetime.datetime) -> datetime.date:
+    if timestamp.tzinfo is None:
+        timestamp = pytz.utc.localize(timestamp)
+
+    day_start_hour = scalar_day_start_hour(timestamp)
+    weekday = timestamp.weekday()
+
+    if weekday == 6:
+        return (timestamp + datetime.timedelta(days=1)).date()
+
+    if timestamp.hour >= day_start_hour:
+        return (timestamp + datetime.timedelta(days=1)).date()
+    else:
+        return timestamp.date()
+
+
+def weekday_minutes(start: str, end: str) -> pd.DatetimeIndex:
+    """1m timestamps of the weekdays in [start, end)"""
+    index = pd.date_range(start, end, freq="1min", inclusive="left")
+    return index[index.weekday < 5]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--start", default="2019-01-01")
+    parser.add_argument("--end", default="2024-01-01")
+    parser.add_argument("--scalar-rows", type=int, default=None)
+    args = parser.parse_args()
+
+    index = weekday_minutes(args.start, args.end)
+    print(f"{len(index):,} 1m timestamps, {args.start} to {args.end}")
+
+    started = time.perf_counter()
+    vectorized = get_forex_trading_dates(index)
+    vectorized_seconds = time.perf_counter() - started
+
+    scalar_index = index if args.scalar_rows is None else index[: args.scalar_rows]
+    started = time.perf_counter()
+    scalar = pd.DatetimeIndex(scalar_index.map(scalar_trading_date))
+    scalar_seconds = (time.perf_counter() - started) * len(index) / len(scalar_index)
+
+    if not scalar.equals(vectorized[: len(scalar_index)]):
+        raise SystemExit("Vectorized trading dates differ from the scalar ones")
+
+    label = "" if args.scalar_rows is None else " (extrapolated)"
+    print(f"scalar index.map:        {scalar_seconds:8.2f}s{label}")
+    print(f"get_forex_trading_dates: {vectorized_seconds:8.2f}s")
+    print(f"speedup:                 {scalar_seconds / vectorized_seconds:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
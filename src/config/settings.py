@@ -4,3 +4,80 @@ DATA_PATH = {
     "formated_data_path": "data/formatted",
     "timeframes_data_path": "data/timeframes",
 }
+
+STORAGE_SETTINGS = {
+    # "binary" keeps typed columnar files, "partitioned" splits them into one
+    # file per month so range reads only open the months they cover, "csv"
+    # keeps the old text format
+    "format": "binary",
+    # Write a CSV copy next to every binary file for manual inspection
+    "export_csv": False,
+}
+
+EXECUTION_SETTINGS = {
+    # "threads", "processes" or "auto" (processes when more than one worker)
+    "executor": "auto",
+    # None picks the worker count from CPU count and available memory
+    "max_workers": None,
+    # Threads running independent metric calculators of one symbol,
+    # 1 runs them one after another, None sizes the pool automatically
+    "calculator_workers": None,
+    # Compute each calculator over year spans of a symbol's history in
+    # parallel and merge the partial results, identical to a single pass
+    "history_chunks": False,
+    # Symbols whose formatted minute store is larger than this many MB are
+    # split into week-aligned year partitions that resample and accumulate
+    # metrics on all workers, None processes every symbol in one piece
+    "partition_min_mb": 32,
+}
+
+INGESTION_SETTINGS = {
+    # Append only bars newer than the last run instead of skipping existing
+    # outputs; trailing candles of every timeframe are recomputed
+    "incremental": True,
+}
+
+SESSION_SWEEP_SETTINGS = {
+    # Where sweep result tables are written, relative to src
+    "output_path": "data/metrics/session_sweep",
+    # Worker processes evaluating layouts, None sizes the pool automatically
+    "max_workers": None,
+}
+
+ANOMALY_SETTINGS = {
+    # "std" drops candles far from the yearly mean of a column, "mad" drops
+    # candles far from the rolling median of their neighbours (robust to
+    # trends and to the outliers themselves)
+    "method": "std",
+    # Standard deviations from the mean, per timeframe overrides
+    "std_threshold": 3,
+    "std_thresholds": {"1w": 5},
+    # Centered rolling window in bars and scaled MADs from the rolling median
+    "mad_window": 51,
+    "mad_threshold": 8,
+}
+
+CACHE_SETTINGS = {
+    # Share of the available memory the process-wide data cache may hold,
+    # re-evaluated on every insert
+    "memory_fraction": 0.25,
+    # Hard cap in MB on top of the memory fraction, None for no cap
+    "max_budget_mb": None,
+}
+
+SHARED_MEMORY_SETTINGS = {
+    # Let worker processes share loaded timeframe arrays that are not plain
+    # file mappings (anomaly-filtered or parsed from CSV)
+    "enabled": True,
+    # Seconds to wait for another worker still publishing an array before
+    # loading it locally
+    "attach_timeout": 10.0,
+}
+
+STREAMING_SETTINGS = {
+    # Push bars through ingestion, resampling and metrics in chunks instead
+    # of loading whole files, keeps peak memory flat for long histories
+    "enabled": False,
+    # Rows read per chunk, None picks it from the file size
+    "chunk_rows": None,
+}
@@ -0,0 +1,193 @@
+"""
+Build manifest: records what every pipeline artifact was built from so a
+stage can tell whether its output is still valid, needs new rows appended,
+or has to be rebuilt.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from pathlib import Path
+import pandas as pd  # type: ignore
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_file(path: Path, length: int | None = None) -> str:
+    """Content hash of a file, or of its first length bytes"""
+    digest = _new_hash()
+    remaining = length
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            size = (
+                HASH_CHUNK_SIZE
+                if remaining is None
+                else min(HASH_CHUNK_SIZE, remaining)
+            )
+            chunk = f.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def hash_config(*values) -> str:
+    """Stable hash of JSON-serializable config values (dicts, lists, ...)"""
+    payload = json.dumps(values, sort_keys=True, default=str)
+    digest = _new_hash()
+    digest.update(payload.encode())
+    return digest.hexdigest()
+
+
+def hash_sources(*objects) -> str:
+    """Code version: hash of the source files defining the given modules/objects"""
+    digest = _new_hash()
+    for source_file in sorted({inspect.getsourcefile(obj) for obj in objects}):
+        with open(source_file, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def describe_file(path: Path, previous: dict | None = None) -> dict:
+    """
+    Size, mtime and content hash of an input file. The hash is reused from
+    the previous record when size and mtime did not change.
+    """
+    stat = path.stat()
+    if (
+        previous is not None
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime_ns") == stat.st_mtime_ns
+    ):
+        return dict(previous)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": hash_file(path),
+    }
+
+
+def is_appended(path: Path, previous: dict, current: dict) -> bool:
+    """True when the file only grew and its old content is an unchanged prefix"""
+    return current["size"] > previous["size"] and (
+        hash_file(path, previous["size"]) == previous["hash"]
+    )
+
+
+class BuildManifest:
+    """
+    Per-symbol JSON manifest stored next to a stage's outputs.
+
+    Each artifact entry keeps:
+        config          hash of the config and code the artifact depends on
+        upstream        id of the upstream artifact it was built from, the
+                        build id when new upstream rows are appended
+                        incrementally, the revision otherwise
+        build           id of the last full build
+        revision        changes on every update, including appends
+        year, last_timestamp and any stage specific fields
+    """
+
+    def __init__(self, directory: Path, symbol: str):
+        self.path = directory / f"{symbol}_manifest.json"
+        self.entries = self._load()
+
+    def _load(self) -> dict:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable manifest {self.path.name}: {e}")
+            return {}
+
+    def get(self, artifact: str) -> dict | None:
+        entry = self.entries.get(artifact)
+        if entry is None:
+            return None
+        entry = dict(entry)
+        if entry.get("last_timestamp") is not None:
+            entry["last_timestamp"] = pd.Timestamp(entry["last_timestamp"])
+        return entry
+
+    def revision(self, artifact: str) -> str | None:
+        entry = self.entries.get(artifact)
+        return entry["revision"] if entry else None
+
+    def is_current(
+        self, artifact: str, config: str, upstream: str | None = None
+    ) -> bool:
+        """Entry exists and was built from the same config and upstream build"""
+        entry = self.entries.get(artifact)
+        return (
+            entry is not None
+            and entry.get("config") == config
+            and entry.get("upstream") == upstream
+        )
+
+    def record_build(
+        self,
+        artifact: str,
+        config: str,
+        upstream: str | None = None,
+        last_timestamp: pd.Timestamp | None = None,
+        **fields,
+    ) -> None:
+        """Record a full build of the artifact"""
+        build = hash_config(artifact, config, upstream, fields, last_timestamp)
+        self._write_entry(artifact, config, upstream, build, last_timestamp, fields)
+
+    def record_update(
+        self, artifact: str, last_timestamp: pd.Timestamp | None = None, **fields
+    ) -> None:
+        """Record rows appended to an existing build"""
+        entry = self.entries[artifact]
+        merged = {
+            key: value
+            for key, value in entry.items()
+            if key not in ("config", "upstream", "build", "revision", "last_timestamp")
+        }
+        merged.update(fields)
+        self._write_entry(
+            artifact,
+            entry["config"],
+            entry.get("upstream"),
+            entry["build"],
+            last_timestamp,
+            merged,
+        )
+
+    def _write_entry(
+        self,
+        artifact: str,
+        config: str,
+        upstream: str | None,
+        build: str,
+        last_timestamp: pd.Timestamp | None,
+        fields: dict,
+    ) -> None:
+        timestamp = last_timestamp.isoformat() if last_timestamp is not None else None
+        self.entries[artifact] = {
+            **fields,
+            "config": config,
+            "upstream": upstream,
+            "build": build,
+            "revision": hash_config(build, upstream, timestamp, fields),
+            "last_timestamp": timestamp,
+        }
+        self.save()
+
+    def save(self) -> None:
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
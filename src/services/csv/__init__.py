@@ -3,13 +3,21 @@ CSV processing package for forex data handling.
 """
 
 from .collector import collect_csv_files
-from .merger import merge_csv_files
-from .formatter import reformat_data
-from .timeframes_creator import create_timeframes_csv
+from .ingestor import ingest_csv_files
+from .timeframes_creator import (
+    create_timeframes_csv,
+    plan_timeframe_partitions,
+    create_timeframe_partition,
+    stitch_timeframe_partitions,
+    remove_timeframe_partitions,
+)
 
 __all__ = [
     "collect_csv_files",
-    "merge_csv_files",
-    "reformat_data",
+    "ingest_csv_files",
     "create_timeframes_csv",
+    "plan_timeframe_partitions",
+    "create_timeframe_partition",
+    "stitch_timeframe_partitions",
+    "remove_timeframe_partitions",
 ]
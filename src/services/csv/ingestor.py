@@ -0,0 +1,374 @@
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd  # type: ignore
+from config.settings import INGESTION_SETTINGS, STREAMING_SETTINGS
+from services.storage import FrameStorage, get_storage
+from services.storage.base import OHLC_COLUMNS
+from services.storage.chunks import chunk_rows_for
+from services.build_manifest import (
+    BuildManifest,
+    describe_file,
+    hash_config,
+    hash_sources,
+    is_appended,
+)
+
+RAW_COLUMNS = ["datetime", *OHLC_COLUMNS]
+RAW_DTYPES = {"datetime": str, **{column: np.float32 for column in OHLC_COLUMNS}}
+DATETIME_WIDTH = len("YYYYMMDD HHMMSS")
+FORMATTED_ARTIFACT = "formatted"
+
+
+def ingest_csv_files(
+    csv_files: list[Path],
+    output_dir: Path,
+    prefix: str,
+    incremental: bool = INGESTION_SETTINGS["incremental"],
+    streaming: bool = STREAMING_SETTINGS["enabled"],
+) -> Path | None:
+    """
+    Read raw yearly "YYYYMMDD HHMMSS;open;high;low;close;volume" files and
+    store them as one formatted minute frame, replacing merge + reformat.
+
+    The build manifest decides what to do: nothing when raw files, config
+    and code are unchanged, append the new rows when raw files only grew
+    (incremental mode), full rebuild otherwise. In streaming mode a full
+    rebuild reads the raw files in chunks and never holds them whole.
+    """
+    files_by_year = {}
+    for file in csv_files:
+        try:
+            files_by_year[int(file.stem.split("_")[-1])] = file
+        except (ValueError, IndexError) as e:
+            print(f"Error extracting year from {file}: {e}")
+            continue
+
+    if not files_by_year:
+        print("No valid years found in filenames")
+        return None
+
+    storage = get_storage()
+    latest_year = max(files_by_year)
+    output_file = storage.path_for(output_dir / f"{prefix}_formatted_{latest_year}")
+
+    manifest = BuildManifest(output_dir, prefix)
+    config = _ingest_config(storage)
+    entry = manifest.get(FORMATTED_ARTIFACT)
+    previous_raw = entry.get("raw_files", {}) if entry else {}
+    raw_files = {
+        file.name: describe_file(file, previous_raw.get(file.name))
+        for file in files_by_year.values()
+    }
+
+    previous_file = None
+    if entry is not None:
+        previous_file = storage.path_for(
+            output_dir / f"{prefix}_formatted_{entry['year']}"
+        )
+
+    if (
+        manifest.is_current(FORMATTED_ARTIFACT, config)
+        and storage.exists(previous_file)
+        and entry["last_timestamp"] is not None
+    ):
+        change = _classify_raw_changes(
+            files_by_year, previous_raw, raw_files, entry["last_timestamp"]
+        )
+        if change == "unchanged":
+            print(f"ℹ️ {previous_file.name} is up to date")
+            return previous_file
+        if change == "appended" and incremental:
+            return _ingest_new_rows(
+                storage,
+                manifest,
+                files_by_year,
+                raw_files,
+                previous_file,
+                output_file,
+                entry["last_timestamp"],
+            )
+        print(f"🔄 Raw data for {prefix} changed, rebuilding {output_file.name}")
+    elif storage.exists(output_file):
+        print(f"🔄 No valid build record for {output_file.name}, rebuilding")
+
+    written = None
+    if streaming:
+        written = _stream_raw_files(storage, files_by_year, output_file)
+
+    if written is None:
+        frames = _read_raw_files(files_by_year)
+        if not frames:
+            print("No valid data to ingest")
+            return None
+
+    try:
+        if written is None:
+            df = _merge_sorted_frames(frames)
+            storage.save(df, output_file, "1m")
+            written = (len(df), df.index[-1] if not df.empty else None)
+        rows, last_timestamp = written
+        if previous_file is not None and previous_file != output_file:
+            storage.remove(previous_file)
+
+        manifest.record_build(
+            FORMATTED_ARTIFACT,
+            config,
+            last_timestamp=last_timestamp,
+            year=str(latest_year),
+            raw_files=raw_files,
+        )
+        print(f"✅ Ingested {rows} rows into {output_file.name}")
+        return output_file
+    except Exception as e:
+        print(f"❌ Error saving formatted file: {e}")
+        return None
+
+
+def _ingest_config(storage: FrameStorage) -> str:
+    """Config and code version the formatted store depends on"""
+    return hash_config(
+        RAW_COLUMNS,
+        storage.suffix,
+        hash_sources(read_raw_csv, type(storage)),
+    )
+
+
+def _classify_raw_changes(
+    files_by_year: dict[int, Path],
+    previous: dict,
+    current: dict,
+    last_timestamp: pd.Timestamp,
+) -> str:
+    """
+    Compare raw file records: "unchanged", "appended" when every change is
+    new data after the last ingested bar, "changed" otherwise.
+    """
+    if set(previous) - set(current):
+        return "changed"
+
+    status = "unchanged"
+    for year, file in files_by_year.items():
+        old, new = previous.get(file.name), current[file.name]
+        if old is not None and old["hash"] == new["hash"]:
+            continue
+        # Years before the last ingested bar can't gain rows after it
+        if year < last_timestamp.year:
+            return "changed"
+        if old is not None and not is_appended(file, old, new):
+            return "changed"
+        status = "appended"
+
+    return status
+
+
+def _ingest_new_rows(
+    storage: FrameStorage,
+    manifest: BuildManifest,
+    files_by_year: dict[int, Path],
+    raw_files: dict,
+    previous_file: Path,
+    output_file: Path,
+    last_timestamp: pd.Timestamp,
+) -> Path | None:
+    """Append rows newer than the last ingested bar to the existing store"""
+    frames = _read_raw_files(files_by_year, since_year=last_timestamp.year)
+    new_rows = _merge_sorted_frames(frames) if frames else None
+    if new_rows is not None:
+        new_rows = new_rows[new_rows.index > last_timestamp]
+
+    try:
+        if new_rows is None or new_rows.empty:
+            manifest.record_update(
+                FORMATTED_ARTIFACT, last_timestamp, raw_files=raw_files
+            )
+            print(f"ℹ️ {previous_file.name} is up to date")
+            return previous_file
+
+        if previous_file != output_file:
+            storage.rename(previous_file, output_file)
+        storage.append(new_rows, output_file, "1m")
+        manifest.record_update(
+            FORMATTED_ARTIFACT,
+            new_rows.index[-1],
+            year=output_file.stem.split("_")[-1],
+            raw_files=raw_files,
+        )
+        print(f"✅ Appended {len(new_rows)} new rows to {output_file.name}")
+        return output_file
+    except Exception as e:
+        print(f"❌ Error appending to formatted file: {e}")
+        return None
+
+
+def _read_raw_files(
+    files_by_year: dict[int, Path], since_year: int | None = None
+) -> list[pd.DataFrame]:
+    frames = []
+    for year in sorted(files_by_year):
+        if since_year is not None and year < since_year:
+            continue
+        try:
+            frames.append(read_raw_csv(files_by_year[year]))
+        except Exception as e:
+            print(f"Error reading file {files_by_year[year]}: {e}")
+            continue
+    return frames
+
+
+class _UnorderedChunk(Exception):
+    """Raw rows are not in time order across chunks or files"""
+
+
+def _stream_raw_files(
+    storage: FrameStorage, files_by_year: dict[int, Path], output_file: Path
+) -> tuple[int, pd.Timestamp | None] | None:
+    """
+    Write the formatted store chunk by chunk, files ordered by their first
+    bar. Returns the row count and last timestamp, or None when the raw
+    data is not in time order or unreadable; the caller then falls back to
+    reading everything, which sorts and skips bad files.
+    """
+    try:
+        firsts = {}
+        for year in sorted(files_by_year):
+            head = read_raw_csv(files_by_year[year], nrows=1)
+            if not head.empty:
+                firsts[year] = head.index[0]
+
+        with storage.open_writer(output_file, "1m") as writer:
+            for year in sorted(firsts, key=firsts.get):
+                for chunk in iter_raw_csv(files_by_year[year]):
+                    if chunk.empty:
+                        continue
+                    if not chunk.index.is_monotonic_increasing or (
+                        writer.last_timestamp is not None
+                        and chunk.index[0] < writer.last_timestamp
+                    ):
+                        raise _UnorderedChunk(files_by_year[year].name)
+                    writer.write(chunk)
+            if writer.rows == 0:
+                writer.write(_merge_sorted_frames([]))
+        return writer.rows, writer.last_timestamp
+    except _UnorderedChunk as e:
+        print(f"⚠️ {e} is not in time order, ingesting in memory")
+    except Exception as e:
+        print(f"⚠️ Streaming ingestion failed ({e}), ingesting in memory")
+    return None
+
+
+def iter_raw_csv(path: Path) -> Iterator[pd.DataFrame]:
+    """Read one raw file in chunks of rows, see read_raw_csv"""
+    with pd.read_csv(
+        path,
+        sep=";",
+        header=None,
+        names=RAW_COLUMNS,
+        usecols=range(len(RAW_COLUMNS)),
+        dtype=RAW_DTYPES,
+        chunksize=chunk_rows_for(path),
+    ) as reader:
+        for df in reader:
+            df.index = parse_raw_datetimes(df.pop("datetime").to_numpy())
+            yield df
+
+
+def read_raw_csv(path: Path, nrows: int | None = None) -> pd.DataFrame:
+    """Read one raw file into a float32 OHLC frame indexed by "Date Time" """
+    df = pd.read_csv(
+        path,
+        sep=";",
+        header=None,
+        names=RAW_COLUMNS,
+        usecols=range(len(RAW_COLUMNS)),
+        dtype=RAW_DTYPES,
+        nrows=nrows,
+    )
+    df.index = parse_raw_datetimes(df.pop("datetime").to_numpy())
+    return df
+
+
+def parse_raw_datetimes(values: np.ndarray) -> pd.DatetimeIndex:
+    """
+    Vectorized parse of fixed-width "YYYYMMDD HHMMSS" strings: digits are
+    read straight from the byte buffer instead of going through strptime.
+    Values that are not valid datetimes in that format go to strptime
+    parsing, which raises on them.
+    """
+    try:
+        # One byte past the width tells longer values apart
+        raw = values.astype(f"S{DATETIME_WIDTH + 1}").view(np.uint8)
+    except (UnicodeEncodeError, ValueError):
+        return _strict_parse(values)
+    raw = raw.reshape(-1, DATETIME_WIDTH + 1)
+    # uint8 wraps around below "0", so one comparison checks both bounds
+    digits = raw[:, :DATETIME_WIDTH] - np.uint8(ord("0"))
+    is_digit = digits <= 9
+
+    def field(start: int, end: int) -> np.ndarray:
+        number = np.zeros(len(digits), dtype=np.int64)
+        for position in range(start, end):
+            number = number * 10 + digits[:, position]
+        return number
+
+    year, month, day = field(0, 4), field(4, 6), field(6, 8)
+    hour, minute, second = field(9, 11), field(11, 13), field(13, 15)
+    valid = (
+        is_digit[:, :8].all(axis=1)
+        & is_digit[:, 9:].all(axis=1)
+        & (raw[:, 8] == ord(" "))
+        & (raw[:, DATETIME_WIDTH] == 0)
+        & (month >= 1)
+        & (month <= 12)
+        & (day >= 1)
+        & (hour <= 23)
+        & (minute <= 59)
+        & (second <= 59)
+    )
+    if not valid.all():
+        return _strict_parse(values)
+
+    months = (year - 1970) * 12 + month - 1
+    first_days = months.astype("datetime64[M]").astype("datetime64[D]")
+    month_days = (
+        (months + 1).astype("datetime64[M]").astype("datetime64[D]") - first_days
+    ).astype(np.int64)
+    if (day > month_days).any():
+        return _strict_parse(values)
+
+    days = first_days.astype(np.int64) + day - 1
+    seconds = ((days * 24 + hour) * 60 + minute) * 60 + second
+
+    return pd.DatetimeIndex(seconds.astype("datetime64[s]"), name="Date Time")
+
+
+def _strict_parse(values: np.ndarray) -> pd.DatetimeIndex:
+    """Format-checked parse, raises on the first malformed or missing value"""
+    parsed = pd.DatetimeIndex(
+        pd.to_datetime(values, format="%Y%m%d %H%M%S"), name="Date Time"
+    )
+    if parsed.hasnans:
+        raise ValueError("Raw datetimes contain missing values")
+    return parsed.as_unit("s")
+
+
+def _merge_sorted_frames(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate per-year frames in time order. Yearly files are already
+    sorted and don't overlap, so a full sort is only needed as a fallback.
+    """
+    frames = sorted(
+        (frame for frame in frames if not frame.empty), key=lambda f: f.index[0]
+    )
+    if not frames:
+        return pd.DataFrame(
+            columns=OHLC_COLUMNS,
+            index=pd.DatetimeIndex([], name="Date Time"),
+            dtype=np.float32,
+        )
+
+    merged = pd.concat(frames)
+    if not merged.index.is_monotonic_increasing:
+        # Stable sort keeps the file order of duplicate timestamps
+        merged = merged.iloc[np.argsort(merged.index.asi8, kind="stable")]
+    return merged
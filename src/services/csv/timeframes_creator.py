@@ -1,16 +1,41 @@
+from contextlib import ExitStack
 from pathlib import Path
+import numpy as np
 import pandas as pd  # type: ignore
+from config.settings import INGESTION_SETTINGS, STREAMING_SETTINGS
 from config.timeframes_config import TIMEFRAMES, TIMEFRAME_MAP
-from utils.datetime_utils import (
-    determine_day_start_hour,
-    get_forex_week_start,
-    get_forex_trading_date,
+from services.storage import FrameStorage, ensure_anomaly_mask, get_storage
+from services.storage.chunks import (
+    WEEK,
+    WEEK_ORIGIN,
+    align_chunks,
+    chunk_rows_for,
+    history_spans,
 )
+from utils.datetime_utils import get_forex_trading_dates
+from services.build_manifest import BuildManifest, hash_config, hash_sources
+from .ingestor import FORMATTED_ARTIFACT
+
+OHLC_AGGREGATION = {"Open": "first", "High": "max", "Low": "min", "Close": "last"}
+DAILY_TIMEFRAMES = ("1d", "1w")
+TIMEFRAMES_ARTIFACT = "timeframes"
 
 
 def create_timeframes_csv(
-    input_path: Path, timeframes_dir: Path, symbol: str
+    input_path: Path,
+    timeframes_dir: Path,
+    symbol: str,
+    incremental: bool = INGESTION_SETTINGS["incremental"],
+    streaming: bool = STREAMING_SETTINGS["enabled"],
 ) -> list[Path]:
+    """
+    Build every configured timeframe from the formatted minute store.
+
+    Stores are reused while the build manifest shows the same formatted
+    build, timeframe config and code; rows appended upstream only rebuild
+    the trailing candles (incremental mode), anything else rebuilds all.
+    In streaming mode a full rebuild resamples the minutes week by week.
+    """
     try:
         year = input_path.stem.split("_")[-1]
     except (ValueError, IndexError):
@@ -18,156 +43,516 @@ def create_timeframes_csv(
         return []
 
     try:
-        timeframes_dir.mkdir(parents=True, exist_ok=True)
-        created_files = []
-
-        symbol_dir = timeframes_dir / symbol.lower()
-        symbol_dir.mkdir(parents=True, exist_ok=True)
-
-        files_to_create = []
-        for tf in TIMEFRAMES:
-            output_file = symbol_dir / f"{symbol}_{tf}_{year}.csv"
-            if output_file.exists():
-                print(f"ℹ️ Timeframe file already exists: {output_file.name}")
-                created_files.append(output_file)
-            else:
-                files_to_create.append((tf, output_file))
-
-        if not files_to_create:
-            return created_files
-
-        print(f"📊 Loading data for {symbol} timeframe processing...")
-        df = pd.read_csv(input_path, sep=",", parse_dates=["Date Time"])
-        df = df.rename(
-            columns={
-                "Date Time": "Date Time",
-                "Open": "open",
-                "High": "high",
-                "Low": "low",
-                "Close": "close",
-            }
-        )
-        df.set_index("Date Time", inplace=True)
-
-        for tf, output_file in files_to_create:
-            if tf not in TIMEFRAME_MAP:
-                print(f"Unsupported timeframe: {tf}")
-                continue
-
-            resampled = _create_timeframe_data(df, tf)
-
-            if resampled is not None:
-                _save_timeframe_data(resampled, output_file, tf, symbol, year)
-                created_files.append(output_file)
-
-        return created_files
+        storage = get_storage()
+        build = _TimeframesBuild(storage, input_path, timeframes_dir, symbol, year)
+
+        if build.is_current():
+            print(f"ℹ️ Timeframes for {symbol} are up to date")
+            _write_anomaly_masks(storage, build.previous_files)
+            return list(build.previous_files.values())
+        if incremental and build.is_appendable():
+            return _update_timeframes(
+                storage,
+                build.manifest,
+                input_path,
+                build.previous_files,
+                build.symbol_dir,
+                symbol,
+                year,
+                build.entry["last_timestamp"],
+            )
+
+        if streaming:
+            created_files, last_timestamp = _stream_timeframes(
+                storage, input_path, build.timeframes, build.symbol_dir, symbol, year
+            )
+        else:
+            created_files, last_timestamp = _build_timeframes(
+                storage, input_path, build.timeframes, build.symbol_dir, symbol, year
+            )
+        return build.finish(created_files, last_timestamp)
 
     except Exception as e:
         print(f"❌ Error creating timeframes: {e}")
         return []
 
 
-def _create_timeframe_data(df: pd.DataFrame, tf: str) -> pd.DataFrame | None:
+def plan_timeframe_partitions(
+    input_path: Path,
+    timeframes_dir: Path,
+    symbol: str,
+    incremental: bool = INGESTION_SETTINGS["incremental"],
+) -> list[tuple[pd.Timestamp | None, pd.Timestamp | None]]:
+    """
+    Week-aligned year spans to rebuild the timeframes of a symbol in (see
+    create_timeframe_partition), empty when the stores are current or only
+    need their trailing candles updated; create_timeframes_csv handles
+    those cheaply in one piece.
+    """
+    year = input_path.stem.split("_")[-1]
+    storage = get_storage()
+    build = _TimeframesBuild(storage, input_path, timeframes_dir, symbol, year)
+    if build.is_current() or (incremental and build.is_appendable()):
+        return []
+
+    view = storage.open_view(input_path, "1m")
+    if len(view) == 0:
+        return []
+    return history_spans(pd.Timestamp(view.times[0]), pd.Timestamp(view.times[-1]))
+
+
+def create_timeframe_partition(
+    input_path: Path,
+    timeframes_dir: Path,
+    symbol: str,
+    start: pd.Timestamp | None,
+    end: pd.Timestamp | None,
+) -> dict[str, Path]:
+    """
+    Resample the minutes in [start, end) into partition stores of every
+    timeframe, returns them by timeframe (empty for a span without
+    minutes). Bounds are week edges, so no candle spans two partitions and
+    stitch_timeframe_partitions only has to concatenate them.
+    """
+    storage = get_storage()
+    timeframes = [tf for tf in TIMEFRAMES if tf in TIMEFRAME_MAP]
+    view = storage.open_view(input_path, "1m")
+    first = 0 if start is None else np.searchsorted(view.times, start.value, "left")
+    last = len(view) if end is None else np.searchsorted(view.times, end.value, "left")
+    if first == last:
+        return {}
+
+    timeframes_data = _create_timeframes_data(
+        view.rows(first, last).to_frame(), timeframes, verbose=False
+    )
+    missing = [tf for tf in timeframes if tf not in timeframes_data]
+    if missing:
+        raise ValueError(f"Could not build {missing} candles")
+
+    partition_dir = _partition_dir(timeframes_dir, symbol)
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    label = "first" if start is None else f"{start:%Y%m%d}"
+    partition_files = {}
+    for tf in timeframes:
+        path = storage.path_for(partition_dir / f"{symbol}_{tf}_{label}")
+        storage.save(timeframes_data[tf], path, tf)
+        partition_files[tf] = path
+    return partition_files
+
+
+def stitch_timeframe_partitions(
+    input_path: Path,
+    timeframes_dir: Path,
+    symbol: str,
+    partitions: list[dict[str, Path]],
+) -> list[Path]:
+    """
+    Concatenate partition stores, given in time order, into the timeframe
+    stores of the symbol and record the build like create_timeframes_csv.
+    Anomaly masks are computed on the stitched stores, since they depend
+    on the whole history.
+    """
+    year = input_path.stem.split("_")[-1]
+    storage = get_storage()
     try:
-        if tf == "1w":
-            return _create_weekly_data(df, tf)
-        elif tf == "1d":
-            return _create_daily_data(df, tf)
-        else:
-            return _create_intraday_data(df, tf)
+        build = _TimeframesBuild(storage, input_path, timeframes_dir, symbol, year)
+        partitions = [partition for partition in partitions if partition]
+        view = storage.open_view(input_path, "1m")
+        last_timestamp = pd.Timestamp(view.times[-1]) if len(view) else None
+
+        print(f"📊 Stitching {len(partitions)} timeframe partitions for {symbol}...")
+        output_files = {
+            tf: storage.path_for(build.symbol_dir / f"{symbol}_{tf}_{year}")
+            for tf in build.timeframes
+        }
+        with ExitStack() as stack:
+            writers = {
+                tf: stack.enter_context(storage.open_writer(path, tf))
+                for tf, path in output_files.items()
+            }
+            for partition in partitions:
+                for tf, writer in writers.items():
+                    writer.write(storage.load(partition[tf], tf))
+
+        for tf, writer in writers.items():
+            print(
+                f"✅ Created {tf} timeframe data for {symbol} ({year}): "
+                f"{writer.rows} bars"
+            )
+        return build.finish(output_files, last_timestamp)
+
     except Exception as e:
-        print(f"❌ Error creating {tf} timeframe data: {e}")
-        return None
+        print(f"❌ Error stitching timeframes: {e}")
+        return []
 
+    finally:
+        remove_timeframe_partitions(timeframes_dir, symbol, partitions)
 
-def _create_weekly_data(df: pd.DataFrame, tf: str) -> pd.DataFrame:
-    print("📊 Creating weekly timeframe data with weeks starting on Monday...")
 
-    df_copy = df.copy()
+def remove_timeframe_partitions(
+    timeframes_dir: Path, symbol: str, partitions: list[dict[str, Path]]
+) -> None:
+    """Delete partition stores, and the partition directory once it is empty"""
+    storage = get_storage()
+    for partition in partitions:
+        for path in partition.values():
+            storage.remove(path)
+    partition_dir = _partition_dir(timeframes_dir, symbol)
+    if partition_dir.exists() and not any(partition_dir.iterdir()):
+        partition_dir.rmdir()
+
+
+def _partition_dir(timeframes_dir: Path, symbol: str) -> Path:
+    # Kept apart from the stores, so globs for them never match partitions
+    return timeframes_dir / symbol.lower() / "partitions"
+
+
+class _TimeframesBuild:
+    """Previous build of a symbol's timeframe stores and its manifest"""
+
+    def __init__(
+        self,
+        storage: FrameStorage,
+        input_path: Path,
+        timeframes_dir: Path,
+        symbol: str,
+        year: str,
+    ):
+        self.storage = storage
+        self.year = year
+        self.symbol = symbol
+        self.symbol_dir = timeframes_dir / symbol.lower()
+        self.symbol_dir.mkdir(parents=True, exist_ok=True)
 
-    df_copy["trading_date"] = df_copy.index.map(get_forex_trading_date)
+        for tf in TIMEFRAMES:
+            if tf not in TIMEFRAME_MAP:
+                print(f"Unsupported timeframe: {tf}")
+        self.timeframes = [tf for tf in TIMEFRAMES if tf in TIMEFRAME_MAP]
+
+        self.upstream = BuildManifest(input_path.parent, symbol).get(FORMATTED_ARTIFACT)
+        self.upstream_build = self.upstream["build"] if self.upstream else None
+
+        self.manifest = BuildManifest(self.symbol_dir, symbol)
+        self.config = _timeframes_config(storage)
+        self.entry = self.manifest.get(TIMEFRAMES_ARTIFACT)
+
+        self.previous_files = {}
+        if self.entry is not None:
+            self.previous_files = {
+                tf: storage.path_for(
+                    self.symbol_dir / f"{symbol}_{tf}_{self.entry['year']}"
+                )
+                for tf in self.timeframes
+            }
 
-    df_copy["week_start"] = df_copy["trading_date"].map(
-        lambda x: x - pd.Timedelta(days=x.weekday())
-    )
+    def is_appendable(self) -> bool:
+        """Stores were built from the same formatted build and config"""
+        return (
+            self.upstream_build is not None
+            and self.manifest.is_current(
+                TIMEFRAMES_ARTIFACT, self.config, self.upstream_build
+            )
+            and self.entry["last_timestamp"] is not None
+            and all(self.storage.exists(path) for path in self.previous_files.values())
+        )
 
-    resampled = df_copy.groupby("week_start").agg(
-        {"open": "first", "high": "max", "low": "min", "close": "last"}
-    )
+    def is_current(self) -> bool:
+        """Stores cover every formatted row already"""
+        return (
+            self.is_appendable()
+            and self.entry["last_timestamp"] == self.upstream["last_timestamp"]
+            and self.entry["year"] == self.year
+        )
 
-    resampled.index = resampled.index.map(
-        lambda x: f"{x.strftime('%Y-%m-%d')} to {(x + pd.Timedelta(days=4)).strftime('%Y-%m-%d')}"
+    def finish(
+        self, created_files: dict[str, Path], last_timestamp: pd.Timestamp | None
+    ) -> list[Path]:
+        """Replace the previous stores with a full rebuild and record it"""
+        for tf, output_file in created_files.items():
+            previous_file = self.previous_files.get(tf)
+            if previous_file is not None and previous_file != output_file:
+                self.storage.remove(previous_file)
+
+        _write_anomaly_masks(self.storage, created_files)
+
+        # A partial build is not recorded, so the next run retries it
+        if len(created_files) == len(self.timeframes):
+            self.manifest.record_build(
+                TIMEFRAMES_ARTIFACT,
+                self.config,
+                self.upstream_build,
+                last_timestamp=last_timestamp,
+                year=self.year,
+            )
+
+        return list(created_files.values())
+
+
+def _build_timeframes(
+    storage: FrameStorage,
+    input_path: Path,
+    timeframes: list[str],
+    symbol_dir: Path,
+    symbol: str,
+    year: str,
+) -> tuple[dict[str, Path], pd.Timestamp | None]:
+    """Resample the whole minute store at once, returns files and last bar"""
+    print(f"📊 Loading data for {symbol} timeframe processing...")
+    df = storage.load(input_path, "1m")
+    timeframes_data = _create_timeframes_data(df, timeframes)
+
+    created_files = {}
+    for tf in timeframes:
+        resampled = timeframes_data.get(tf)
+        if resampled is None:
+            continue
+
+        output_file = storage.path_for(symbol_dir / f"{symbol}_{tf}_{year}")
+        _save_timeframe_data(storage, resampled, output_file, tf, symbol, year)
+        created_files[tf] = output_file
+
+    return created_files, df.index[-1] if not df.empty else None
+
+
+def _stream_timeframes(
+    storage: FrameStorage,
+    input_path: Path,
+    timeframes: list[str],
+    symbol_dir: Path,
+    symbol: str,
+    year: str,
+) -> tuple[dict[str, Path], pd.Timestamp | None]:
+    """
+    Resample the minute store one chunk of whole trading weeks at a time.
+    Chunks end on Sunday midnight, an edge of every weekly, daily and
+    intraday candle, so the written stores equal the in-memory build.
+    """
+    print(f"📊 Streaming data for {symbol} timeframe processing...")
+    output_files = {
+        tf: storage.path_for(symbol_dir / f"{symbol}_{tf}_{year}") for tf in timeframes
+    }
+    chunks = align_chunks(
+        storage.iter_chunks(
+            input_path,
+            "1m",
+            chunk_rows_for(input_path, storage.size_bytes(input_path)),
+        ),
+        WEEK,
+        WEEK_ORIGIN,
     )
 
-    print(f"✅ Weekly candles created: {len(resampled)} weeks")
-    return resampled
-
+    last_timestamp = None
+    with ExitStack() as stack:
+        writers = {
+            tf: stack.enter_context(storage.open_writer(path, tf))
+            for tf, path in output_files.items()
+        }
+        for chunk in chunks:
+            timeframes_data = _create_timeframes_data(chunk, timeframes, verbose=False)
+            missing = [tf for tf in timeframes if tf not in timeframes_data]
+            if missing:
+                raise ValueError(f"Could not build {missing} candles")
+            for tf, writer in writers.items():
+                writer.write(timeframes_data[tf])
+            last_timestamp = chunk.index[-1]
+
+    for tf, writer in writers.items():
+        print(
+            f"✅ Created {tf} timeframe data for {symbol} ({year}): {writer.rows} bars"
+        )
+    return output_files, last_timestamp
 
-def _create_daily_data(df: pd.DataFrame, tf: str) -> pd.DataFrame:
-    print("📊 Creating daily timeframe data...")
-    df_copy = df.copy()
-    df_copy["trading_date"] = df_copy.index.map(get_forex_trading_date)
 
-    resampled = df_copy.groupby("trading_date").agg(
-        {"open": "first", "high": "max", "low": "min", "close": "last"}
+def _timeframes_config(storage: FrameStorage) -> str:
+    """Config and code version the timeframe stores depend on"""
+    return hash_config(
+        TIMEFRAMES,
+        TIMEFRAME_MAP,
+        storage.suffix,
+        hash_sources(_create_timeframes_data, get_forex_trading_dates, type(storage)),
     )
 
-    resampled = resampled[resampled.index.map(lambda x: pd.Timestamp(x).weekday() < 5)]
 
-    print(f"✅ Daily candles created: {len(resampled)} trading days")
+def _write_anomaly_masks(storage: FrameStorage, files: dict[str, Path]) -> None:
+    """
+    Compute the anomaly mask of every store once here instead of on every
+    metrics load. Current masks are kept, so this is cheap for stores that
+    did not change.
+    """
+    for tf, path in files.items():
+        ensure_anomaly_mask(storage, path, tf)
+
+
+def _update_timeframes(
+    storage: FrameStorage,
+    manifest: BuildManifest,
+    input_path: Path,
+    previous_files: dict[str, Path],
+    symbol_dir: Path,
+    symbol: str,
+    year: str,
+    last_timestamp: pd.Timestamp,
+) -> list[Path]:
+    """
+    Rebuild only the trailing candles touched by minutes newer than the last
+    run. Recomputing starts at the trading week of the first new minute, so
+    partial last days and weeks are replaced as well.
+    """
+    output_files = {
+        tf: storage.path_for(symbol_dir / f"{symbol}_{tf}_{year}")
+        for tf in previous_files
+    }
+    for tf, previous_file in previous_files.items():
+        if previous_file != output_files[tf]:
+            storage.rename(previous_file, output_files[tf])
+
+    view = storage.open_view(input_path, "1m")
+    first_new = np.searchsorted(view.times, last_timestamp.value, "right")
+    if first_new == len(view):
+        manifest.record_update(TIMEFRAMES_ARTIFACT, last_timestamp, year=year)
+        print(f"ℹ️ Timeframes for {symbol} are up to date")
+        _write_anomaly_masks(storage, output_files)
+        return list(output_files.values())
+
+    trading_date = get_forex_trading_dates(
+        pd.DatetimeIndex([pd.Timestamp(view.times[first_new])])
+    )[0]
+    week_start = trading_date - pd.Timedelta(days=trading_date.weekday())
+    # Every minute from the Sunday midnight before the week start trades on
+    # week_start or later, and midnight is a bin edge for all intraday timeframes
+    tail_start = week_start - pd.Timedelta(days=1)
+
+    print(f"📊 Updating {symbol} timeframes from {tail_start:%Y-%m-%d}...")
+    tail = view.slice(tail_start, None).to_frame()
+    timeframes_data = _create_timeframes_data(tail, list(output_files))
+    missing = [tf for tf in output_files if tf not in timeframes_data]
+    if missing:
+        raise ValueError(f"Could not rebuild trailing candles for {missing}")
+
+    for tf, output_file in output_files.items():
+        start = week_start if tf in DAILY_TIMEFRAMES else tail_start
+        storage.append(timeframes_data[tf], output_file, tf, start=start)
+        print(f"✅ Updated {tf} timeframe data for {symbol} ({year})")
+    _write_anomaly_masks(storage, output_files)
+
+    manifest.record_update(TIMEFRAMES_ARTIFACT, pd.Timestamp(view.times[-1]), year=year)
+    return list(output_files.values())
+
+
+def _create_timeframes_data(
+    df: pd.DataFrame, timeframes: list[str], verbose: bool = True
+) -> dict[str, pd.DataFrame]:
+    """
+    Build all requested timeframes from one minute frame in a single pass.
+    Trading dates are resolved once and shared: 1d/1w come from per-day
+    candles, intraday timeframes cascade from the next smaller one.
+    """
+    trading_dates = get_forex_trading_dates(df.index).rename("trading_date")
+    results = {}
+
+    if "1d" in timeframes or "1w" in timeframes:
+        try:
+            day_candles = df.groupby(trading_dates).agg(OHLC_AGGREGATION)
+            if "1d" in timeframes:
+                results["1d"] = _create_daily_data(day_candles, verbose)
+            if "1w" in timeframes:
+                results["1w"] = _create_weekly_data(day_candles, verbose)
+        except Exception as e:
+            print(f"❌ Error creating daily/weekly timeframe data: {e}")
+
+    intraday = [tf for tf in timeframes if tf not in DAILY_TIMEFRAMES]
+    if intraday:
+        try:
+            results.update(_create_intraday_data(df, trading_dates, intraday, verbose))
+        except Exception as e:
+            print(f"❌ Error creating intraday timeframe data: {e}")
+
+    return results
+
+
+def _create_weekly_data(
+    day_candles: pd.DataFrame, verbose: bool = True
+) -> pd.DataFrame:
+    if verbose:
+        print("📊 Creating weekly timeframe data with weeks starting on Monday...")
+
+    week_start = (
+        day_candles.index - pd.to_timedelta(day_candles.index.weekday, unit="D")
+    ).rename("week_start")
+
+    resampled = day_candles.groupby(week_start).agg(OHLC_AGGREGATION)
+
+    if verbose:
+        print(f"✅ Weekly candles created: {len(resampled)} weeks")
     return resampled
 
 
-def _create_intraday_data(df: pd.DataFrame, tf: str) -> pd.DataFrame:
-    print(f"📊 Creating {tf} timeframe data...")
+def _create_daily_data(day_candles: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
+    if verbose:
+        print("📊 Creating daily timeframe data...")
 
-    df_copy = df.copy()
-    df_copy["trading_date"] = df_copy.index.map(get_forex_trading_date)
-    df_filtered = df_copy[
-        df_copy["trading_date"].map(lambda x: pd.Timestamp(x).weekday() < 5)
-    ]
+    resampled = day_candles[day_candles.index.weekday < 5]
 
-    df_filtered = df_filtered.drop("trading_date", axis=1)
+    if verbose:
+        print(f"✅ Daily candles created: {len(resampled)} trading days")
+    return resampled
 
-    resampled = (
-        df_filtered.resample(TIMEFRAME_MAP[tf], closed="left", label="left")
-        .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-        .dropna()
-    )
 
-    if tf == "1h" or tf == "4h":
-        resampled.index = resampled.index.map(
-            lambda x: x.replace(minute=0, second=0, microsecond=0)
-        )
-    elif tf == "15m":
-        resampled.index = resampled.index.map(
-            lambda x: x.replace(minute=(x.minute // 15) * 15, second=0, microsecond=0)
-        )
-    elif tf == "5m":
-        resampled.index = resampled.index.map(
-            lambda x: x.replace(minute=(x.minute // 5) * 5, second=0, microsecond=0)
+def _create_intraday_data(
+    df: pd.DataFrame,
+    trading_dates: pd.DatetimeIndex,
+    timeframes: list[str],
+    verbose: bool = True,
+) -> dict[str, pd.DataFrame]:
+    periods = {
+        tf: pd.Timedelta(rule)
+        for tf, rule in TIMEFRAME_MAP.items()
+        if tf not in DAILY_TIMEFRAMES
+    }
+    longest = max(periods[tf] for tf in timeframes)
+    chain = sorted((tf for tf in periods if periods[tf] <= longest), key=periods.get)
+
+    # Trading days start on whole hours, so candles of the first timeframe
+    # never straddle two trading dates and can be filtered after resampling
+    weekday_minutes = trading_dates.weekday < 5
+    filter_after = pd.Timedelta(hours=1) % periods[chain[0]] == pd.Timedelta(0)
+    source = df if filter_after or weekday_minutes.all() else df[weekday_minutes]
+
+    built = {}
+    for tf in chain:
+        if verbose:
+            print(f"📊 Creating {tf} timeframe data...")
+
+        for built_tf in reversed(built):
+            if periods[tf] % periods[built_tf] == pd.Timedelta(0):
+                source = built[built_tf]
+                break
+
+        resampled = (
+            source.resample(TIMEFRAME_MAP[tf], closed="left", label="left")
+            .agg(OHLC_AGGREGATION)
+            .dropna()
         )
+        if not built and filter_after:
+            resampled = resampled[get_forex_trading_dates(resampled.index).weekday < 5]
 
-    print(f"✅ {tf} candles created: {len(resampled)} bars")
-    return resampled
+        built[tf] = resampled
+        if verbose:
+            print(f"✅ {tf} candles created: {len(resampled)} bars")
+
+    return {tf: built[tf] for tf in timeframes}
 
 
 def _save_timeframe_data(
-    resampled: pd.DataFrame, output_file: Path, tf: str, symbol: str, year: str
+    storage: FrameStorage,
+    resampled: pd.DataFrame,
+    output_file: Path,
+    tf: str,
+    symbol: str,
+    year: str,
 ) -> None:
     try:
-        resampled.to_csv(
-            output_file,
-            sep=",",
-            index=True,
-            header=["Open", "High", "Low", "Close"],
-            date_format=(
-                "%Y-%m-%d"
-                if tf == "1d"
-                else ("%Y-%m-%d %H:%M:%S" if tf != "1w" else None)
-            ),
-            float_format="%.5f",
-        )
+        storage.save(resampled, output_file, tf)
         print(f"✅ Created {tf} timeframe data for {symbol} ({year})")
     except Exception as e:
         print(f"❌ Error saving {tf} timeframe data: {e}")
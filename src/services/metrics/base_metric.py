@@ -1,82 +1,267 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Iterator
+import numpy as np
 import pandas as pd  # type: ignore
-from functools import lru_cache
+from config.settings import STREAMING_SETTINGS
+from services.storage import (
+    OhlcView,
+    active_shared_segments,
+    anomaly_settings,
+    compute_anomaly_mask,
+    ensure_anomaly_mask,
+    get_storage,
+    share_ohlc_view,
+)
+from services.storage.chunks import align_chunks, chunk_rows_for
+from services.build_manifest import BuildManifest
+from services.csv.timeframes_creator import TIMEFRAMES_ARTIFACT
+from .data_context import MetricsDataContext
+from .partials import merge_counts, slice_rows
+
+
+def data_version(timeframes_dir: Path, symbol: str) -> str | None:
+    """
+    Revision of the timeframe stores of a symbol, changes with every
+    rebuild or append. Data contexts of one version share cached inputs.
+    """
+    revision = BuildManifest(timeframes_dir / symbol.lower(), symbol).revision(
+        TIMEFRAMES_ARTIFACT
+    )
+    if revision is None:
+        return None
+    return f"{timeframes_dir}:{revision}"
 
 
 class BaseMetric(ABC):
-    def __init__(self, timeframes_dir: Path):
+    """
+    A metrics calculator. Metrics are computed through mergeable partial
+    results (see partials): partial() over a span of the history, merge()
+    of consecutive spans and finalize() into metric values, so a history
+    split into spans gives the same metrics as calculate() in one pass.
+    """
+
+    # Timeframes and intermediates read by calculate(), used for scheduling
+    inputs: tuple[str, ...] = ()
+    # Intermediates this calculator builds for others, with the inputs they need
+    outputs: dict[str, tuple[str, ...]] = {}
+    # Columns read from timeframe inputs, all of them for timeframes not listed
+    input_columns: dict[str, tuple[str, ...]] = {}
+
+    def __init__(
+        self, timeframes_dir: Path, streaming: bool = STREAMING_SETTINGS["enabled"]
+    ):
         self.timeframes_dir = timeframes_dir
-        self._data_cache = {}
+        self.storage = get_storage()
+        # Read long timeframes chunk by chunk instead of loading them whole
+        self.streaming = streaming
+        # Shared by MetricsManager for a run, created on demand otherwise
+        self.data_context: MetricsDataContext | None = None
 
-    @lru_cache(maxsize=128)
-    def filter_anomalies(
-        self, df_hash: int, columns_tuple: tuple, n_std: float = 3
-    ) -> pd.DataFrame:
-        pass
+    def load_timeframe_view(
+        self,
+        symbol: str,
+        year: str,
+        timeframe: str,
+        start=None,
+        end=None,
+        columns: list[str] | None = None,
+    ) -> OhlcView:
+        """
+        Read-only arrays for a timeframe, optionally limited to [start, end)
+        and to some columns. Only the range and columns are read where the
+        storage allows (see FrameStorage.read_range).
+        """
+        file_path = self.timeframe_path(symbol, year, timeframe)
+        if not self.storage.exists(file_path):
+            raise FileNotFoundError(
+                f"No data file found for {symbol} {timeframe} {year}"
+            )
+        return self.storage.read_range(file_path, timeframe, start, end, columns)[0]
 
-    def _filter_anomalies_internal(
-        self, df: pd.DataFrame, columns: list[str], n_std: float = 3
-    ) -> pd.DataFrame:
+    def iter_timeframe_chunks(
+        self,
+        symbol: str,
+        year: str,
+        timeframe: str,
+        period: pd.Timedelta,
+        origin: pd.Timedelta = pd.Timedelta(0),
+        start=None,
+        end=None,
+    ) -> Iterator[pd.DataFrame]:
         """
-        Internal method to filter out anomalies
+        Timeframe rows in [start, end) without anomalous candles, as
+        consecutive frames that end on period boundaries (see align_chunks).
+        Only one chunk is held at a time and nothing goes through the data
+        context.
         """
-        filtered_data = df.copy()
-        combined_mask = pd.Series(True, index=df.index)
+        file_path = self.timeframe_path(symbol, year, timeframe)
+        if not self.storage.exists(file_path):
+            raise FileNotFoundError(
+                f"No data file found for {symbol} {timeframe} {year}"
+            )
+        keep = ensure_anomaly_mask(self.storage, file_path, timeframe)
+        # Positions of the range, only the index is read for them
+        rows = self.storage.read_range(file_path, timeframe, start, end, [])[1]
+        chunk_rows = chunk_rows_for(file_path, self.storage.size_bytes(file_path))
+
+        def filtered() -> Iterator[pd.DataFrame]:
+            offset = rows.start
+            for chunk in self.storage.iter_chunks(
+                file_path, timeframe, chunk_rows, rows
+            ):
+                chunk_keep = keep[offset : offset + len(chunk)]
+                offset += len(chunk)
+                if not chunk_keep.all():
+                    chunk = chunk[chunk_keep]
+                yield chunk
+
+        return align_chunks(filtered(), period, origin)
+
+    def load_timeframe_range(
+        self, symbol: str, year: str, timeframe: str, start=None, end=None
+    ) -> pd.DataFrame:
+        """load_timeframe_data limited to rows in [start, end)"""
+        df = self.load_timeframe_data(symbol, year, timeframe)
+        if start is None and end is None:
+            return df
+        return df.iloc[slice_rows(df.index, start, end)]
+
+    def timeframe_path(self, symbol: str, year: str, timeframe: str) -> Path:
+        return self.storage.path_for(
+            self.timeframes_dir / symbol.lower() / f"{symbol}_{timeframe}_{year}"
+        )
 
-        for column in columns:
-            if column in df.columns:
-                mean = df[column].mean()
-                std = df[column].std()
-                column_mask = (df[column] >= mean - n_std * std) & (
-                    df[column] <= mean + n_std * std
-                )
-                combined_mask &= column_mask
+    def get_data_context(self, symbol: str, year: str) -> MetricsDataContext:
+        """Data context of the current run, or a private one for standalone use"""
+        if self.data_context is None or not self.data_context.matches(symbol, year):
+            if self.data_context is not None:
+                self.data_context.clear()
+            self.data_context = MetricsDataContext(
+                symbol, year, data_version(self.timeframes_dir, symbol)
+            )
+        return self.data_context
+
+    def share_data_context(self, calculator: "BaseMetric") -> "BaseMetric":
+        """Let a helper calculator reuse this calculator's loaded data"""
+        calculator.data_context = self.data_context
+        return calculator
 
-        filtered_data = filtered_data[combined_mask]
-        return filtered_data
+    def build_intermediate(self, key: str, symbol: str, year: str):
+        """Build (or fetch from the data context) an intermediate in outputs"""
+        raise KeyError(f"{type(self).__name__} does not produce {key}")
 
     def load_timeframe_data(
         self, symbol: str, year: str, timeframe: str
     ) -> pd.DataFrame:
-        """Load data for specific timeframe with caching"""
-        cache_key = f"{symbol}_{timeframe}_{year}"
-
-        if cache_key in self._data_cache:
-            return self._data_cache[cache_key].copy()
+        """
+        Load data for specific timeframe, once per data context. When the
+        context's column plan covers the columns this calculator reads, only
+        the planned columns are loaded.
+        """
+        context = self.get_data_context(symbol, year)
+        needed = self.input_columns.get(timeframe)
+        columns = context.columns.get(timeframe)
+        if needed is None or columns is None or not set(needed) <= set(columns):
+            columns = None
 
-        file_path = (
-            self.timeframes_dir / symbol.lower() / f"{symbol}_{timeframe}_{year}.csv"
+        key = timeframe if columns is None else f"{timeframe}[{','.join(columns)}]"
+        df = context.get(
+            key,
+            lambda: self._load_filtered_timeframe(symbol, year, timeframe, columns),
         )
-        if not file_path.exists():
+        # Shallow copies share the read-only data but keep added columns local
+        return df.copy(deep=False)
+
+    def _load_filtered_timeframe(
+        self,
+        symbol: str,
+        year: str,
+        timeframe: str,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Timeframe frame without anomalous candles, optionally with only some
+        columns. The mask written with the store is used when it is current,
+        otherwise it is computed and saved with the store, so later loads
+        reuse it. A context covering a span of the history reads only that
+        span. In worker pools, frames that are not plain file mappings are
+        loaded once and shared through the run's shared memory segments.
+        """
+        file_path = self.timeframe_path(symbol, year, timeframe)
+        settings = anomaly_settings(timeframe)
+        span = self.get_data_context(symbol, year).span
+        if span is not None:
+            return self._load_timeframe_span(
+                file_path, timeframe, *span, columns
+            ).to_frame()
+        if self.storage.exists(file_path):
+            # Anomalies are judged on every column, column subsets need the
+            # mask of the whole store too
+            keep = ensure_anomaly_mask(self.storage, file_path, timeframe)
+        else:
+            keep = None
+
+        def load() -> OhlcView:
+            view = self.load_timeframe_view(symbol, year, timeframe, columns=columns)
+            return self._filter_anomalies(view, keep, settings)
+
+        segments = active_shared_segments()
+        if segments is None or (
+            self.storage.memory_mapped and keep is not None and keep.all()
+        ):
+            return load().to_frame()
+
+        if not self.storage.exists(file_path):
             raise FileNotFoundError(
                 f"No data file found for {symbol} {timeframe} {year}"
             )
+        stat = file_path.stat()
+        key = (str(file_path), stat.st_size, stat.st_mtime_ns, settings, columns)
+        return share_ohlc_view(segments, key, load).to_frame()
 
-        df = pd.read_csv(
-            file_path,
-            index_col=0,
-            parse_dates=True if timeframe != "1w" else False,
-            dtype={
-                "Open": "float32",
-                "High": "float32",
-                "Low": "float32",
-                "Close": "float32",
-            },
-        )
+    def _load_timeframe_span(
+        self,
+        file_path: Path,
+        timeframe: str,
+        start=None,
+        end=None,
+        columns: list[str] | None = None,
+    ) -> OhlcView:
+        """
+        Rows in [start, end) without anomalous candles, judged by the mask
+        of the whole store. Only the span and columns are read where the
+        storage allows.
+        """
+        if not self.storage.exists(file_path):
+            raise FileNotFoundError(f"No data file found: {file_path}")
+        keep = ensure_anomaly_mask(self.storage, file_path, timeframe)
+        view, rows = self.storage.read_range(file_path, timeframe, start, end, columns)
+        return self._filter_anomalies(view, keep[rows], anomaly_settings(timeframe))
 
-        std_threshold = 5 if timeframe == "1w" else 3
-        df = self._filter_anomalies_internal(
-            df, ["Open", "High", "Low", "Close"], std_threshold
-        )
-        if len(self._data_cache) < 50:
-            self._data_cache[cache_key] = df.copy()
+    @staticmethod
+    def _filter_anomalies(
+        view: OhlcView, keep: np.ndarray | None, settings: dict
+    ) -> OhlcView:
+        if keep is None or len(keep) != len(view):
+            keep = compute_anomaly_mask(view.to_frame(), settings)
 
-        return df
+        # Keep the zero-copy view when nothing has to be dropped
+        if keep.all():
+            return view
+        return OhlcView(
+            view.times[keep],
+            view.values[:, keep],
+            view.columns,
+            view.index_name,
+            view.timeframe,
+        )
 
     def clear_cache(self):
-        """Clear the data cache"""
-        self._data_cache.clear()
+        """Release the data loaded for the current context"""
+        if self.data_context is not None:
+            self.data_context.clear()
+            self.data_context = None
 
     @staticmethod
     def round_metric(value: float, decimals: int = 2) -> float:
@@ -97,7 +282,23 @@ class BaseMetric(ABC):
 
         return {metric_name: 0.0 for metric_name in metric_names}
 
-    @abstractmethod
     def calculate(self, symbol: str, year: str) -> dict:
-        """Calculate metric values"""
+        """Calculate metric values over the whole history"""
+        return self.finalize(symbol, self.partial(symbol, year))
+
+    @abstractmethod
+    def partial(self, symbol: str, year: str, start=None, end=None) -> dict:
+        """
+        Partial result over the history in [start, end). Bounds other than
+        None must be week edges (see storage.chunks.history_spans).
+        """
+        pass
+
+    def merge(self, partials: list[dict]) -> dict:
+        """Partial result of consecutive spans, given in time order"""
+        return merge_counts(partials)
+
+    @abstractmethod
+    def finalize(self, symbol: str, partial: dict) -> dict:
+        """Metric values of a partial result"""
         pass
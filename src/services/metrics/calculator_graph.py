@@ -0,0 +1,151 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+from services.storage.base import OHLC_COLUMNS
+from .base_metric import BaseMetric
+
+logger = logging.getLogger(__name__)
+
+
+class CalculatorGraph:
+    """
+    Dependency graph of one metrics run. Every input a calculator declares
+    (timeframe or intermediate) becomes a node of its own that is loaded
+    once, before the calculators reading it; intermediates depend on the
+    inputs of the calculator producing them. Independent nodes run
+    concurrently on a thread pool, so all nodes share one data context.
+    Calculator nodes call calculate() unless run_calculator says otherwise.
+
+    The graph also collects the columns read from every timeframe node: the
+    union of its consumers' input_columns, None once one of them reads all.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        year: str,
+        calculators: dict[str, BaseMetric],
+        producers: list[BaseMetric],
+        run_calculator: Callable[[BaseMetric], Any] | None = None,
+    ):
+        self.symbol = symbol
+        self.year = year
+        # name -> (dependencies, task)
+        self.nodes: dict[str, tuple[set[str], Callable[[], Any]]] = {}
+        # timeframe -> columns its consumers read, None for all columns
+        self.timeframe_columns: dict[str, tuple[str, ...] | None] = {}
+
+        if run_calculator is None:
+            run_calculator = lambda calculator: calculator.calculate(symbol, year)
+
+        self._producers = {
+            key: producer for producer in producers for key in producer.outputs
+        }
+        for name, calculator in calculators.items():
+            for key in calculator.inputs:
+                self._add_input(key, calculator)
+            self.nodes[name] = (
+                {self._input_node(key) for key in calculator.inputs},
+                lambda calculator=calculator: run_calculator(calculator),
+            )
+
+    @staticmethod
+    def _input_node(key: str) -> str:
+        return f"input:{key}"
+
+    def _add_input(self, key: str, consumer: BaseMetric) -> None:
+        node = self._input_node(key)
+        producer = self._producers.get(key)
+        if producer is None:
+            self._add_columns(key, consumer.input_columns.get(key))
+        if node in self.nodes:
+            return
+
+        if producer is None:
+            task = lambda: consumer.load_timeframe_data(self.symbol, self.year, key)
+            self.nodes[node] = (set(), self._preload(key, task))
+            return
+
+        requirements = producer.outputs[key]
+        for requirement in requirements:
+            self._add_input(requirement, producer)
+        task = lambda: producer.build_intermediate(key, self.symbol, self.year)
+        self.nodes[node] = (
+            {self._input_node(requirement) for requirement in requirements},
+            self._preload(key, task),
+        )
+
+    def _add_columns(self, timeframe: str, columns: tuple[str, ...] | None) -> None:
+        current = self.timeframe_columns.get(timeframe, ())
+        if current is None or columns is None:
+            self.timeframe_columns[timeframe] = None
+        else:
+            wanted = {*current, *columns}
+            self.timeframe_columns[timeframe] = tuple(
+                column for column in OHLC_COLUMNS if column in wanted
+            )
+
+    def _preload(self, key: str, task: Callable[[], Any]) -> Callable[[], None]:
+        """
+        Inputs are only warmed up here. A failed load is not cached by the
+        data context, so the calculators retry it and handle the error the
+        same way they do when running on their own; the failure is logged.
+        """
+
+        def run() -> None:
+            try:
+                task()
+            except Exception:
+                logger.warning(
+                    "Preloading %s for %s %s failed, its calculators retry it",
+                    key,
+                    self.symbol,
+                    self.year,
+                    exc_info=True,
+                )
+
+        return run
+
+    def run(self, max_workers: int = 1) -> dict[str, Any]:
+        """Run every node once its dependencies finished, return node results"""
+        if max_workers <= 1:
+            return self._run_serial()
+
+        results = {}
+        pending = dict(self.nodes)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while pending or running:
+                ready = [
+                    name
+                    for name, (dependencies, _) in pending.items()
+                    if dependencies <= results.keys()
+                ]
+                for name in ready:
+                    _, task = pending.pop(name)
+                    running[executor.submit(task)] = name
+
+                if not running:
+                    raise ValueError(f"Unresolvable calculator dependencies: {pending}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[running.pop(future)] = future.result()
+
+        return results
+
+    def _run_serial(self) -> dict[str, Any]:
+        results = {}
+        pending = dict(self.nodes)
+        while pending:
+            ready = [
+                name
+                for name, (dependencies, _) in pending.items()
+                if dependencies <= results.keys()
+            ]
+            if not ready:
+                raise ValueError(f"Unresolvable calculator dependencies: {pending}")
+            for name in ready:
+                _, task = pending.pop(name)
+                results[name] = task()
+        return results
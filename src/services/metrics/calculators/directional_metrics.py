@@ -1,26 +1,38 @@
-import pandas as pd  # type: ignore
 from ..base_metric import BaseMetric
-from .session_distribution_metrics import SessionDistributionMetrics
+from .session_distribution_metrics import (
+    SESSION_CUBE,
+    SESSION_BREAKS,
+    SessionDistributionMetrics,
+)
 
 
 class DirectionalMetrics(BaseMetric):
+    inputs = (SESSION_CUBE, SESSION_BREAKS)
+
     def calculate(self, symbol: str, year: str) -> dict:
-        session_dist = SessionDistributionMetrics(self.timeframes_dir)
+        try:
+            return super().calculate(symbol, year)
+        except Exception as e:
+            print(f"Error loading daily session data: {e}")
+
+        return self._get_default_metrics(self._get_metric_names())
 
-        intermediate_cache_file = (
-            session_dist.cache_dir / f"{symbol}_{year}_daily_session_data.csv"
-        )
+    def partial(self, symbol: str, year: str, start=None, end=None) -> dict:
+        self.get_data_context(symbol, year)
+        session_dist = self._session_distribution()
+        cube = session_dist.load_session_cube(symbol, year, start, end)
+        return {
+            "days": len(cube),
+            "breaks": session_dist.load_session_breaks(symbol, year, start, end),
+        }
 
-        if intermediate_cache_file.exists():
-            try:
-                daily_session_df = pd.read_csv(
-                    intermediate_cache_file, parse_dates=["trading_date"]
-                )
-                return session_dist.get_directional_metrics(daily_session_df)
-            except Exception as e:
-                print(f"Error loading cached data: {e}")
+    def finalize(self, symbol: str, partial: dict) -> dict:
+        if partial["days"] == 0:
+            return self._get_default_metrics(self._get_metric_names())
+        return self._session_distribution().directional_from_breaks(partial["breaks"])
 
-        return self._get_default_metrics(self._get_metric_names())
+    def _session_distribution(self) -> SessionDistributionMetrics:
+        return self.share_data_context(SessionDistributionMetrics(self.timeframes_dir))
 
     def _get_metric_names(self) -> list[str]:
         return [
@@ -1,44 +1,58 @@
-import pandas as pd  # type: ignore
 from ..base_metric import BaseMetric
-from .session_distribution_metrics import SessionDistributionMetrics
+from .session_distribution_metrics import (
+    SESSION_CUBE,
+    SESSION_BREAKS,
+    SessionDistributionMetrics,
+)
 from .directional_metrics import DirectionalMetrics
 
 
 class IntradayMetrics(BaseMetric):
+    inputs = (SESSION_CUBE, SESSION_BREAKS)
+
     def calculate(self, symbol: str, year: str) -> dict:
-        session_dist = SessionDistributionMetrics(self.timeframes_dir)
-        directional = DirectionalMetrics(self.timeframes_dir)
+        try:
+            return super().calculate(symbol, year)
+        except Exception as e:
+            print(f"Error loading daily session data: {e}")
 
-        intermediate_cache_file = (
-            session_dist.cache_dir / f"{symbol}_{year}_daily_session_data.csv"
-        )
+        return self._get_default_metrics(self._get_metric_names())
 
-        metrics = self._get_default_metrics(self._get_metric_names())
+    def partial(self, symbol: str, year: str, start=None, end=None) -> dict:
+        self.get_data_context(symbol, year)
+        session_dist = self.share_data_context(
+            SessionDistributionMetrics(self.timeframes_dir)
+        )
+        cube = session_dist.load_session_cube(symbol, year, start, end)
+        return {
+            "days": len(cube),
+            "breaks": session_dist.load_session_breaks(symbol, year, start, end),
+            "directions": session_dist.count_directional_extremes(cube),
+        }
 
-        if intermediate_cache_file.exists():
-            try:
-                daily_session_df = pd.read_csv(
-                    intermediate_cache_file, parse_dates=["trading_date"]
-                )
+    def finalize(self, symbol: str, partial: dict) -> dict:
+        session_dist = self.share_data_context(
+            SessionDistributionMetrics(self.timeframes_dir)
+        )
+        directional = self.share_data_context(DirectionalMetrics(self.timeframes_dir))
 
-                # Get standard session comparison metrics
-                session_metrics = session_dist.get_session_comparison_metrics(
-                    daily_session_df
-                )
-                metrics.update(session_metrics)
+        metrics = self._get_default_metrics(self._get_metric_names())
+        if partial["days"] == 0:
+            return metrics
 
-                # Get directional (bullish/bearish) session interactions metrics
-                directional_metrics = directional.calculate(symbol, year)
-                metrics.update(directional_metrics)
+        # Get standard session comparison metrics
+        session_metrics = session_dist.session_comparison_from_breaks(partial["breaks"])
+        metrics.update(session_metrics)
 
-                # Get bullish/bearish session distribution metrics
-                directional_session_metrics = (
-                    session_dist.get_directional_session_distribution(daily_session_df)
-                )
-                metrics.update(directional_session_metrics)
+        # Get directional (bullish/bearish) session interactions metrics
+        directional_metrics = directional.finalize(symbol, partial)
+        metrics.update(directional_metrics)
 
-            except Exception as e:
-                print(f"Error loading cached data: {e}")
+        # Get bullish/bearish session distribution metrics
+        directional_session_metrics = session_dist.directional_distribution_from_counts(
+            partial["directions"]
+        )
+        metrics.update(directional_session_metrics)
 
         return metrics
 
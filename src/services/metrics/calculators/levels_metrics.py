@@ -1,10 +1,13 @@
 from pathlib import Path
 from typing import Dict, Any
-import pandas as pd
+import numpy as np
 from ..base_metric import BaseMetric
 
 
 class LevelsMetrics(BaseMetric):
+    inputs = ("1d",)
+    input_columns = {"1d": ("High", "Low")}
+
     def __init__(self, timeframes_dir: Path):
         super().__init__(timeframes_dir)
         import logging
@@ -21,21 +24,7 @@ class LevelsMetrics(BaseMetric):
 
     def calculate(self, symbol: str, year: str) -> Dict[str, Any]:
         try:
-            daily_data = self._load_timeframe_data(symbol, year, "1d")
-            if daily_data is None or daily_data.empty:
-                return self._get_default_metrics()
-
-            pdh_probability = self._calculate_pdh_probability(daily_data)
-
-            pdl_probability = self._calculate_pdl_probability(daily_data)
-
-            pd_levels_probability = self._calculate_pd_levels_probability(daily_data)
-
-            return {
-                "PDH Probability": pdh_probability,
-                "PDL Probability": pdl_probability,
-                "PD Levels Probability": pd_levels_probability,
-            }
+            return self.finalize(symbol, self.partial(symbol, year))
 
         except Exception as e:
             self.logger.error(
@@ -43,54 +32,79 @@ class LevelsMetrics(BaseMetric):
             )
             return self._get_default_metrics()
 
-    def _calculate_pdh_probability(self, daily_data: pd.DataFrame) -> float:
-        """Calculate probability of reaching Previous Day High."""
-        if len(daily_data) < 2:
-            return 0.0
-
-        daily_data["prev_high"] = daily_data["High"].shift(1)
-
-        reaches_pdh = daily_data["High"] >= daily_data["prev_high"]
-
-        valid_days = reaches_pdh.dropna()
-        if len(valid_days) == 0:
-            return 0.0
-
-        probability = (valid_days.sum() / len(valid_days)) * 100
-        return round(probability, 2)
-
-    def _calculate_pdl_probability(self, daily_data: pd.DataFrame) -> float:
-        """Calculate probability of reaching Previous Day Low."""
-        if len(daily_data) < 2:
-            return 0.0
-
-        daily_data["prev_low"] = daily_data["Low"].shift(1)
-
-        reaches_pdl = daily_data["Low"] <= daily_data["prev_low"]
+    def partial(self, symbol: str, year: str, start=None, end=None) -> Dict[str, Any]:
+        """
+        Days reaching the previous day's high / low / either, counted over
+        every day of the span (the first day has no previous day and counts
+        as not reaching it). The span's first and last day let merge() count
+        the day after a span edge.
+        """
+        daily_data = self.load_timeframe_range(symbol, year, "1d", start, end)
+        if daily_data is None or daily_data.empty:
+            return self._empty_partial()
+
+        high = daily_data["High"].to_numpy()
+        low = daily_data["Low"].to_numpy()
+        reaches_pdh = high[1:] >= high[:-1]
+        reaches_pdl = low[1:] <= low[:-1]
+        return {
+            "days": len(daily_data),
+            "pdh": reaches_pdh.sum(),
+            "pdl": reaches_pdl.sum(),
+            "either": (reaches_pdh | reaches_pdl).sum(),
+            "first": (high[0], low[0]),
+            "last": (high[-1], low[-1]),
+        }
+
+    @staticmethod
+    def _empty_partial() -> Dict[str, Any]:
+        zero = np.int64(0)
+        return {"days": 0, "pdh": zero, "pdl": zero, "either": zero}
+
+    def merge(self, partials: list[Dict[str, Any]]) -> Dict[str, Any]:
+        merged = self._empty_partial()
+        for partial in partials:
+            if partial["days"] == 0:
+                continue
+            if merged["days"] == 0:
+                merged = dict(partial)
+                continue
+
+            (previous_high, previous_low), (high, low) = (
+                merged["last"],
+                partial["first"],
+            )
+            reaches_pdh = high >= previous_high
+            reaches_pdl = low <= previous_low
+            merged = {
+                "days": merged["days"] + partial["days"],
+                "pdh": merged["pdh"] + partial["pdh"] + reaches_pdh,
+                "pdl": merged["pdl"] + partial["pdl"] + reaches_pdl,
+                "either": merged["either"]
+                + partial["either"]
+                + (reaches_pdh | reaches_pdl),
+                "first": merged["first"],
+                "last": partial["last"],
+            }
+        return merged
 
-        valid_days = reaches_pdl.dropna()
-        if len(valid_days) == 0:
-            return 0.0
+    def finalize(self, symbol: str, partial: Dict[str, Any]) -> Dict[str, Any]:
+        if partial["days"] == 0:
+            return self._get_default_metrics()
 
-        probability = (valid_days.sum() / len(valid_days)) * 100
-        return round(probability, 2)
+        return {
+            "PDH Probability": self._probability(partial, "pdh"),
+            "PDL Probability": self._probability(partial, "pdl"),
+            "PD Levels Probability": self._probability(partial, "either"),
+        }
 
-    def _calculate_pd_levels_probability(self, daily_data: pd.DataFrame) -> float:
-        """Calculate probability of reaching either Previous Day High OR Low."""
-        if len(daily_data) < 2:
+    @staticmethod
+    def _probability(partial: Dict[str, Any], key: str) -> float:
+        """Percentage of days reaching a previous day level"""
+        if partial["days"] < 2:
             return 0.0
 
-        daily_data["prev_high"] = daily_data["High"].shift(1)
-        daily_data["prev_low"] = daily_data["Low"].shift(1)
-
-        reaches_pdh = daily_data["High"] >= daily_data["prev_high"]
-        reaches_pdl = daily_data["Low"] <= daily_data["prev_low"]
-        reaches_either = reaches_pdh | reaches_pdl
-
-        valid_days = reaches_either.dropna()
-        if len(valid_days) == 0:
-            return 0.0
-        probability = (valid_days.sum() / len(valid_days)) * 100
+        probability = (partial[key] / partial["days"]) * 100
         return round(probability, 2)
 
     def _get_metric_names(self) -> list[str]:
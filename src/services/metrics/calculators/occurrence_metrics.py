@@ -1,155 +1,123 @@
+import numpy as np
 import pandas as pd  # type: ignore
 from ..base_metric import BaseMetric
 
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+# Days from a week start that still belong to the week (inclusive)
+WEEK_SPAN_NS = pd.Timedelta(days=6).value
+
 
 class OccurrenceMetrics(BaseMetric):
+    inputs = ("1d", "1w")
+    # Weekly direction needs the weekly open and close, days only extremes
+    input_columns = {"1d": ("High", "Low")}
+
     def calculate(self, symbol: str, year: str) -> dict:
         try:
-            daily_data = self.load_timeframe_data(symbol, year, "1d")
-            weekly_data = self.load_timeframe_data(symbol, year, "1w")
-            if daily_data.empty or weekly_data.empty:
-                return self._get_empty_metrics()
-
-            daily_data["weekday"] = pd.to_datetime(daily_data.index).weekday
-
-            high_counts = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0}
-            low_counts = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0}
-
-            # Додаткові лічильники для bullish/bearish тижнів
-            bullish_high_counts = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0}
-            bearish_high_counts = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0}
-            total_weeks = 0
-            total_bullish_weeks = 0
-            total_bearish_weeks = 0
-
-            for week_start, week_data in weekly_data.iterrows():
-                week_high = week_data["High"]
-                week_low = week_data["Low"]
-
-                # Parse week start date from range format like "2000-06-05 to 2000-06-11"
-                if " to " in str(week_start):
-                    week_start_str = str(week_start).split(" to ")[0]
-                    week_end_str = str(week_start).split(" to ")[1]
-                    week_start_date = pd.to_datetime(week_start_str)
-                    week_end_date = pd.to_datetime(week_end_str)
-                else:
-                    week_start_date = pd.to_datetime(week_start)
-                    week_end_date = week_start_date + pd.Timedelta(days=6)
-
-                # Get daily data for this week
-                week_mask = (pd.to_datetime(daily_data.index) >= week_start_date) & (
-                    pd.to_datetime(daily_data.index) <= week_end_date
-                )
-                week_daily_data = daily_data[week_mask]
-
-                if len(week_daily_data) == 0:
-                    continue
-
-                total_weeks += 1
-
-                week_open = week_data["Open"]
-                week_close = week_data["Close"]
-                is_bullish_week = week_close > week_open
-                is_bearish_week = week_close < week_open
-
-                if is_bullish_week:
-                    total_bullish_weeks += 1
-                elif is_bearish_week:
-                    total_bearish_weeks += 1
-
-                high_days = week_daily_data[week_daily_data["High"] == week_high]
-                if not high_days.empty:
-                    first_high_day = high_days.iloc[0]
-                    high_weekday = first_high_day["weekday"]
-                    if high_weekday in high_counts:
-                        high_counts[high_weekday] += 1
-
-                        if is_bullish_week:
-                            bullish_high_counts[high_weekday] += 1
-                        elif is_bearish_week:
-                            bearish_high_counts[high_weekday] += 1
-
-                low_days = week_daily_data[week_daily_data["Low"] == week_low]
-                if not low_days.empty:
-                    first_low_day = low_days.iloc[0]
-                    low_weekday = first_low_day["weekday"]
-                    if low_weekday in low_counts:
-                        low_counts[low_weekday] += 1
-
-            if total_weeks > 0:
-                metrics = {
-                    "High in Monday": round((high_counts[0] / total_weeks) * 100, 2),
-                    "High in Tuesday": round((high_counts[1] / total_weeks) * 100, 2),
-                    "High in Wednesday": round((high_counts[2] / total_weeks) * 100, 2),
-                    "High in Thursday": round((high_counts[3] / total_weeks) * 100, 2),
-                    "High in Friday": round((high_counts[4] / total_weeks) * 100, 2),
-                    "Low in Monday": round((low_counts[0] / total_weeks) * 100, 2),
-                    "Low in Tuesday": round((low_counts[1] / total_weeks) * 100, 2),
-                    "Low in Wednesday": round((low_counts[2] / total_weeks) * 100, 2),
-                    "Low in Thursday": round((low_counts[3] / total_weeks) * 100, 2),
-                    "Low in Friday": round((low_counts[4] / total_weeks) * 100, 2),
-                    # Bullish High metrics
-                    "Bullish High in Monday": (
-                        round((bullish_high_counts[0] / total_bullish_weeks) * 100, 2)
-                        if total_bullish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bullish High in Tuesday": (
-                        round((bullish_high_counts[1] / total_bullish_weeks) * 100, 2)
-                        if total_bullish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bullish High in Wednesday": (
-                        round((bullish_high_counts[2] / total_bullish_weeks) * 100, 2)
-                        if total_bullish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bullish High in Thursday": (
-                        round((bullish_high_counts[3] / total_bullish_weeks) * 100, 2)
-                        if total_bullish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bullish High in Friday": (
-                        round((bullish_high_counts[4] / total_bullish_weeks) * 100, 2)
-                        if total_bullish_weeks > 0
-                        else 0.0
-                    ),
-                    # Bearish High metrics
-                    "Bearish High in Monday": (
-                        round((bearish_high_counts[0] / total_bearish_weeks) * 100, 2)
-                        if total_bearish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bearish High in Tuesday": (
-                        round((bearish_high_counts[1] / total_bearish_weeks) * 100, 2)
-                        if total_bearish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bearish High in Wednesday": (
-                        round((bearish_high_counts[2] / total_bearish_weeks) * 100, 2)
-                        if total_bearish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bearish High in Thursday": (
-                        round((bearish_high_counts[3] / total_bearish_weeks) * 100, 2)
-                        if total_bearish_weeks > 0
-                        else 0.0
-                    ),
-                    "Bearish High in Friday": (
-                        round((bearish_high_counts[4] / total_bearish_weeks) * 100, 2)
-                        if total_bearish_weeks > 0
-                        else 0.0
-                    ),
-                }
-            else:
-                metrics = self._get_empty_metrics()
-
-            return metrics
+            return self.finalize(symbol, self.partial(symbol, year))
 
         except Exception as e:
             print(f"❌ Error calculating occurrence metrics for {symbol}: {e}")
             return self._get_empty_metrics()
 
+    def partial(self, symbol: str, year: str, start=None, end=None) -> dict:
+        """Weekday counts of weekly highs and lows, see _count_weekly_extremes"""
+        daily_data = self.load_timeframe_range(symbol, year, "1d", start, end)
+        weekly_data = self.load_timeframe_range(symbol, year, "1w", start, end)
+        if daily_data.empty or weekly_data.empty:
+            return self._empty_counts()
+        return self._count_weekly_extremes(daily_data, weekly_data)
+
+    def finalize(self, symbol: str, partial: dict) -> dict:
+        total_weeks = partial["total_weeks"]
+        if total_weeks == 0:
+            return self._get_empty_metrics()
+
+        metrics = {}
+        for prefix, key, total in (
+            ("High in", "high", total_weeks),
+            ("Low in", "low", total_weeks),
+            ("Bullish High in", "bullish_high", partial["total_bullish_weeks"]),
+            ("Bearish High in", "bearish_high", partial["total_bearish_weeks"]),
+        ):
+            for weekday, day_name in enumerate(WEEKDAY_NAMES):
+                metrics[f"{prefix} {day_name}"] = (
+                    round((int(partial[key][weekday]) / total) * 100, 2)
+                    if total > 0
+                    else 0.0
+                )
+
+        return metrics
+
+    @staticmethod
+    def _empty_counts() -> dict:
+        return {
+            "total_weeks": 0,
+            "total_bullish_weeks": 0,
+            "total_bearish_weeks": 0,
+            **{
+                key: np.zeros(5, dtype=np.int64)
+                for key in ("high", "low", "bullish_high", "bearish_high")
+            },
+        }
+
+    @staticmethod
+    def _count_weekly_extremes(
+        daily_data: pd.DataFrame, weekly_data: pd.DataFrame
+    ) -> dict:
+        """
+        Count on which weekday each week made its high and low.
+
+        Every day gets the key of the week whose [start, start + 6 days]
+        window contains it, the first day matching the weekly high (low)
+        is the week's high (low) day, and weekday counts split by weekly
+        direction come from one bincount. Weeks without daily candles are
+        skipped.
+        """
+        week_starts = pd.DatetimeIndex(weekly_data.index).as_unit("ns").asi8
+        days = pd.DatetimeIndex(daily_data.index)
+        day_times = days.as_unit("ns").asi8
+
+        week_of_day = np.searchsorted(week_starts, day_times, side="right") - 1
+        in_week = (week_of_day >= 0) & (
+            day_times <= week_starts[np.maximum(week_of_day, 0)] + WEEK_SPAN_NS
+        )
+        day_rows = np.flatnonzero(in_week)
+        week_of_day = week_of_day[in_week]
+        weekdays = np.asarray(days.weekday)[in_week]
+
+        weeks = np.unique(week_of_day)
+        week_open = weekly_data["Open"].to_numpy()
+        week_close = weekly_data["Close"].to_numpy()
+        # 0: flat week, 1: bullish, 2: bearish
+        direction = np.where(
+            week_close > week_open, 1, np.where(week_close < week_open, 2, 0)
+        )
+
+        def first_matching_days(column: str) -> tuple[np.ndarray, np.ndarray]:
+            """Weekday and week of the first day matching each weekly extreme"""
+            day_values = daily_data[column].to_numpy()[day_rows]
+            matches = day_values == weekly_data[column].to_numpy()[week_of_day]
+            matched_weeks, first = np.unique(week_of_day[matches], return_index=True)
+            return weekdays[matches][first], matched_weeks
+
+        high_weekdays, high_weeks = first_matching_days("High")
+        low_weekdays, _ = first_matching_days("Low")
+
+        high_by_direction = np.bincount(
+            direction[high_weeks] * 5 + high_weekdays, minlength=15
+        ).reshape(3, 5)
+
+        return {
+            "total_weeks": len(weeks),
+            "total_bullish_weeks": int((direction[weeks] == 1).sum()),
+            "total_bearish_weeks": int((direction[weeks] == 2).sum()),
+            "high": np.bincount(high_weekdays, minlength=5)[:5],
+            "low": np.bincount(low_weekdays, minlength=5)[:5],
+            "bullish_high": high_by_direction[1],
+            "bearish_high": high_by_direction[2],
+        }
+
     def _get_empty_metrics(self) -> dict:
         return self._get_default_metrics(self._get_metric_names())
 
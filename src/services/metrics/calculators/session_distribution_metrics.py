@@ -1,14 +1,50 @@
 from pathlib import Path
+import numpy as np
 import pandas as pd  # type: ignore
 import logging
 from ..base_metric import BaseMetric
+from ..session_cube import (
+    HIGH,
+    LOW,
+    PROFILE_SUFFIX,
+    SUFFIX as CUBE_SUFFIX,
+    TRADING_DAY_START_MINUTE,
+    IntradayProfile,
+    SessionCube,
+)
 from config.sessions_config import SESSIONS
-from utils.session_utils import is_time_in_session
+from config.settings import STREAMING_SETTINGS
+from config.timeframes_config import TIMEFRAME_MAP
+from services.build_manifest import BuildManifest, hash_config, hash_sources
+from services.csv.timeframes_creator import TIMEFRAMES_ARTIFACT
+from services.storage import anomaly_settings, compute_anomaly_mask
+from utils.session_utils import SessionCalendar, session_calendar
+
+INTRADAY_PROFILE = "intraday_profile"
+SESSION_CUBE = "session_cube"
+SESSION_BREAKS = "session_breaks"
+# Bars the intraday profile is built from
+BAR_TIMEFRAME = "5m"
+# Day direction codes
+BULLISH = 1
+BEARISH = 2
 
 
 class SessionDistributionMetrics(BaseMetric):
-    def __init__(self, timeframes_dir: Path):
-        super().__init__(timeframes_dir)
+    inputs = (SESSION_CUBE,)
+    outputs = {
+        INTRADAY_PROFILE: (BAR_TIMEFRAME,),
+        SESSION_CUBE: (INTRADAY_PROFILE,),
+        SESSION_BREAKS: (SESSION_CUBE,),
+    }
+
+    def __init__(
+        self, timeframes_dir: Path, streaming: bool = STREAMING_SETTINGS["enabled"]
+    ):
+        super().__init__(timeframes_dir, streaming)
+        if self.streaming:
+            # The profile streams its bars, nothing to load up front
+            self.outputs = {**self.outputs, INTRADAY_PROFILE: ()}
         data_dir = timeframes_dir.parent
         self.cache_dir = data_dir / "metrics" / "session_distribution"
         self.cache_dir.mkdir(parents=True, exist_ok=True)  # Setup logging
@@ -26,210 +62,297 @@ class SessionDistributionMetrics(BaseMetric):
         self.logger.info(
             f"Starting session distribution calculation for {symbol} {year}"
         )
+        return super().calculate(symbol, year)
 
-        # Check for cached intermediate data first
-        intermediate_cache_file = (
-            self.cache_dir / f"{symbol}_{year}_daily_session_data.csv"
+    def partial(self, symbol: str, year: str, start=None, end=None) -> dict:
+        return self.count_session_extremes(
+            self.load_session_cube(symbol, year, start, end)
         )
 
-        if intermediate_cache_file.exists():
-            self.logger.info(
-                f"Loading cached intermediate data from {intermediate_cache_file}"
-            )
-            try:
-                daily_session_df = pd.read_csv(
-                    intermediate_cache_file, parse_dates=["trading_date"]
-                )
-                self.logger.info(f"Loaded {len(daily_session_df)} cached daily records")
-            except Exception as e:
-                self.logger.warning(
-                    f"Failed to load intermediate cache: {e}. Recalculating..."
-                )
-                daily_session_df = self._prepare_daily_session_data(
-                    symbol, year, intermediate_cache_file
-                )
-        else:
-            # Prepare daily session data from 5-minute data
-            daily_session_df = self._prepare_daily_session_data(
-                symbol, year, intermediate_cache_file
-            )
-
-        if daily_session_df.empty:
-            self.logger.warning(f"No daily session data available for {symbol} {year}")
+    def finalize(self, symbol: str, partial: dict) -> dict:
+        if partial["days"] == 0:
+            self.logger.warning(f"No daily session data available for {symbol}")
             return self._create_empty_metrics()
 
         # Calculate session distribution from cached/prepared data
-        return self._calculate_session_percentages(daily_session_df)
+        return self._session_percentages(partial)
 
-    def _prepare_daily_session_data(
-        self, symbol: str, year: str, cache_file: Path
-    ) -> pd.DataFrame:
+    def load_intraday_profile(self, symbol: str, year: str) -> IntradayProfile:
         """
-        Prepare daily session data from 5-minute data and cache it.
-        Returns DataFrame with columns: trading_date, daily_high_session, daily_low_session
+        Days x bar buckets profile, built from 5-minute data or mapped from
+        the disk cache. It does not depend on SESSIONS, so a new session
+        layout only re-reduces it.
         """
-        self.logger.info(f"Preparing daily session data for {symbol} {year}")
+        return self.get_data_context(symbol, year).get(
+            INTRADAY_PROFILE, lambda: self._read_intraday_profile(symbol, year)
+        )
+
+    def load_session_cube(
+        self, symbol: str, year: str, start=None, end=None
+    ) -> SessionCube:
+        """
+        Days x sessions cube, built or mapped from the disk cache once per
+        data context and shared (read-only) with the session calculators.
+        With bounds, only the trading dates in [start, end).
+        """
+        cube = self.get_data_context(symbol, year).get(
+            SESSION_CUBE, lambda: self._read_session_cube(symbol, year)
+        )
+        if start is None and end is None:
+            return cube
+        return cube.slice_dates(start, end)
+
+    def build_intermediate(self, key: str, symbol: str, year: str):
+        if key == INTRADAY_PROFILE:
+            return self.load_intraday_profile(symbol, year)
+        if key == SESSION_CUBE:
+            return self.load_session_cube(symbol, year)
+        if key == SESSION_BREAKS:
+            return self.load_session_breaks(symbol, year)
+        return super().build_intermediate(key, symbol, year)
+
+    def _read_intraday_profile(self, symbol: str, year: str) -> IntradayProfile:
+        # A span's profile is partial, the cache holds the whole history
+        if self.get_data_context(symbol, year).span is not None:
+            return self._prepare_intraday_profile(symbol, year)
+        config, upstream = self._profile_cache_key(symbol)
+        return self._read_cached(
+            symbol,
+            year,
+            INTRADAY_PROFILE,
+            PROFILE_SUFFIX,
+            config,
+            upstream,
+            IntradayProfile.load,
+            lambda: self._prepare_intraday_profile(symbol, year),
+        )
 
-        # Load 5-minute data for detailed session analysis
-        five_minute_data = self.load_timeframe_data(symbol, year, "5m")
+    def _read_session_cube(self, symbol: str, year: str) -> SessionCube:
+        def build() -> SessionCube:
+            self.logger.info(f"Reducing session cube for {symbol} {year}")
+            return SessionCube.from_profile(
+                self.load_intraday_profile(symbol, year), session_calendar
+            )
 
-        if five_minute_data.empty:
-            self.logger.warning(f"No 5-minute data found for {symbol} {year}")
-            return pd.DataFrame()
-
-        self.logger.info(f"Loaded {symbol} {year}: {len(five_minute_data):,} 5m points")
-
-        # Group by trading day (since trading day starts at 21:00)
-        daily_groups = {}
-
-        for timestamp, row in five_minute_data.iterrows():
-            # Determine which trading day this data belongs to
-            if timestamp.time() >= pd.Timestamp("21:00").time():
-                # After 21:00 = next trading day
-                trading_date = (timestamp + pd.Timedelta(days=1)).date()
-            else:
-                # Before 21:00 = current trading day
-                trading_date = timestamp.date()
-
-            if trading_date not in daily_groups:
-                daily_groups[trading_date] = []
-            daily_groups[trading_date].append((timestamp, row))
-
-        total_days = len(daily_groups)
-        self.logger.info(f"Found {total_days:,} trading days to process")
-
-        # Process each trading day to find session highs/lows
-        daily_results = []
-        processed_days = 0
-
-        for trading_date, day_data in daily_groups.items():
-            if not day_data:
-                continue
-
-            processed_days += 1
-            if processed_days % 50 == 0:  # Log progress every 50 days
-                self.logger.info(f"Processed {processed_days}/{total_days} days")
-
-            # Calculate session highs and lows for this day
-            session_highs = {}
-            session_lows = {}
-            out_of_session_high = None
-            out_of_session_low = None
-
-            for timestamp, row in day_data:
-                session_found = False
-
-                for session_name, session_times in SESSIONS.items():
-                    if is_time_in_session(timestamp.time(), session_times):
-                        # Update session high/low
-                        if session_name not in session_highs:
-                            session_highs[session_name] = row["High"]
-                            session_lows[session_name] = row["Low"]
-                        else:
-                            session_highs[session_name] = max(
-                                session_highs[session_name], row["High"]
-                            )
-                            session_lows[session_name] = min(
-                                session_lows[session_name], row["Low"]
-                            )
-                        session_found = True
-                        break
-
-                if not session_found:
-                    # Out of session data
-                    if out_of_session_high is None:
-                        out_of_session_high = row["High"]
-                        out_of_session_low = row["Low"]
-                    else:
-                        out_of_session_high = max(out_of_session_high, row["High"])
-                        out_of_session_low = min(out_of_session_low, row["Low"])
-
-            # Find which session had the and low
-            all_highs = dict(session_highs)
-            all_lows = dict(session_lows)
-
-            if out_of_session_high is not None:
-                all_highs["Out of Session"] = out_of_session_high
-                all_lows["Out of Session"] = out_of_session_low
-
-            daily_high_session = "Unknown"
-            daily_low_session = "Unknown"
-
-            if all_highs:
-                # Find session with highest high
-                max_session = max(all_highs.items(), key=lambda x: x[1])
-                daily_high_session = max_session[0]
-
-                # Find session with lowest low
-                min_session = min(all_lows.items(), key=lambda x: x[1])
-                daily_low_session = min_session[
-                    0
-                ]  # Store this day's results with all session highs/lows
-            result = {
-                "trading_date": trading_date,
-                "daily_high_session": daily_high_session,
-                "daily_low_session": daily_low_session,
-                "daily_high_value": max_session[1] if all_highs else None,
-                "daily_low_value": min_session[1] if all_lows else None,
-            }
+        span = self.get_data_context(symbol, year).span
+        if span is not None:
+            # The cached cube of the whole history, if current, only needs
+            # slicing; otherwise reduce the span's own profile
+            cube = self._cached_session_cube(symbol, year)
+            return build() if cube is None else cube.slice_dates(*span)
+
+        # Built from the profile, so the cube is valid for one profile build
+        if self.load_intraday_profile(symbol, year).empty:
+            return build()
+        config, upstream = self._cube_cache_key(symbol, year)
+        return self._read_cached(
+            symbol,
+            year,
+            SESSION_CUBE,
+            CUBE_SUFFIX,
+            config,
+            upstream,
+            SessionCube.load,
+            build,
+        )
+
+    def _profile_cache_key(self, symbol: str) -> tuple[str, str | None]:
+        """Config and upstream build the cached intraday profile is valid for"""
+        upstream = BuildManifest(self.timeframes_dir / symbol.lower(), symbol).revision(
+            TIMEFRAMES_ARTIFACT
+        )
+        config = hash_config(
+            TIMEFRAME_MAP[BAR_TIMEFRAME],
+            anomaly_settings(BAR_TIMEFRAME),
+            hash_sources(BaseMetric, IntradayProfile, compute_anomaly_mask),
+        )
+        return config, upstream
 
-            # Add all session highs and lows
-            for session_name in SESSIONS.keys():
-                result[f"{session_name}_high"] = session_highs.get(session_name, None)
-                result[f"{session_name}_low"] = session_lows.get(session_name, None)
+    def _cube_cache_key(self, symbol: str, year: str) -> tuple[str, str | None]:
+        """Config and upstream build the cached session cube is valid for"""
+        upstream = BuildManifest(self.cache_dir, symbol).revision(
+            f"{INTRADAY_PROFILE}_{year}"
+        )
+        config = hash_config(
+            SESSIONS, hash_sources(type(self), SessionCalendar, SessionCube)
+        )
+        return config, upstream
+
+    def _cached_session_cube(self, symbol: str, year: str) -> SessionCube | None:
+        """Cached cube of the whole history when it and its profile are current"""
+        profile_config, profile_upstream = self._profile_cache_key(symbol)
+        if profile_upstream is None or not BuildManifest(
+            self.cache_dir, symbol
+        ).is_current(f"{INTRADAY_PROFILE}_{year}", profile_config, profile_upstream):
+            return None
+        config, upstream = self._cube_cache_key(symbol, year)
+        return self._load_cached(
+            symbol, year, SESSION_CUBE, CUBE_SUFFIX, config, upstream, SessionCube.load
+        )
 
-            # Add out of session data
-            result["Out_of_Session_high"] = out_of_session_high
-            result["Out_of_Session_low"] = out_of_session_low
+    def _cache_file(self, symbol: str, year: str, key: str, suffix: str) -> Path:
+        return self.cache_dir / f"{symbol}_{year}_{key}{suffix}"
+
+    def intraday_profile_file(self, symbol: str, year: str) -> Path:
+        """Cache file of the intraday profile, for readers mapping it directly"""
+        return self._cache_file(symbol, year, INTRADAY_PROFILE, PROFILE_SUFFIX)
+
+    def _read_cached(
+        self,
+        symbol: str,
+        year: str,
+        key: str,
+        suffix: str,
+        config: str,
+        upstream: str | None,
+        load,
+        build,
+    ):
+        """
+        Map an intermediate from its cache file when the manifest shows it
+        was built from the same config and upstream build, otherwise build
+        it and cache it. Empty results are not cached.
+        """
+        value = self._load_cached(symbol, year, key, suffix, config, upstream, load)
+        if value is not None:
+            return value
 
-            daily_results.append(result)
+        cache_file = self._cache_file(symbol, year, key, suffix)
+        manifest = BuildManifest(self.cache_dir, symbol)
+        artifact = f"{key}_{year}"
 
-        # Create DataFrame from results
-        daily_session_df = pd.DataFrame(daily_results)
+        cache_file.unlink(missing_ok=True)
+        value = build()
+        if value.empty:
+            return value
 
-        # Cache the intermediate data
-        self.logger.info(f"Caching intermediate data to {cache_file}")
+        self.logger.info(f"Caching {key} to {cache_file}")
         try:
-            daily_session_df.to_csv(cache_file, index=False)
-            self.logger.info(
-                f"Successfully cached {len(daily_session_df)} daily records"
-            )
+            value.save(cache_file)
+            if upstream is not None:
+                manifest.record_build(artifact, config, upstream)
+            self.logger.info(f"Successfully cached {len(value)} daily records")
         except Exception as e:
             self.logger.error(f"Failed to cache intermediate data: {e}")
 
-        return daily_session_df
+        return value
+
+    def _load_cached(
+        self,
+        symbol: str,
+        year: str,
+        key: str,
+        suffix: str,
+        config: str,
+        upstream: str | None,
+        load,
+    ):
+        """Intermediate mapped from its cache file, None when not current"""
+        cache_file = self._cache_file(symbol, year, key, suffix)
+        if (
+            upstream is None
+            or not BuildManifest(self.cache_dir, symbol).is_current(
+                f"{key}_{year}", config, upstream
+            )
+            or not cache_file.exists()
+        ):
+            return None
 
-    def _calculate_session_percentages(self, daily_session_df: pd.DataFrame) -> dict:
+        self.logger.info(f"Loading cached {key} from {cache_file}")
+        try:
+            value = load(cache_file)
+            self.logger.info(f"Loaded {len(value)} cached daily records")
+            return value
+        except Exception as e:
+            self.logger.warning(f"Failed to load {key} cache: {e}. Recalculating...")
+            return None
+
+    def _prepare_intraday_profile(self, symbol: str, year: str) -> IntradayProfile:
         """
-        Calculate session distribution percentages from prepared daily session data.
+        Build the intraday profile from 5-minute data.
         """
-        self.logger.info("Calculating session distribution percentages")
+        self.logger.info(f"Preparing daily session data for {symbol} {year}")
 
-        total_days = len(daily_session_df)
-        self.logger.info(f"Processing {total_days} trading days")
+        bar_minutes = pd.Timedelta(TIMEFRAME_MAP[BAR_TIMEFRAME]) // pd.Timedelta(
+            minutes=1
+        )
+        if self.streaming:
+            # Chunks split at trading day starts, so no day spans two of them
+            bar_count = 0
+            profiles = []
+            start, end = self.get_data_context(symbol, year).span or (None, None)
+            for chunk in self.iter_timeframe_chunks(
+                symbol,
+                year,
+                BAR_TIMEFRAME,
+                pd.Timedelta(days=1),
+                pd.Timedelta(minutes=TRADING_DAY_START_MINUTE),
+                start,
+                end,
+            ):
+                bar_count += len(chunk)
+                profiles.append(IntradayProfile.from_bars(chunk, bar_minutes))
+            profile = IntradayProfile.concat(profiles, bar_minutes)
+        else:
+            # Load 5-minute data for detailed session analysis
+            five_minute_data = self.load_timeframe_data(symbol, year, BAR_TIMEFRAME)
+            bar_count = len(five_minute_data)
+            profile = IntradayProfile.from_bars(five_minute_data, bar_minutes)
+        if profile.empty:
+            self.logger.warning(f"No 5-minute data found for {symbol} {year}")
+            return profile
 
-        # Count occurrences of each session
-        high_counts = {
-            "Asia": 0,
-            "Frankfurt": 0,
-            "London": 0,
-            "Lunch": 0,
-            "NY": 0,
-            "Out of Session": 0,
+        self.logger.info(f"Loaded {symbol} {year}: {bar_count:,} 5m points")
+        self.logger.info(f"Found {len(profile):,} trading days")
+        return profile
+
+    def evaluate_session_layout(self, profile: IntradayProfile, sessions: dict) -> dict:
+        """
+        Session timing and interaction metrics for any session layout
+        (same shape as SESSIONS), reduced from the intraday profile without
+        touching bar data.
+        """
+        cube = SessionCube.from_profile(profile, SessionCalendar(sessions))
+        if cube.empty:
+            return {}
+
+        breaks = self.compute_session_breaks(cube)
+        metrics = self._calculate_session_percentages(cube)
+        metrics.update(self.get_session_comparison_metrics(cube, breaks))
+        metrics.update(self.get_directional_metrics(cube, breaks))
+        metrics.update(self.get_directional_session_distribution(cube))
+        return metrics
+
+    def _calculate_session_percentages(self, cube: SessionCube) -> dict:
+        """
+        Calculate session distribution percentages from the session cube.
+        """
+        return self._session_percentages(self.count_session_extremes(cube))
+
+    def count_session_extremes(self, cube: SessionCube) -> dict:
+        """Days and per-session counts of daily highs and lows, mergeable"""
+        return {
+            "days": len(cube),
+            "session_names": cube.session_names,
+            "labels": cube.labels,
+            "high": self._count_extreme_sessions(cube, HIGH, cube.labels),
+            "low": self._count_extreme_sessions(cube, LOW, cube.labels),
         }
-        low_counts = high_counts.copy()
 
-        # Count from prepared data
-        for _, row in daily_session_df.iterrows():
-            daily_high_session = row["daily_high_session"]
-            daily_low_session = row["daily_low_session"]
+    def _session_percentages(self, counts: dict) -> dict:
+        """Session distribution percentages from count_session_extremes"""
+        self.logger.info("Calculating session distribution percentages")
+
+        total_days = counts["days"]
+        self.logger.info(f"Processing {total_days} trading days")
 
-            if daily_high_session in high_counts:
-                high_counts[daily_high_session] += 1
-            if daily_low_session in low_counts:
-                low_counts[daily_low_session] += 1  # Calculate percentages
+        # Count occurrences of each session
+        high_counts, low_counts = (
+            dict(zip(counts["labels"], counts[side].tolist()))
+            for side in ("high", "low")
+        )
         metrics = {}
-        for session_name in SESSIONS.keys():
+        for session_name in counts["session_names"]:
             high_percentage = (
                 self.round_metric((high_counts[session_name] / total_days) * 100)
                 if total_days > 0
@@ -259,7 +382,7 @@ class SessionDistributionMetrics(BaseMetric):
 
         # Log summary of results
         self.logger.info("Session Distribution Summary:")
-        for session in SESSIONS.keys():
+        for session in counts["session_names"]:
             high_pct = metrics.get(f"Daily High in {session} %", 0)
             low_pct = metrics.get(f"Daily Low in {session} %", 0)
             self.logger.info(f"  {session}: High {high_pct}%, Low {low_pct}%")
@@ -270,6 +393,24 @@ class SessionDistributionMetrics(BaseMetric):
 
         return metrics
 
+    @staticmethod
+    def _count_extreme_sessions(
+        cube: SessionCube, side: int, sessions: list[str], directions=None
+    ) -> np.ndarray:
+        """
+        Days whose high (side=HIGH) or low (side=LOW) was made in each of
+        sessions, as a [3, sessions] table by direction code when directions
+        are given. Slots named outside of sessions are not counted.
+        """
+        codes = cube.extreme_codes(side, sessions)
+        known = codes >= 0
+        if directions is None:
+            return np.bincount(codes[known], minlength=len(sessions))
+        return np.bincount(
+            directions[known].astype(np.intp) * len(sessions) + codes[known],
+            minlength=3 * len(sessions),
+        ).reshape(3, len(sessions))
+
     def _create_empty_metrics(self) -> dict:
         """Create empty metrics when no data is available"""
         metrics = {}
@@ -285,381 +426,198 @@ class SessionDistributionMetrics(BaseMetric):
     def clear_cache(self, symbol: str = None, year: str = None):
         """Clear cached results. If symbol and year are provided, clears specific cache file."""
         if symbol and year:
-            cache_file = self.cache_dir / f"{symbol}_{year}_session_distribution.csv"
-            if cache_file.exists():
-                cache_file.unlink()
-                self.logger.info(f"Cleared cache for {symbol} {year}")
+            for key, suffix in (
+                (INTRADAY_PROFILE, PROFILE_SUFFIX),
+                (SESSION_CUBE, CUBE_SUFFIX),
+            ):
+                self._cache_file(symbol, year, key, suffix).unlink(missing_ok=True)
+            self.logger.info(f"Cleared cache for {symbol} {year}")
         else:  # Clear all cache files
-            for cache_file in self.cache_dir.glob("*.csv"):
-                cache_file.unlink()
+            for suffix in (PROFILE_SUFFIX, CUBE_SUFFIX):
+                for cache_file in self.cache_dir.glob(f"*{suffix}"):
+                    cache_file.unlink()
             self.logger.info("Cleared all session distribution cache files")
 
-    def get_session_comparison_metrics(self, daily_session_df: pd.DataFrame) -> dict:
+    def load_session_breaks(self, symbol: str, year: str, start=None, end=None) -> dict:
+        """
+        First-breaker counts for the run, computed once per data context.
+        With bounds, counted over the trading dates in [start, end).
+        """
+        if start is not None or end is not None:
+            return self.compute_session_breaks(
+                self.load_session_cube(symbol, year, start, end)
+            )
+        return self.get_data_context(symbol, year).get(
+            SESSION_BREAKS,
+            lambda: self.compute_session_breaks(self.load_session_cube(symbol, year)),
+        )
+
+    @staticmethod
+    def compute_session_breaks(cube: SessionCube) -> dict:
+        """
+        For every ordered session pair (session1 before session2) count the
+        days where session2 is the first session to break session1's high
+        (low), considering chronological order - once a level is broken,
+        subsequent sessions cannot break it again.
+
+        One broadcast pass over a days x sessions matrix: a running max
+        (min) over the sessions after session1 gives the best level reached
+        before session2, so session2 breaks first when it exceeds session1
+        while that running level does not.
+
+        Returns {"sessions": names, "High"/"Low": {"breaks", "days"}} where
+        breaks[i, j] and days[i, j] are int arrays over session indexes.
+        """
+        # Configured sessions, config order follows the trading day
+        sessions = list(dict.fromkeys(cube.session_names))
+        slots = [cube.slot_index(name) for name in sessions]
+        count = len(sessions)
+        order = np.arange(count)
+        # after[i, k]: session k comes after session i
+        after = order[None, :] > order[:, None]
+
+        result = {"sessions": sessions}
+        for side, field, sign in (("High", HIGH, 1.0), ("Low", LOW, -1.0)):
+            # Lows are negated so both sides look for a higher value
+            levels = sign * cube.price(field)[:, slots].astype(np.float64)
+            present = ~np.isnan(levels)
+            filled = np.where(present, levels, -np.inf)
+
+            # reached[d, i, k]: best level of sessions i+1..k on day d
+            reached = np.maximum.accumulate(
+                np.where(after[None, :, :], filled[:, None, :], -np.inf), axis=2
+            )
+            before = np.concatenate(
+                [np.full(reached.shape[:2] + (1,), -np.inf), reached[:, :, :-1]],
+                axis=2,
+            )
+
+            session1 = filled[:, :, None]
+            breaks = (filled[:, None, :] > session1) & ~(before > session1)
+            valid = present[:, :, None] & present[:, None, :]
+
+            result[side] = {
+                "breaks": (breaks & valid).sum(axis=0),
+                "days": valid.sum(axis=0),
+            }
+
+        return result
+
+    def _session_break_metric(self, breaks: dict, side: str, i: int, j: int):
+        """Percentage for a pair, None when no day has both sessions"""
+        total_days = int(breaks[side]["days"][i, j])
+        if total_days == 0:
+            return None
+        breaks_count = int(breaks[side]["breaks"][i, j])
+        return self.round_metric((breaks_count / total_days) * 100)
+
+    def get_session_comparison_metrics(
+        self, cube: SessionCube, breaks: dict | None = None
+    ) -> dict:
         """
         Calculate comparison metrics between sessions using cached session data.
         Returns percentages for when one session breaks another session's high/low
         considering chronological order - once a level is broken, subsequent sessions
         cannot break it again.
         """
-        if daily_session_df.empty:
+        if cube.empty:
             return {}
+        if breaks is None:
+            breaks = self.compute_session_breaks(cube)
+        return self.session_comparison_from_breaks(breaks)
 
+    def session_comparison_from_breaks(self, breaks: dict) -> dict:
+        """get_session_comparison_metrics from (merged) break counts"""
         metrics = {}
-        # Define chronological order of sessions throughout the trading day
-        session_order = ["Asia", "Frankfurt", "London", "Lunch", "NY", "Out of Session"]
-
-        for i, session1 in enumerate(session_order):
-            for j, session2 in enumerate(session_order):
-                if j <= i:  # Only consider sessions that come AFTER session1
-                    continue
-
-                # Count when session2 breaks session1's high (and it hasn't been broken yet)
-                session1_high_col = f"{session1}_high"
-                session2_high_col = f"{session2}_high"
-
-                if (
-                    session1_high_col in daily_session_df.columns
-                    and session2_high_col in daily_session_df.columns
-                ):
-                    valid_data = daily_session_df.dropna(
-                        subset=[session1_high_col, session2_high_col]
-                    )
-                    if not valid_data.empty:
-                        # Check if session2 breaks session1's high AND
-                        # no intermediate session has already broken it
-                        breaks_count = 0
-
-                        for _, row in valid_data.iterrows():
-                            session1_high = row[session1_high_col]
-                            session2_high = row[session2_high_col]
-
-                            # Check if session2 breaks session1's high
-                            if session2_high > session1_high:
-                                # Check if any intermediate session already broke it
-                                already_broken = False
-                                for k in range(
-                                    i + 1, j
-                                ):  # Check sessions between session1 and session2
-                                    intermediate_session = session_order[k]
-                                    intermediate_high_col = (
-                                        f"{intermediate_session}_high"
-                                    )
-
-                                    if (
-                                        intermediate_high_col
-                                        in daily_session_df.columns
-                                    ):
-                                        intermediate_high = row.get(
-                                            intermediate_high_col
-                                        )
-                                        if (
-                                            pd.notna(intermediate_high)
-                                            and intermediate_high > session1_high
-                                        ):
-                                            already_broken = True
-                                            break
-
-                                if not already_broken:
-                                    breaks_count += 1
-
-                        total_days = len(valid_data)
-                        percentage = (
-                            self.round_metric((breaks_count / total_days) * 100)
-                            if total_days > 0
-                            else 0.0
-                        )
-                        metrics[f"{session2}-{session1} High %"] = percentage
-
-                # Count when session2 breaks session1's low (and it hasn't been broken yet)
-                session1_low_col = f"{session1}_low"
-                session2_low_col = f"{session2}_low"
-
-                if (
-                    session1_low_col in daily_session_df.columns
-                    and session2_low_col in daily_session_df.columns
-                ):
-                    valid_data = daily_session_df.dropna(
-                        subset=[session1_low_col, session2_low_col]
-                    )
-                    if not valid_data.empty:
-                        # Check if session2 breaks session1's low AND
-                        # no intermediate session has already broken it
-                        breaks_count = 0
-
-                        for _, row in valid_data.iterrows():
-                            session1_low = row[session1_low_col]
-                            session2_low = row[session2_low_col]
-
-                            # Check if session2 breaks session1's low
-                            if session2_low < session1_low:
-                                # Check if any intermediate session already broke it
-                                already_broken = False
-                                for k in range(
-                                    i + 1, j
-                                ):  # Check sessions between session1 and session2
-                                    intermediate_session = session_order[k]
-                                    intermediate_low_col = f"{intermediate_session}_low"
-
-                                    if intermediate_low_col in daily_session_df.columns:
-                                        intermediate_low = row.get(intermediate_low_col)
-                                        if (
-                                            pd.notna(intermediate_low)
-                                            and intermediate_low < session1_low
-                                        ):
-                                            already_broken = True
-                                            break
-
-                                if not already_broken:
-                                    breaks_count += 1
-
-                        total_days = len(valid_data)
-                        percentage = (
-                            self.round_metric((breaks_count / total_days) * 100)
-                            if total_days > 0
-                            else 0.0
-                        )
-                        metrics[f"{session2}-{session1} Low %"] = percentage
+        sessions = breaks["sessions"]
+        for i, session1 in enumerate(sessions):
+            for j in range(i + 1, len(sessions)):
+                session2 = sessions[j]
+                for side in ("High", "Low"):
+                    percentage = self._session_break_metric(breaks, side, i, j)
+                    if percentage is not None:
+                        metrics[f"{session2}-{session1} {side} %"] = percentage
 
         return metrics
 
-    def get_directional_metrics(self, daily_session_df: pd.DataFrame) -> dict:
-        if daily_session_df.empty:
+    def get_directional_metrics(
+        self, cube: SessionCube, breaks: dict | None = None
+    ) -> dict:
+        if cube.empty:
             return {}
+        if breaks is None:
+            breaks = self.compute_session_breaks(cube)
+        return self.directional_from_breaks(breaks)
 
+    def directional_from_breaks(self, breaks: dict) -> dict:
+        """get_directional_metrics from (merged) break counts"""
         metrics = {}
-        session_order = ["Asia", "Frankfurt", "London", "Lunch", "NY", "Out of Session"]
-
-        for i, session1 in enumerate(session_order):
-            for j, session2 in enumerate(session_order):
-                if j <= i:
-                    continue
-
-                session1_high_col = f"{session1}_high"
-                session1_low_col = f"{session1}_low"
-                session2_low_col = f"{session2}_low"
-                session2_high_col = f"{session2}_high"
-
-                if all(
-                    col in daily_session_df.columns
-                    for col in [session1_low_col, session2_low_col]
-                ):
-                    valid_data = daily_session_df.dropna(
-                        subset=[session1_low_col, session2_low_col]
-                    )
-                    if not valid_data.empty:
-                        breaks_count = 0
-
-                        for _, row in valid_data.iterrows():
-                            session1_low = row[session1_low_col]
-                            session2_low = row[session2_low_col]
-
-                            if session2_low < session1_low:
-                                already_broken = False
-                                for k in range(i + 1, j):
-                                    intermediate_session = session_order[k]
-                                    intermediate_low_col = f"{intermediate_session}_low"
-
-                                    if intermediate_low_col in daily_session_df.columns:
-                                        intermediate_low = row.get(intermediate_low_col)
-                                        if (
-                                            pd.notna(intermediate_low)
-                                            and intermediate_low < session1_low
-                                        ):
-                                            already_broken = True
-                                            break
-
-                                if not already_broken:
-                                    breaks_count += 1
-
-                        total_days = len(valid_data)
-                        percentage = (
-                            self.round_metric((breaks_count / total_days) * 100)
-                            if total_days > 0
-                            else 0.0
-                        )
-                        metrics[f"Bullish {session2}-{session1} Low %"] = percentage
-
-                if all(
-                    col in daily_session_df.columns
-                    for col in [session1_high_col, session2_high_col]
-                ):
-                    valid_data = daily_session_df.dropna(
-                        subset=[session1_high_col, session2_high_col]
-                    )
-                    if not valid_data.empty:
-                        breaks_count = 0
-
-                        for _, row in valid_data.iterrows():
-                            session1_high = row[session1_high_col]
-                            session2_high = row[session2_high_col]
-
-                            if session2_high > session1_high:
-                                already_broken = False
-                                for k in range(i + 1, j):
-                                    intermediate_session = session_order[k]
-                                    intermediate_high_col = (
-                                        f"{intermediate_session}_high"
-                                    )
-
-                                    if (
-                                        intermediate_high_col
-                                        in daily_session_df.columns
-                                    ):
-                                        intermediate_high = row.get(
-                                            intermediate_high_col
-                                        )
-                                        if (
-                                            pd.notna(intermediate_high)
-                                            and intermediate_high > session1_high
-                                        ):
-                                            already_broken = True
-                                            break
-
-                                if not already_broken:
-                                    breaks_count += 1
-
-                        total_days = len(valid_data)
-                        percentage = (
-                            self.round_metric((breaks_count / total_days) * 100)
-                            if total_days > 0
-                            else 0.0
+        sessions = breaks["sessions"]
+        for i, session1 in enumerate(sessions):
+            for j in range(i + 1, len(sessions)):
+                session2 = sessions[j]
+                for direction, side in (("Bullish", "Low"), ("Bearish", "High")):
+                    percentage = self._session_break_metric(breaks, side, i, j)
+                    if percentage is not None:
+                        metrics[f"{direction} {session2}-{session1} {side} %"] = (
+                            percentage
                         )
-                        metrics[f"Bearish {session2}-{session1} High %"] = percentage
 
         return metrics
 
-    def get_directional_session_distribution(
-        self, daily_session_df: pd.DataFrame
-    ) -> dict:
+    def get_directional_session_distribution(self, cube: SessionCube) -> dict:
         """
         Calculate directional session distribution metrics (Bullish/Bearish Daily High/Low per session).
         Returns percentages of when daily high/low occurs in specific sessions during bullish/bearish days.
         """
-        if daily_session_df.empty:
+        if cube.empty:
             return {}
+        return self.directional_distribution_from_counts(
+            self.count_directional_extremes(cube)
+        )
 
-        self.logger.info("Calculating directional session distribution percentages")
-
-        # Add a column to determine if day is bullish or bearish
-        daily_session_df["is_bullish"] = False
-        daily_session_df["is_bearish"] = False
-
-        for idx, row in daily_session_df.iterrows():
-            # If daily data has Open/Close, use it to determine direction
-            # For daily df from 5min data, create a simple condition
-            if all(col in daily_session_df.columns for col in ["Open", "Close"]):
-                daily_session_df.at[idx, "is_bullish"] = row["Close"] > row["Open"]
-                daily_session_df.at[idx, "is_bearish"] = row["Close"] < row["Open"]
-            else:
-                # Approximate direction using session data
-                # If highest value is later in the day than lowest, consider it bullish
-                sessions_order = [
-                    "Asia",
-                    "Frankfurt",
-                    "London",
-                    "Lunch",
-                    "NY",
-                    "Out of Session",
-                ]
-                high_session_idx = (
-                    sessions_order.index(row["daily_high_session"])
-                    if row["daily_high_session"] in sessions_order
-                    else -1
+    def count_directional_extremes(self, cube: SessionCube) -> dict:
+        """Day direction totals and (direction, session) extreme counts, mergeable"""
+        # Process all sessions including Out of Session (once, if configured)
+        all_sessions = cube.labels
+
+        directions = self._day_directions(cube)
+        # (direction, session) counts of the session making the daily high/low
+        return {
+            "labels": all_sessions,
+            "totals": np.bincount(directions, minlength=3),
+            **{
+                label: self._count_extreme_sessions(
+                    cube, side, all_sessions, directions
                 )
-                low_session_idx = (
-                    sessions_order.index(row["daily_low_session"])
-                    if row["daily_low_session"] in sessions_order
-                    else -1
-                )
-
-                # If we have both indices, compare them
-                if high_session_idx >= 0 and low_session_idx >= 0:
-                    daily_session_df.at[idx, "is_bullish"] = (
-                        high_session_idx > low_session_idx
-                    )
-                    daily_session_df.at[idx, "is_bearish"] = (
-                        high_session_idx < low_session_idx
-                    )
+                for side, label in ((HIGH, "High"), (LOW, "Low"))
+            },
+        }
 
-        # Filter bullish and bearish days
-        bullish_days = daily_session_df[daily_session_df["is_bullish"]]
-        bearish_days = daily_session_df[daily_session_df["is_bearish"]]
+    def directional_distribution_from_counts(self, counts: dict) -> dict:
+        """get_directional_session_distribution from count_directional_extremes"""
+        self.logger.info("Calculating directional session distribution percentages")
 
-        total_bullish = len(bullish_days)
-        total_bearish = len(bearish_days)
+        all_sessions = counts["labels"]
+        totals = counts["totals"]
+        total_bullish, total_bearish = int(totals[BULLISH]), int(totals[BEARISH])
 
         self.logger.info(
             f"Found {total_bullish} bullish days and {total_bearish} bearish days"
         )
 
         metrics = {}
-
-        # Process all sessions including Out of Session
-        all_sessions = list(SESSIONS.keys()) + ["Out of Session"]
-
-        # Calculate bullish metrics
-        if total_bullish > 0:
-            # Count occurrences of each session producing high/low in bullish days
-            bullish_high_counts = {session: 0 for session in all_sessions}
-            bullish_low_counts = {session: 0 for session in all_sessions}
-
-            for _, row in bullish_days.iterrows():
-                daily_high_session = row["daily_high_session"]
-                daily_low_session = row["daily_low_session"]
-
-                if daily_high_session in bullish_high_counts:
-                    bullish_high_counts[daily_high_session] += 1
-                if daily_low_session in bullish_low_counts:
-                    bullish_low_counts[daily_low_session] += 1
-
-            # Calculate percentages
-            for session_name in all_sessions:
-                high_percentage = self.round_metric(
-                    (bullish_high_counts[session_name] / total_bullish) * 100
-                )
-                low_percentage = self.round_metric(
-                    (bullish_low_counts[session_name] / total_bullish) * 100
-                )
-
-                metrics[f"Bullish Daily High in {session_name} %"] = high_percentage
-                metrics[f"Bullish Daily Low in {session_name} %"] = low_percentage
-        else:
-            # Set default values if no bullish days
-            for session_name in all_sessions:
-                metrics[f"Bullish Daily High in {session_name} %"] = 0.0
-                metrics[f"Bullish Daily Low in {session_name} %"] = 0.0
-
-        # Calculate bearish metrics
-        if total_bearish > 0:
-            # Count occurrences of each session producing high/low in bearish days
-            bearish_high_counts = {session: 0 for session in all_sessions}
-            bearish_low_counts = {session: 0 for session in all_sessions}
-
-            for _, row in bearish_days.iterrows():
-                daily_high_session = row["daily_high_session"]
-                daily_low_session = row["daily_low_session"]
-
-                if daily_high_session in bearish_high_counts:
-                    bearish_high_counts[daily_high_session] += 1
-                if daily_low_session in bearish_low_counts:
-                    bearish_low_counts[daily_low_session] += 1
-
-            # Calculate percentages
-            for session_name in all_sessions:
-                high_percentage = self.round_metric(
-                    (bearish_high_counts[session_name] / total_bearish) * 100
-                )
-                low_percentage = self.round_metric(
-                    (bearish_low_counts[session_name] / total_bearish) * 100
-                )
-
-                metrics[f"Bearish Daily High in {session_name} %"] = high_percentage
-                metrics[f"Bearish Daily Low in {session_name} %"] = low_percentage
-        else:
-            # Set default values if no bearish days
-            for session_name in all_sessions:
-                metrics[f"Bearish Daily High in {session_name} %"] = 0.0
-                metrics[f"Bearish Daily Low in {session_name} %"] = 0.0
+        for direction, code, total in (
+            ("Bullish", BULLISH, total_bullish),
+            ("Bearish", BEARISH, total_bearish),
+        ):
+            for i, session_name in enumerate(all_sessions):
+                for label in ("High", "Low"):
+                    metrics[f"{direction} Daily {label} in {session_name} %"] = (
+                        self.round_metric((int(counts[label][code, i]) / total) * 100)
+                        if total > 0
+                        else 0.0
+                    )
 
         # Log summary
         self.logger.info("Directional Session Distribution Summary:")
@@ -673,3 +631,19 @@ class SessionDistributionMetrics(BaseMetric):
             )
 
         return metrics
+
+    @staticmethod
+    def _day_directions(cube: SessionCube) -> np.ndarray:
+        """
+        Direction code of every day: BULLISH, BEARISH or 0 for flat/unknown.
+        A day is bullish when its high was made in a later session than its
+        low (by slot order, which follows the trading day).
+        """
+        high_order = cube.extreme_codes(HIGH, cube.labels)
+        low_order = cube.extreme_codes(LOW, cube.labels)
+        known = (high_order >= 0) & (low_order >= 0)
+
+        directions = np.zeros(len(cube), dtype=np.int8)
+        directions[known & (high_order > low_order)] = BULLISH
+        directions[known & (high_order < low_order)] = BEARISH
+        return directions
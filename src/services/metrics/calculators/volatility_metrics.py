@@ -1,91 +1,159 @@
+from pathlib import Path
+import numpy as np
 import pandas as pd  # type: ignore
 from ..base_metric import BaseMetric
+from ..partials import merge_series
 from config.pairs_config import PAIRS
-from utils.session_utils import get_session_range
+from config.settings import STREAMING_SETTINGS
+from utils.session_utils import average_session_range, session_daily_ranges
+
+RANGE_SESSIONS = ("Asia", "Frankfurt", "London", "Lunch", "NY")
 
 
 class VolatilityMetrics(BaseMetric):
-    def calculate(self, symbol: str, year: str) -> dict:
-        try:
-            daily_data = self.load_timeframe_data(symbol, year, "1d")
-            weekly_data = self.load_timeframe_data(symbol, year, "1w")
-            five_minute_data = self.load_timeframe_data(symbol, year, "5m")
-            pip_factor = PAIRS[symbol.upper()]["pip_factor"]
-
-            if daily_data.empty or weekly_data.empty:
-                return self._get_default_metrics(self._get_metric_names())
-
-            # Calculate daily metrics
-            daily_range = round(
-                ((daily_data["High"] - daily_data["Low"]) * pip_factor).mean(), 2
-            )
-            daily_body_size = round(
-                (abs(daily_data["Close"] - daily_data["Open"]) * pip_factor).mean(), 2
-            )
-
-            # Calculate weekly metrics
-            weekly_range = round(
-                ((weekly_data["High"] - weekly_data["Low"]) * pip_factor).mean(), 2
-            )
-            weekly_body_size = round(
-                (abs(weekly_data["Close"] - weekly_data["Open"]) * pip_factor).mean(), 2
-            )
-
-            # Calculate session ranges
-            asia_range = get_session_range("Asia", five_minute_data, symbol)
-            frankfurt_range = get_session_range("Frankfurt", five_minute_data, symbol)
-            london_range = get_session_range("London", five_minute_data, symbol)
-            lunch_range = get_session_range("Lunch", five_minute_data, symbol)
-            ny_range = get_session_range("NY", five_minute_data, symbol)
-
-            # Calculate daily ranges for each weekday
-            weekday_ranges = {}
-            for weekday in range(5):
-                try:
-                    weekday_mask = pd.to_datetime(daily_data.index).weekday == weekday
-                    weekday_data = daily_data[weekday_mask]
-
-                    if not weekday_data.empty:
-                        daily_ranges = (
-                            weekday_data["High"] - weekday_data["Low"]
-                        ) * pip_factor
-                        weekday_ranges[weekday] = round(daily_ranges.mean(), 2)
-                    else:
-                        print(f"Warning: No data found for weekday {weekday}")
-                        weekday_ranges[weekday] = 0
-                except Exception as e:
-                    print(f"Error processing weekday {weekday}: {e}")
-                    weekday_ranges[weekday] = 0
+    inputs = ("1d", "1w", "5m")
+    # Session ranges only need the 5m extremes
+    input_columns = {"5m": ("High", "Low")}
 
-            avg_monday_range = weekday_ranges[0]
-            avg_tuesday_range = weekday_ranges[1]
-            avg_wednesday_range = weekday_ranges[2]
-            avg_thursday_range = weekday_ranges[3]
-            avg_friday_range = weekday_ranges[4]
-
-            metrics = {
-                "Average Daily Range (pips)": daily_range,
-                "Average Daily Body Size (pips)": daily_body_size,
-                "Average Weekly Range (pips)": weekly_range,
-                "Average Weekly Body Size (pips)": weekly_body_size,
-                "Average Asia Range": asia_range,
-                "Average Frankfurt Range": frankfurt_range,
-                "Average London Range": london_range,
-                "Average Lunch Range": lunch_range,
-                "Average NY Range": ny_range,
-                "Average Monday Range": avg_monday_range,
-                "Average Tuesday Range": avg_tuesday_range,
-                "Average Wednesday Range": avg_wednesday_range,
-                "Average Thursday Range": avg_thursday_range,
-                "Average Friday Range": avg_friday_range,
-            }
+    def __init__(
+        self, timeframes_dir: Path, streaming: bool = STREAMING_SETTINGS["enabled"]
+    ):
+        super().__init__(timeframes_dir, streaming)
+        if self.streaming:
+            # Session ranges stream the 5m bars instead of loading them
+            self.inputs = ("1d", "1w")
 
-            return metrics
+    def calculate(self, symbol: str, year: str) -> dict:
+        try:
+            return self.finalize(symbol, self.partial(symbol, year))
 
         except Exception as e:
             print(f"Error calculating volatility metrics for {symbol}: {e}")
             return self._get_default_metrics(self._get_metric_names())
 
+    def partial(self, symbol: str, year: str, start=None, end=None) -> dict:
+        """
+        Per-candle ranges and bodies (price units, float32) of daily and
+        weekly candles and per-date session ranges; averages are only taken
+        in finalize() so merged spans average exactly like one pass.
+        """
+        daily_data = self.load_timeframe_range(symbol, year, "1d", start, end)
+        weekly_data = self.load_timeframe_range(symbol, year, "1w", start, end)
+
+        return {
+            "daily_range": (daily_data["High"] - daily_data["Low"]).to_numpy(),
+            "daily_body": abs(daily_data["Close"] - daily_data["Open"]).to_numpy(),
+            "weekday": np.asarray(
+                pd.to_datetime(daily_data.index).weekday, dtype=np.int8
+            ),
+            "weekly_range": (weekly_data["High"] - weekly_data["Low"]).to_numpy(),
+            "weekly_body": abs(weekly_data["Close"] - weekly_data["Open"]).to_numpy(),
+            "sessions": self._session_ranges(symbol, year, start, end),
+        }
+
+    def merge(self, partials: list[dict]) -> dict:
+        return merge_series(partials)
+
+    def finalize(self, symbol: str, partial: dict) -> dict:
+        pip_factor = PAIRS[symbol.upper()]["pip_factor"]
+
+        if len(partial["daily_range"]) == 0 or len(partial["weekly_range"]) == 0:
+            return self._get_default_metrics(self._get_metric_names())
+
+        daily_ranges = pd.Series(partial["daily_range"])
+
+        # Calculate daily metrics
+        daily_range = round((daily_ranges * pip_factor).mean(), 2)
+        daily_body_size = round(
+            (pd.Series(partial["daily_body"]) * pip_factor).mean(), 2
+        )
+
+        # Calculate weekly metrics
+        weekly_range = round(
+            (pd.Series(partial["weekly_range"]) * pip_factor).mean(), 2
+        )
+        weekly_body_size = round(
+            (pd.Series(partial["weekly_body"]) * pip_factor).mean(), 2
+        )
+
+        # Calculate session ranges
+        session_ranges = {
+            session: average_session_range(pd.Series(ranges), symbol)
+            for session, ranges in partial["sessions"].items()
+        }
+        asia_range = session_ranges["Asia"]
+        frankfurt_range = session_ranges["Frankfurt"]
+        london_range = session_ranges["London"]
+        lunch_range = session_ranges["Lunch"]
+        ny_range = session_ranges["NY"]
+
+        # Calculate daily ranges for each weekday
+        weekday_ranges = {}
+        for weekday in range(5):
+            try:
+                weekday_mask = partial["weekday"] == weekday
+
+                if weekday_mask.any():
+                    weekday_ranges[weekday] = round(
+                        (daily_ranges[weekday_mask] * pip_factor).mean(), 2
+                    )
+                else:
+                    print(f"Warning: No data found for weekday {weekday}")
+                    weekday_ranges[weekday] = 0
+            except Exception as e:
+                print(f"Error processing weekday {weekday}: {e}")
+                weekday_ranges[weekday] = 0
+
+        avg_monday_range = weekday_ranges[0]
+        avg_tuesday_range = weekday_ranges[1]
+        avg_wednesday_range = weekday_ranges[2]
+        avg_thursday_range = weekday_ranges[3]
+        avg_friday_range = weekday_ranges[4]
+
+        metrics = {
+            "Average Daily Range (pips)": daily_range,
+            "Average Daily Body Size (pips)": daily_body_size,
+            "Average Weekly Range (pips)": weekly_range,
+            "Average Weekly Body Size (pips)": weekly_body_size,
+            "Average Asia Range": asia_range,
+            "Average Frankfurt Range": frankfurt_range,
+            "Average London Range": london_range,
+            "Average Lunch Range": lunch_range,
+            "Average NY Range": ny_range,
+            "Average Monday Range": avg_monday_range,
+            "Average Tuesday Range": avg_tuesday_range,
+            "Average Wednesday Range": avg_wednesday_range,
+            "Average Thursday Range": avg_thursday_range,
+            "Average Friday Range": avg_friday_range,
+        }
+
+        return metrics
+
+    def _session_ranges(
+        self, symbol: str, year: str, start=None, end=None
+    ) -> dict[str, np.ndarray]:
+        """Per-date range of every session in RANGE_SESSIONS from 5m bars"""
+        if not self.streaming:
+            five_minute_data = self.load_timeframe_range(symbol, year, "5m", start, end)
+            return {
+                session: session_daily_ranges(session, five_minute_data).to_numpy()
+                for session in RANGE_SESSIONS
+            }
+
+        # Chunks split at midnight, so every date's range comes from one chunk
+        return merge_series(
+            [
+                {
+                    session: session_daily_ranges(session, chunk).to_numpy()
+                    for session in RANGE_SESSIONS
+                }
+                for chunk in self.iter_timeframe_chunks(
+                    symbol, year, "5m", pd.Timedelta(days=1), start=start, end=end
+                )
+            ]
+            or [{session: np.empty(0, dtype=np.float32) for session in RANGE_SESSIONS}]
+        )
+
     def _get_metric_names(self) -> list[str]:
         """Return list of metric names for this calculator."""
         return [
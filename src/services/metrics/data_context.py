@@ -0,0 +1,87 @@
+import threading
+from collections import Counter
+from typing import Any, Callable, Hashable
+from services.performance import DataCache, data_cache
+
+
+class MetricsDataContext:
+    """
+    Inputs of one (symbol, year) metrics run. Timeframe frames and derived
+    intermediates are loaded once on first use and shared by every
+    calculator; callers must treat them as read-only. Loading is
+    thread-safe, concurrent requests for the same key wait for one load.
+
+    Values are kept in the process-wide data cache and pinned while the
+    context is in use. Contexts with the same data version (the build the
+    inputs come from) reuse each other's cached values; after clear() the
+    values stay cached until the cache needs the memory.
+
+    A context may cover only a [start, end) span of the history (week
+    edges, see storage.chunks.history_spans): its timeframes then hold only
+    the span's rows and intermediates are built from those.
+
+    The column plan names the columns a timeframe is loaded with when the
+    run's calculators read only some of them (see CalculatorGraph), None
+    or a missing entry meaning all columns.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        year: str,
+        version: Hashable | None = None,
+        cache: DataCache = data_cache,
+        span: tuple | None = None,
+        columns: dict[str, tuple[str, ...] | None] | None = None,
+    ):
+        self.symbol = symbol
+        self.year = year
+        self.span = span
+        self.columns = dict(columns or {})
+        # Without a data version nothing is shared with other contexts
+        self.version = version if version is not None else object()
+        self.cache = cache
+        self.load_counts: Counter = Counter()
+        self._values: dict[str, Any] = {}
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def matches(self, symbol: str, year: str) -> bool:
+        return self.symbol == symbol and self.year == year
+
+    def _cache_key(self, key: str) -> tuple:
+        return (self.version, self.symbol, self.year, self.span, key)
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Return the value for key, calling loader only on first use"""
+        if key in self._values:
+            return self._values[key]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key not in self._values:
+                cache_key = self._cache_key(key)
+                value = self.cache.get(cache_key, pin=True)
+                if value is None:
+                    value = loader()
+                    self.load_counts[key] += 1
+                    self.cache.set(cache_key, value, pin=True)
+                self._values[key] = value
+            return self._values[key]
+
+    def clear(self) -> None:
+        """Release this context's pins, the cache may evict the data now"""
+        with self._lock:
+            for key in self._values:
+                self.cache.unpin(self._cache_key(key))
+            self._values.clear()
+            self._key_locks.clear()
+
+    def format_load_counts(self) -> str:
+        if not self.load_counts:
+            return "none, all cached"
+        return ", ".join(
+            f"{key}×{count}" for key, count in sorted(self.load_counts.items())
+        )
@@ -1,14 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
+import pandas as pd  # type: ignore
 from .calculators.volatility_metrics import VolatilityMetrics
 from .calculators.session_distribution_metrics import SessionDistributionMetrics
 from .calculators.intraday_metrics import IntradayMetrics
 from .calculators.occurrence_metrics import OccurrenceMetrics
 from .calculators.levels_metrics import LevelsMetrics
+from .calculator_graph import CalculatorGraph
+from .data_context import MetricsDataContext
+from .base_metric import BaseMetric, data_version
+from config.settings import EXECUTION_SETTINGS
+from services.performance import ConfigManager, performance_monitor
+from services.storage.chunks import history_spans, week_edge_before
 
 
 class MetricsManager:
-    def __init__(self, timeframes_dir: Path):
+    def __init__(
+        self,
+        timeframes_dir: Path,
+        max_workers: int | None = EXECUTION_SETTINGS["calculator_workers"],
+        history_chunks: bool = EXECUTION_SETTINGS["history_chunks"],
+    ):
         self.timeframes_dir = timeframes_dir
         self.calculators = {
             "Volatility & Range Metrics": VolatilityMetrics(timeframes_dir),
@@ -19,26 +33,169 @@ class MetricsManager:
             "Daily/Weekly Occurrence Statistics": OccurrenceMetrics(timeframes_dir),
             "Key Levels": LevelsMetrics(timeframes_dir),
         }
+        if max_workers is None:
+            max_workers = min(
+                len(self.calculators), ConfigManager.get_optimal_concurrency()
+            )
+        self.max_workers = max_workers
+        self.history_chunks = history_chunks
 
     def calculate_all_metrics(self, symbol: str, year: str) -> Dict[str, Any]:
         """Calculate all metrics for a given symbol and year"""
-        all_metrics = {}
-
-        for name, calculator in self.calculators.items():
-            metrics = calculator.calculate(symbol, year)
-            all_metrics.update(metrics)
-
-        return all_metrics
+        return self._run_calculators(symbol, year, self.calculators)
 
     def calculate_specific_metrics(
         self, symbol: str, year: str, metric_groups: list[str]
     ) -> Dict[str, Any]:
         """Calculate specific metric groups for a given symbol and year"""
-        specific_metrics = {}
+        calculators = {
+            group: self.calculators[group]
+            for group in metric_groups
+            if group in self.calculators
+        }
+        return self._run_calculators(symbol, year, calculators)
+
+    def calculate_partials(
+        self, symbol: str, year: str, start=None, end=None
+    ) -> Dict[str, dict]:
+        """
+        Partial results of every calculator over the history in [start, end),
+        for runs sharded across processes or machines. Bounds must be week
+        edges (see storage.chunks.history_spans); combine with reduce_partials.
+        Only the span's rows are loaded.
+        """
+        span = None if start is None and end is None else (start, end)
+        with self._data_context(symbol, year, span) as context:
+            graph = CalculatorGraph(
+                symbol,
+                year,
+                self.calculators,
+                list(self.calculators.values()),
+                lambda calculator: calculator.partial(symbol, year, start, end),
+            )
+            context.columns = graph.timeframe_columns
+            results = graph.run(self.max_workers)
+        return {name: results[name] for name in self.calculators}
+
+    def calculate_window(
+        self, symbol: str, year: str, start=None, end=None
+    ) -> Dict[str, Any]:
+        """
+        All metrics over the history in [start, end) only, e.g. the last
+        three years. Both bounds move back to the week edge at or before
+        them (see storage.chunks.history_spans), and only the window's rows
+        are read.
+        """
+        if start is not None:
+            start = week_edge_before(pd.Timestamp(start))
+        if end is not None:
+            end = week_edge_before(pd.Timestamp(end))
+        return self.reduce_partials(
+            symbol, [self.calculate_partials(symbol, year, start, end)]
+        )
+
+    def reduce_partials(
+        self, symbol: str, partials: list[Dict[str, dict]]
+    ) -> Dict[str, Any]:
+        """Metrics of calculate_partials results of consecutive spans, in order"""
+        metrics = {}
+        for name, calculator in self.calculators.items():
+            merged = calculator.merge([partial[name] for partial in partials])
+            metrics.update(calculator.finalize(symbol, merged))
+        return metrics
+
+    def _run_calculators(
+        self, symbol: str, year: str, calculators: dict[str, BaseMetric]
+    ) -> Dict[str, Any]:
+        """
+        Run calculators as a dependency graph over one shared data context:
+        every input is loaded once per symbol and year, independent
+        calculators run concurrently, and the data is unpinned afterwards so
+        the shared data cache can evict it.
+        """
+        metrics = {}
+        with self._data_context(symbol, year) as context:
+            run_calculator = None
+            if self.history_chunks:
+                spans = self.history_spans(symbol, year)
+                run_calculator = lambda calculator: self._calculate_in_spans(
+                    calculator, symbol, year, spans
+                )
+            graph = CalculatorGraph(
+                symbol,
+                year,
+                calculators,
+                list(self.calculators.values()),
+                run_calculator,
+            )
+            # Calculators outside the run don't widen the columns loaded
+            context.columns = graph.timeframe_columns
+            results = graph.run(self.max_workers)
+            for name in calculators:
+                metrics.update(results[name])
+
+        return metrics
+
+    @contextmanager
+    def _data_context(
+        self, symbol: str, year: str, span: tuple | None = None
+    ) -> Iterator[MetricsDataContext]:
+        """Share one data context between all calculators for the block"""
+        context = MetricsDataContext(
+            symbol, year, data_version(self.timeframes_dir, symbol), span=span
+        )
+        # Producers of intermediates may be outside the requested groups
+        for calculator in self.calculators.values():
+            calculator.data_context = context
+
+        try:
+            yield context
+        finally:
+            for calculator in self.calculators.values():
+                calculator.data_context = None
+            performance_monitor.record_data_loads(
+                f"{symbol}_{year}", context.load_counts
+            )
+            print(
+                f"📦 Inputs loaded for {symbol} {year}: {context.format_load_counts()}"
+            )
+            context.clear()
+
+    def history_spans(self, symbol: str, year: str) -> list[tuple]:
+        """Year spans of the symbol's history, by its daily candles"""
+        calculator = next(iter(self.calculators.values()))
+        try:
+            # No columns: only the index is read
+            times = calculator.load_timeframe_view(symbol, year, "1d", columns=[]).index
+        except FileNotFoundError:
+            return history_spans(None, None)
+        if len(times) == 0:
+            return history_spans(None, None)
+        return history_spans(times[0], times[-1])
+
+    def _calculate_in_spans(
+        self, calculator: BaseMetric, symbol: str, year: str, spans: list[tuple]
+    ) -> dict:
+        """
+        Partials of every span on a thread pool, merged and finalized. Falls
+        back to a single pass, with the calculator's own error handling, when
+        a span fails.
+        """
+        if len(spans) <= 1:
+            return calculator.calculate(symbol, year)
 
-        for group in metric_groups:
-            if group in self.calculators:
-                metrics = self.calculators[group].calculate(symbol, year)
-                specific_metrics.update(metrics)
+        def partial(span: tuple) -> dict:
+            return calculator.partial(symbol, year, *span)
 
-        return specific_metrics
+        try:
+            with ThreadPoolExecutor(
+                max_workers=min(len(spans), ConfigManager.get_optimal_concurrency())
+            ) as executor:
+                partials = list(executor.map(partial, spans))
+            return calculator.finalize(symbol, calculator.merge(partials))
+        except Exception as e:
+            print(
+                f"⚠️ {type(calculator).__name__} failed over history spans of "
+                f"{symbol}, calculating in one pass: {e}"
+            )
+            return calculator.calculate(symbol, year)
@@ -0,0 +1,58 @@
+"""
+Mergeable partial results of metric calculators.
+
+A calculator's partial() accumulates what its metrics need over one span
+of a symbol's history: counts, per-session tallies or short per-day
+series. Partials of consecutive spans merge into the partial of their
+union, and finalize() turns a partial into metric values. Spans can
+therefore be computed separately (in parallel, streamed, or in other
+processes) and reduced into exactly the metrics of a single pass.
+
+Spans are split at week edges (see storage.chunks.history_spans), so
+every week, trading day and calendar date falls into exactly one span.
+Partials are plain dicts of numbers, strings and numpy arrays and can be
+pickled.
+"""
+
+import numpy as np
+import pandas as pd  # type: ignore
+
+
+def merge_counts(partials: list[dict]) -> dict:
+    """
+    Sum numbers and arrays key by key, recursing into dicts. Other values
+    (session names, labels) describe the partial and must agree.
+    """
+    merged = {}
+    for key, first in partials[0].items():
+        values = [partial[key] for partial in partials]
+        if isinstance(first, dict):
+            merged[key] = merge_counts(values)
+        elif isinstance(first, (int, np.integer, np.ndarray)) and not isinstance(
+            first, bool
+        ):
+            merged[key] = sum(values[1:], values[0])
+        elif all(value == first for value in values[1:]):
+            merged[key] = first
+        else:
+            raise ValueError(f"Partials disagree on {key}: {values}")
+    return merged
+
+
+def merge_series(partials: list[dict]) -> dict:
+    """Concatenate per-day arrays key by key in span order, recursing into dicts"""
+    merged = {}
+    for key, first in partials[0].items():
+        values = [partial[key] for partial in partials]
+        if isinstance(first, dict):
+            merged[key] = merge_series(values)
+        else:
+            merged[key] = np.concatenate(values)
+    return merged
+
+
+def slice_rows(index: pd.DatetimeIndex, start=None, end=None) -> slice:
+    """Positions of the sorted index within [start, end), either bound may be None"""
+    first = 0 if start is None else index.searchsorted(start, side="left")
+    last = len(index) if end is None else index.searchsorted(end, side="left")
+    return slice(first, last)
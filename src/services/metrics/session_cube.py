@@ -0,0 +1,472 @@
+"""
+Session intermediates every session based calculator reads instead of going
+back to 5m bars:
+
+    IntradayProfile   days x bar-sized buckets of the trading day, does not
+                      depend on the session layout
+    SessionCube       days x sessions, reduced from the profile for one
+                      session layout in milliseconds
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+import numpy as np
+import pandas as pd  # type: ignore
+from services.performance.cache import owned_nbytes
+from utils.session_utils import SessionCalendar, minutes_of_day
+
+ALIGNMENT = 64
+SUFFIX = ".cube"
+PROFILE_SUFFIX = ".profile"
+
+# Trading day starts at 21:00, later bars belong to the next day
+TRADING_DAY_START_MINUTE = 21 * 60
+MINUTES_PER_DAY = 24 * 60
+OUT_OF_SESSION = "Out of Session"
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+OPEN, HIGH, LOW, CLOSE = range(len(PRICE_FIELDS))
+BAR_FIELDS = ("high_bar", "low_bar")
+HIGH_BAR, LOW_BAR = range(len(BAR_FIELDS))
+NO_BAR = -1
+
+
+def _save_arrays(path: Path, magic: bytes, arrays: dict, meta: dict) -> Path:
+    """
+    File layout:
+        magic | uint32 header length | JSON header | padding to 64 bytes
+        arrays, each starting at a 64 byte aligned offset
+    """
+    entries = []
+    offset = 0
+    for name, array in arrays.items():
+        offset += -offset % ALIGNMENT
+        entries.append({"name": name, "shape": array.shape, "offset": offset})
+        offset += array.nbytes
+
+    header = json.dumps({**meta, "arrays": entries}).encode()
+    prefix = magic + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (-len(prefix) % ALIGNMENT)
+
+    # Write to a temporary file first so readers never see a partial file
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(prefix)
+        for entry, array in zip(entries, arrays.values()):
+            f.write(b"\0" * (len(prefix) + entry["offset"] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_arrays(path: Path, magic: bytes, dtypes: dict) -> tuple[dict, dict]:
+    """Map the arrays read-only, no data is read until it is accessed"""
+    with open(path, "rb") as f:
+        if f.read(len(magic)) != magic:
+            raise ValueError(f"Unexpected file format: {path}")
+        (header_length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_length))
+
+    prefix_length = len(magic) + 4 + header_length
+    data_offset = prefix_length + (-prefix_length % ALIGNMENT)
+
+    arrays = {}
+    for entry in header.pop("arrays"):
+        dtype = dtypes[entry["name"]]
+        shape = tuple(entry["shape"])
+        if 0 in shape:
+            arrays[entry["name"]] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[entry["name"]] = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=data_offset + entry["offset"],
+                shape=shape,
+            )
+    return arrays, header
+
+
+def _dates(days: np.ndarray) -> pd.DatetimeIndex:
+    return pd.DatetimeIndex(
+        days.astype("datetime64[D]").astype("datetime64[ns]"), name="trading_date"
+    )
+
+
+def _day(timestamp) -> int:
+    """Days since epoch of a timestamp's date"""
+    return pd.Timestamp(timestamp).normalize().value // pd.Timedelta(days=1).value
+
+
+def _first_extreme(values: np.ndarray, reducer) -> np.ndarray:
+    """Column of the first NaN-ignoring max (np.fmax) / min (np.fmin) per row"""
+    extremes = reducer.reduce(values, axis=1)
+    return (values == extremes[:, None]).argmax(axis=1)
+
+
+class IntradayProfile:
+    """
+    Per trading day and bucket arrays, one bucket per bar of the day:
+
+        days              int32[days]               trading date, days since epoch
+        buckets           float32[days, buckets, 4] open, high, low, close
+        extreme_minutes   int16[days, 2]            minute of day of the daily
+                                                    high / low
+
+    Bucket b covers the bar_minutes starting at bucket_minutes()[b]. Any
+    session layout is evaluated by reducing over the buckets it contains,
+    so changing SESSIONS never requires another pass over bars. Empty
+    buckets hold NaN.
+    """
+
+    MAGIC = b"INTRPRF1"
+    DTYPES = {
+        "days": "<i4",
+        "buckets": "<f4",
+        "extreme_minutes": "<i2",
+    }
+
+    def __init__(
+        self,
+        days: np.ndarray,
+        buckets: np.ndarray,
+        extreme_minutes: np.ndarray,
+        bar_minutes: int,
+    ):
+        self.days = days
+        self.buckets = buckets
+        self.extreme_minutes = extreme_minutes
+        self.bar_minutes = bar_minutes
+
+    @classmethod
+    def from_bars(cls, bars: pd.DataFrame, bar_minutes: int) -> "IntradayProfile":
+        """
+        Reduce intraday OHLC bars into (day, bucket) cells in a single sorted
+        pass; several bars in one bucket are merged like a resample.
+        """
+        n_buckets = MINUTES_PER_DAY // bar_minutes
+        if bars.empty:
+            return cls(
+                np.empty(0, dtype="<i4"),
+                np.empty((0, n_buckets, len(PRICE_FIELDS)), dtype="<f4"),
+                np.empty((0, 2), dtype="<i2"),
+                bar_minutes,
+            )
+
+        index = bars.index
+        day_minutes = minutes_of_day(index)
+        rolls = (day_minutes >= TRADING_DAY_START_MINUTE).astype("int64")
+        trading_dates = index.normalize() + pd.to_timedelta(rolls, unit="D")
+        day_codes, day_labels = pd.factorize(trading_dates)
+        bucket_codes = (
+            (day_minutes - TRADING_DAY_START_MINUTE) % MINUTES_PER_DAY
+        ) // bar_minutes
+
+        cell_keys = day_codes.astype("int64") * n_buckets + bucket_codes
+        order = np.argsort(cell_keys, kind="stable")
+        sorted_keys = cell_keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        cell_days, cell_buckets = np.divmod(sorted_keys[starts], n_buckets)
+
+        n_days = len(day_labels)
+        buckets = np.full((n_days, n_buckets, len(PRICE_FIELDS)), np.nan, dtype="<f4")
+        cells = (cell_days, cell_buckets)
+        buckets[cells + (OPEN,)] = bars["Open"].to_numpy()[order][starts]
+        buckets[cells + (HIGH,)] = np.maximum.reduceat(
+            bars["High"].to_numpy()[order], starts
+        )
+        buckets[cells + (LOW,)] = np.minimum.reduceat(
+            bars["Low"].to_numpy()[order], starts
+        )
+        buckets[cells + (CLOSE,)] = bars["Close"].to_numpy()[order][ends - 1]
+
+        profile = cls(
+            (day_labels.as_unit("s").asi8 // 86400).astype("<i4"),
+            buckets,
+            np.empty((n_days, 2), dtype="<i2"),
+            bar_minutes,
+        )
+        bucket_minutes = profile.bucket_minutes()
+        profile.extreme_minutes[:, 0] = bucket_minutes[
+            _first_extreme(buckets[:, :, HIGH], np.fmax)
+        ]
+        profile.extreme_minutes[:, 1] = bucket_minutes[
+            _first_extreme(buckets[:, :, LOW], np.fmin)
+        ]
+        return profile
+
+    @classmethod
+    def concat(
+        cls, profiles: list["IntradayProfile"], bar_minutes: int
+    ) -> "IntradayProfile":
+        """
+        Join profiles of consecutive, non-overlapping day ranges, such as
+        profiles built from bars split at trading day starts
+        """
+        profiles = [profile for profile in profiles if not profile.empty]
+        if not profiles:
+            return cls.from_bars(pd.DataFrame(), bar_minutes)
+        return cls(
+            np.concatenate([profile.days for profile in profiles]),
+            np.concatenate([profile.buckets for profile in profiles]),
+            np.concatenate([profile.extreme_minutes for profile in profiles]),
+            bar_minutes,
+        )
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.days) == 0
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return _dates(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held, arrays mapped from a cache file are not counted"""
+        return sum(
+            owned_nbytes(array)
+            for array in (self.days, self.buckets, self.extreme_minutes)
+        )
+
+    def bucket_minutes(self) -> np.ndarray:
+        """Minute of day each bucket starts at"""
+        starts = np.arange(self.buckets.shape[1]) * self.bar_minutes
+        return (TRADING_DAY_START_MINUTE + starts) % MINUTES_PER_DAY
+
+    def extreme_minute_histogram(self, side: int) -> np.ndarray:
+        """Days whose high (side=HIGH) or low (side=LOW) fell on each minute"""
+        column = 0 if side == HIGH else 1
+        return np.bincount(
+            self.extreme_minutes[:, column].astype(np.intp), minlength=MINUTES_PER_DAY
+        )
+
+    def save(self, path: Path) -> Path:
+        return _save_arrays(
+            path,
+            self.MAGIC,
+            {
+                name: np.asarray(getattr(self, name), dtype=dtype)
+                for name, dtype in self.DTYPES.items()
+            },
+            {"bar_minutes": self.bar_minutes},
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "IntradayProfile":
+        arrays, meta = _load_arrays(path, cls.MAGIC, cls.DTYPES)
+        return cls(**arrays, bar_minutes=meta["bar_minutes"])
+
+
+class SessionCube:
+    """
+    Per trading day and session slot arrays:
+
+        days            int32[days]                trading date, days since epoch
+        prices          float32[days, slots, 4]    open, high, low, close
+        extreme_bars    int16[days, slots, 2]      bar of the slot's high / low
+                                                   within the trading day
+        extreme_slots   int8[days, 2]              slot making the daily high / low
+
+    Slots are the configured sessions in config order plus a last slot for
+    bars outside every session. Slots without bars hold NaN prices and
+    NO_BAR. Arrays loaded from disk are read-only memory maps.
+    """
+
+    MAGIC = b"SESSCUB1"
+    DTYPES = {
+        "days": "<i4",
+        "prices": "<f4",
+        "extreme_bars": "<i2",
+        "extreme_slots": "<i1",
+    }
+
+    def __init__(
+        self,
+        days: np.ndarray,
+        prices: np.ndarray,
+        extreme_bars: np.ndarray,
+        extreme_slots: np.ndarray,
+        slot_names: list[str],
+        bar_minutes: int,
+    ):
+        self.days = days
+        self.prices = prices
+        self.extreme_bars = extreme_bars
+        self.extreme_slots = extreme_slots
+        self.slot_names = list(slot_names)
+        self.bar_minutes = bar_minutes
+
+    @classmethod
+    def from_bars(
+        cls, bars: pd.DataFrame, calendar: SessionCalendar, bar_minutes: int
+    ) -> "SessionCube":
+        """Build the cube from intraday OHLC bars"""
+        return cls.from_profile(IntradayProfile.from_bars(bars, bar_minutes), calendar)
+
+    @classmethod
+    def from_profile(
+        cls, profile: IntradayProfile, calendar: SessionCalendar
+    ) -> "SessionCube":
+        """
+        Reduce the profile buckets of every slot of the calendar's layout.
+        A bucket belongs to the session containing its first minute.
+        """
+        slot_names = calendar.session_names + [OUT_OF_SESSION]
+        n_slots = len(slot_names)
+        n_days = len(profile)
+        bucket_slots = calendar.minute_table[profile.bucket_minutes()]
+
+        prices = np.full((n_days, n_slots, len(PRICE_FIELDS)), np.nan, dtype="<f4")
+        extreme_bars = np.full((n_days, n_slots, len(BAR_FIELDS)), NO_BAR, dtype="<i2")
+        # Ties go to the slot seen first within the day, out-of-session last
+        never_seen = profile.buckets.shape[1] + 1
+        first_seen = np.full((n_days, n_slots), never_seen, dtype="int64")
+        rows = np.arange(n_days)
+
+        for slot in range(n_slots):
+            columns = np.flatnonzero(bucket_slots == slot)
+            if len(columns) == 0:
+                continue
+            cells = profile.buckets[:, columns, :]
+            present = ~np.isnan(cells[:, :, HIGH])
+            seen = present.any(axis=1)
+            first = present.argmax(axis=1)
+            last = len(columns) - 1 - present[:, ::-1].argmax(axis=1)
+
+            prices[:, slot, OPEN] = np.where(seen, cells[rows, first, OPEN], np.nan)
+            prices[:, slot, CLOSE] = np.where(seen, cells[rows, last, CLOSE], np.nan)
+            for field, bar_field, reducer in (
+                (HIGH, HIGH_BAR, np.fmax),
+                (LOW, LOW_BAR, np.fmin),
+            ):
+                prices[:, slot, field] = reducer.reduce(cells[:, :, field], axis=1)
+                extreme_bars[:, slot, bar_field] = np.where(
+                    seen, columns[_first_extreme(cells[:, :, field], reducer)], NO_BAR
+                )
+            first_seen[:, slot] = np.where(seen, columns[first], never_seen)
+
+        out_of_session = first_seen[:, -1] < never_seen
+        first_seen[out_of_session, -1] = never_seen - 1
+
+        extreme_slots = np.stack(
+            [
+                cls._pick_extreme_slot(prices[:, :, HIGH], first_seen, np.fmax),
+                cls._pick_extreme_slot(prices[:, :, LOW], first_seen, np.fmin),
+            ],
+            axis=1,
+        ).astype("<i1")
+
+        return cls(
+            np.asarray(profile.days, dtype="<i4"),
+            prices,
+            extreme_bars,
+            extreme_slots,
+            slot_names,
+            profile.bar_minutes,
+        )
+
+    @staticmethod
+    def _pick_extreme_slot(
+        values: np.ndarray, first_seen: np.ndarray, reducer
+    ) -> np.ndarray:
+        """Return the slot holding each row's extreme, earliest slot on ties"""
+        extremes = reducer.reduce(values, axis=1)
+        candidates = values == extremes[:, None]
+        return np.where(candidates, first_seen, np.iinfo("int64").max).argmin(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.days) == 0
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return _dates(self.days)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held, arrays mapped from a cache file are not counted"""
+        return sum(
+            owned_nbytes(array)
+            for array in (
+                self.days,
+                self.prices,
+                self.extreme_bars,
+                self.extreme_slots,
+            )
+        )
+
+    def slice_dates(self, start=None, end=None) -> "SessionCube":
+        """Days with trading date in [start, end) (dates of the bounds), as views"""
+        first = 0 if start is None else np.searchsorted(self.days, _day(start))
+        last = len(self.days) if end is None else np.searchsorted(self.days, _day(end))
+        return SessionCube(
+            self.days[first:last],
+            self.prices[first:last],
+            self.extreme_bars[first:last],
+            self.extreme_slots[first:last],
+            self.slot_names,
+            self.bar_minutes,
+        )
+
+    @property
+    def session_names(self) -> list[str]:
+        """Configured sessions, without the out-of-session slot"""
+        return self.slot_names[:-1]
+
+    @property
+    def labels(self) -> list[str]:
+        """Distinct slot names in slot order"""
+        return list(dict.fromkeys(self.slot_names))
+
+    def price(self, field: int, slot: int | None = None) -> np.ndarray:
+        """[days, slots] array of a price field, or [days] for one slot"""
+        if slot is None:
+            return self.prices[:, :, field]
+        return self.prices[:, slot, field]
+
+    def slot_index(self, name: str) -> int | None:
+        """First slot labelled name, None when the cube has no such slot"""
+        return self.slot_names.index(name) if name in self.slot_names else None
+
+    def extreme_codes(self, side: int, categories: list[str]) -> np.ndarray:
+        """
+        Slot of the daily high (side=HIGH) or low (side=LOW) as codes into
+        categories matched by slot name, -1 for names not in categories
+        """
+        lookup = np.array(
+            [
+                categories.index(name) if name in categories else -1
+                for name in self.slot_names
+            ],
+            dtype=np.int64,
+        )
+        column = 0 if side == HIGH else 1
+        return lookup[self.extreme_slots[:, column]]
+
+    def save(self, path: Path) -> Path:
+        return _save_arrays(
+            path,
+            self.MAGIC,
+            {
+                name: np.asarray(getattr(self, name), dtype=dtype)
+                for name, dtype in self.DTYPES.items()
+            },
+            {"slot_names": self.slot_names, "bar_minutes": self.bar_minutes},
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "SessionCube":
+        arrays, meta = _load_arrays(path, cls.MAGIC, cls.DTYPES)
+        return cls(
+            **arrays, slot_names=meta["slot_names"], bar_minutes=meta["bar_minutes"]
+        )
@@ -0,0 +1,190 @@
+"""
+Session layout sweep: evaluate the session timing and interaction metrics
+for many variants of SESSIONS in one run.
+
+Bars are reduced once per symbol into the cached IntradayProfile; every
+variant only re-reduces the profile buckets, so the work per bar does not
+depend on the number of variants. Variants are spread across worker
+processes that map the profile files read-only.
+"""
+
+import copy
+import itertools
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd  # type: ignore
+from config.sessions_config import SESSIONS
+from config.settings import SESSION_SWEEP_SETTINGS
+from services.performance import ConfigManager
+from services.storage import get_storage
+from .calculators import session_distribution_metrics
+from .calculators.session_distribution_metrics import SessionDistributionMetrics
+from .session_cube import IntradayProfile
+
+BASE_VARIANT = "base"
+
+# Per worker process state, set up once by _init_worker
+_worker_profiles: dict[str, IntradayProfile] = {}
+_worker_calculator: SessionDistributionMetrics | None = None
+
+
+def load_sweep_spec(path: Path, base: dict = SESSIONS) -> dict[str, dict]:
+    """
+    Read a sweep spec and expand it into named session layouts:
+
+        {
+            "grid": {"Asia.end": ["07:00", "08:00"], "London.start": [...]},
+            "layouts": {"split_ny": {<full SESSIONS-like layout>}}
+        }
+
+    Every combination of grid values is applied on top of the base layout,
+    explicit layouts are taken as they are. The base layout is always
+    included as "base".
+    """
+    with open(path) as f:
+        spec = json.load(f)
+
+    variants = {BASE_VARIANT: base}
+    variants.update(expand_session_grid(base, spec.get("grid", {})))
+    variants.update(spec.get("layouts", {}))
+    return variants
+
+
+def expand_session_grid(base: dict, grid: dict[str, list[str]]) -> dict[str, dict]:
+    """Cartesian product of "Session.start|end" boundary values over base"""
+    if not grid:
+        return {}
+
+    keys = list(grid)
+    for key in keys:
+        session, _, bound = key.partition(".")
+        if session not in base or bound not in ("start", "end"):
+            raise ValueError(f"Invalid sweep grid key: {key}")
+
+    variants = {}
+    for values in itertools.product(*(grid[key] for key in keys)):
+        layout = copy.deepcopy(base)
+        for key, value in zip(keys, values):
+            session, _, bound = key.partition(".")
+            layout[session][bound] = value
+        name = ",".join(f"{key}={value}" for key, value in zip(keys, values))
+        variants[name] = layout
+    return variants
+
+
+def run_session_sweep(
+    timeframes_dir: Path,
+    variants: dict[str, dict],
+    symbols: list[str] | None = None,
+    output_dir: Path | None = None,
+    max_workers: int | None = SESSION_SWEEP_SETTINGS["max_workers"],
+) -> pd.DataFrame:
+    """
+    Evaluate every variant for every symbol and write the results table
+    (one row per variant and symbol, one column per metric) as CSV next
+    to a JSON file with the evaluated layouts.
+    """
+    profile_paths = _prepare_profiles(timeframes_dir, symbols)
+    if not profile_paths:
+        print("⚠️ No intraday profiles available for the session sweep")
+        return pd.DataFrame()
+
+    if max_workers is None:
+        max_workers = ConfigManager.get_optimal_concurrency()
+    max_workers = max(1, min(max_workers, len(variants)))
+
+    # A few chunks per worker keep the pool busy without per-variant overhead
+    names = list(variants)
+    chunk_count = min(len(names), max_workers * 4)
+    chunks = [
+        {name: variants[name] for name in names[i::chunk_count]}
+        for i in range(chunk_count)
+    ]
+
+    print(
+        f"🧪 Sweeping {len(variants)} session layouts over {len(profile_paths)} "
+        f"symbols ({max_workers} processes)..."
+    )
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(timeframes_dir, profile_paths),
+    ) as executor:
+        for chunk_rows in executor.map(_evaluate_variants, chunks):
+            rows.extend(chunk_rows)
+
+    order = {name: i for i, name in enumerate(names)}
+    rows.sort(key=lambda row: (order[row["variant"]], row["symbol"]))
+    results = pd.DataFrame(rows).set_index(["variant", "symbol"])
+
+    if output_dir is None:
+        output_dir = (
+            timeframes_dir.parent.parent / SESSION_SWEEP_SETTINGS["output_path"]
+        )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    results.to_csv(output_dir / "session_sweep.csv")
+    with open(output_dir / "session_sweep_layouts.json", "w") as f:
+        json.dump(variants, f, indent=2)
+
+    print(f"✅ Session sweep results written to {output_dir}")
+    return results
+
+
+def _prepare_profiles(
+    timeframes_dir: Path, symbols: list[str] | None
+) -> dict[str, Path]:
+    """
+    Build (or reuse) the cached intraday profile of every symbol, the only
+    step reading bars. Returns profile cache files by symbol.
+    """
+    storage = get_storage()
+    if symbols is None:
+        symbols = sorted(
+            subdir.name.upper()
+            for subdir in timeframes_dir.iterdir()
+            if subdir.is_dir()
+        )
+
+    calculator = SessionDistributionMetrics(timeframes_dir)
+    profile_paths = {}
+    for symbol in symbols:
+        matches = storage.glob(timeframes_dir / symbol.lower(), f"{symbol}_1d_*")
+        if not matches:
+            print(f"⚠️ No timeframe data for {symbol}, skipping")
+            continue
+        year = matches[0].stem.split("_")[-1]
+
+        profile = calculator.load_intraday_profile(symbol, year)
+        if profile.empty:
+            print(f"⚠️ No intraday data for {symbol}, skipping")
+            continue
+        # Not cached without a timeframes build record, workers need the file
+        path = calculator.intraday_profile_file(symbol, year)
+        if not path.exists():
+            profile.save(path)
+        profile_paths[symbol] = path
+
+    return profile_paths
+
+
+def _init_worker(timeframes_dir: Path, profile_paths: dict[str, Path]) -> None:
+    global _worker_calculator
+    _worker_calculator = SessionDistributionMetrics(timeframes_dir)
+    # Per layout summaries would flood the output
+    logging.getLogger(session_distribution_metrics.__name__).setLevel(logging.WARNING)
+    _worker_profiles.clear()
+    _worker_profiles.update(
+        {symbol: IntradayProfile.load(path) for symbol, path in profile_paths.items()}
+    )
+
+
+def _evaluate_variants(variants: dict[str, dict]) -> list[dict]:
+    rows = []
+    for name, sessions in variants.items():
+        for symbol, profile in _worker_profiles.items():
+            metrics = _worker_calculator.evaluate_session_layout(profile, sessions)
+            rows.append({"variant": name, "symbol": symbol, **metrics})
+    return rows
@@ -5,20 +5,24 @@ from utils.profile_metrics import (
     filter_profile_metrics_by_category,
 )
 from services.metrics.metrics_manager import MetricsManager
+from services.storage import get_storage
 
 
 class MetricsService:
     def __init__(self, timeframes_dir: Path):
         self.timeframes_dir = timeframes_dir
         self.metrics_manager = MetricsManager(timeframes_dir)
+        self.storage = get_storage()
 
     def _extract_year_from_file(self, symbol: str) -> str:
         """Extract year from timeframe file"""
-        pattern = f"{symbol}_1d_*.csv"
+        pattern = f"{symbol}_1d_*"
         symbol_dir = self.timeframes_dir / symbol.lower()
-        matches = list(symbol_dir.glob(pattern))
+        matches = self.storage.glob(symbol_dir, pattern)
         if not matches:
-            raise FileNotFoundError(f"No data files found matching pattern: {pattern}")
+            raise FileNotFoundError(
+                f"No data files found matching pattern: {pattern}{self.storage.suffix}"
+            )
         return matches[0].stem.split("_")[-1]
 
     def calculate_all_metrics(self, symbol: str) -> Dict[str, Dict[str, Any]]:
@@ -26,6 +30,29 @@ class MetricsService:
         year = self._extract_year_from_file(symbol)
         return self.metrics_manager.calculate_all_metrics(symbol, year)
 
+    def history_spans(self, symbol: str) -> list[tuple]:
+        """Week-aligned year spans to compute partial metrics over"""
+        year = self._extract_year_from_file(symbol)
+        return self.metrics_manager.history_spans(symbol, year)
+
+    def calculate_partials(self, symbol: str, start=None, end=None) -> Dict[str, dict]:
+        """Partial metrics over [start, end) of a symbol's history"""
+        year = self._extract_year_from_file(symbol)
+        return self.metrics_manager.calculate_partials(symbol, year, start, end)
+
+    def calculate_metrics_for_window(
+        self, symbol: str, start=None, end=None
+    ) -> Dict[str, Any]:
+        """All metrics over [start, end) of a symbol's history, e.g. 2020-2022"""
+        year = self._extract_year_from_file(symbol)
+        return self.metrics_manager.calculate_window(symbol, year, start, end)
+
+    def reduce_partials(
+        self, symbol: str, partials: list[Dict[str, dict]]
+    ) -> Dict[str, Any]:
+        """All metrics of a symbol from the partials of its spans, in order"""
+        return self.metrics_manager.reduce_partials(symbol, partials)
+
     def calculate_metrics_for_profile(
         self, symbol: str, profile: str
     ) -> Dict[str, Dict[str, Any]]:
@@ -1,47 +1,215 @@
-import time
-from typing import Dict, Any, Optional
+import mmap
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import numpy as np
+import pandas as pd  # type: ignore
+from config.settings import CACHE_SETTINGS
+from .config_manager import ConfigManager
+
+
+def owned_nbytes(array: Any) -> int:
+    """
+    Bytes of an array not backed by a file or shared-memory mapping. Views
+    of mapped files (np.memmap, OhlcView stores, shared segments) end their
+    base chain in an mmap; their pages belong to the page cache and are not
+    charged to the process.
+    """
+    base = array
+    while base is not None:
+        if isinstance(base, mmap.mmap):
+            return 0
+        if isinstance(base, memoryview):
+            base = base.obj
+        else:
+            base = getattr(base, "base", None)
+    return int(array.nbytes)
+
+
+def _series_nbytes(series: pd.Series) -> int:
+    values = series.values
+    if isinstance(values, np.ndarray) and owned_nbytes(values) == 0:
+        return 0
+    return int(series.memory_usage(index=False, deep=True))
+
+
+def _index_nbytes(index: pd.Index) -> int:
+    values = index.values
+    if isinstance(values, np.ndarray) and owned_nbytes(values) == 0:
+        return 0
+    return int(index.memory_usage(deep=True))
+
+
+def measure_nbytes(value: Any) -> int:
+    """
+    Memory held by a cached value: frames, arrays or objects with nbytes.
+    Frame columns and arrays over mapped memory are not counted.
+    """
+    if isinstance(value, pd.Series):
+        return _index_nbytes(value.index) + _series_nbytes(value)
+    if isinstance(value, pd.DataFrame):
+        return _index_nbytes(value.index) + sum(
+            _series_nbytes(value.iloc[:, i]) for i in range(value.shape[1])
+        )
+    if isinstance(value, np.ndarray):
+        return owned_nbytes(value)
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            measure_nbytes(item) for item in value.values()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(measure_nbytes(item) for item in value)
+    return sys.getsizeof(value)
 
 
 class DataCache:
-    """Simple in-memory cache for timeframe data with LRU eviction."""
-
-    def __init__(self, max_size: int = 100):
-        self.cache: Dict[str, Any] = {}
-        self.access_times: Dict[str, float] = {}
-        self.max_size = max_size
-        self.cache_version = "v2"  # Add version to invalidate old cache entries
-
-    def get(self, key: str) -> Optional[Any]:
-        """Get cached data"""
-        versioned_key = f"{key}_{self.cache_version}"
-        if versioned_key in self.cache:
-            self.access_times[versioned_key] = time.time()
-            return self.cache[versioned_key]
-        return None
-
-    def set(self, key: str, value: Any) -> None:
-        """Set cached data with LRU eviction"""
-        versioned_key = f"{key}_{self.cache_version}"
-
-        if len(self.cache) >= self.max_size:
-            # Remove least recently used item
-            oldest_key = min(
-                self.access_times.keys(), key=lambda k: self.access_times[k]
-            )
-            del self.cache[oldest_key]
-            del self.access_times[oldest_key]
-
-        self.cache[versioned_key] = value
-        self.access_times[versioned_key] = time.time()
+    """
+    Process-wide LRU cache for frames, arrays and other loaded data, bounded
+    by the bytes the values hold rather than by the number of entries.
+
+    Entries live in an ordered dict, so get and set are O(1) and eviction
+    pops the least recently used entry. Pinned entries are moved out of the
+    LRU order and never evicted until every pin is released. Without a fixed
+    budget the limit follows the memory currently available to the process.
+    """
+
+    def __init__(
+        self,
+        budget_bytes: Optional[int] = None,
+        memory_fraction: float = CACHE_SETTINGS["memory_fraction"],
+        max_budget_mb: Optional[float] = CACHE_SETTINGS["max_budget_mb"],
+    ):
+        self.fixed_budget = budget_bytes
+        self.memory_fraction = memory_fraction
+        self.max_budget_mb = max_budget_mb
+        # key -> (value, nbytes)
+        self._lru: "OrderedDict[Hashable, tuple[Any, int]]" = OrderedDict()
+        # key -> [value, nbytes, pin count]
+        self._pinned: Dict[Hashable, list] = {}
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def budget_bytes(self) -> int:
+        if self.fixed_budget is not None:
+            return self.fixed_budget
+
+        # Cached bytes are part of the memory the cache may use
+        available = ConfigManager.get_available_memory_gb() * 1024**3
+        budget = int(self.memory_fraction * (available + self.total_bytes))
+        if self.max_budget_mb is not None:
+            budget = min(budget, int(self.max_budget_mb * 1024**2))
+        return budget
+
+    def get(self, key: Hashable, pin: bool = False) -> Optional[Any]:
+        """Get cached data and mark it recently used, optionally pinning it"""
+        with self._lock:
+            pinned = self._pinned.get(key)
+            if pinned is not None:
+                self.hits += 1
+                if pin:
+                    pinned[2] += 1
+                return pinned[0]
+
+            entry = self._lru.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if pin:
+                del self._lru[key]
+                self._pinned[key] = [entry[0], entry[1], 1]
+            else:
+                self._lru.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, pin: bool = False) -> None:
+        """
+        Cache a value, evicting least recently used entries past the budget.
+        An unpinned value larger than the whole budget is not cached.
+        """
+        nbytes = measure_nbytes(value)
+        budget = self.budget_bytes
+        with self._lock:
+            pin_count = self._remove(key)
+            if pin or pin_count:
+                self._pinned[key] = [value, nbytes, pin_count + int(pin)]
+            elif nbytes <= budget:
+                self._lru[key] = (value, nbytes)
+            else:
+                return
+            self.total_bytes += nbytes
+            self._evict(budget)
+
+    def pin(self, key: Hashable) -> bool:
+        """Exclude a cached entry from eviction, False if it is not cached"""
+        return self.get(key, pin=True) is not None
+
+    def unpin(self, key: Hashable) -> None:
+        """Release one pin, the entry becomes the most recently used one"""
+        budget = self.budget_bytes
+        with self._lock:
+            pinned = self._pinned.get(key)
+            if pinned is None:
+                return
+            pinned[2] -= 1
+            if pinned[2] <= 0:
+                del self._pinned[key]
+                self._lru[key] = (pinned[0], pinned[1])
+                # Pinned entries may have pushed the cache past its budget
+                self._evict(budget)
+
+    def _evict(self, budget: int) -> None:
+        while self.total_bytes > budget and self._lru:
+            _, (_, nbytes) = self._lru.popitem(last=False)
+            self.total_bytes -= nbytes
+            self.evictions += 1
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Hashable) -> int:
+        """Drop an entry, return its pin count"""
+        pinned = self._pinned.pop(key, None)
+        if pinned is not None:
+            self.total_bytes -= pinned[1]
+            return pinned[2]
+        entry = self._lru.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[1]
+        return 0
 
     def clear(self) -> None:
         """Clear all cached data"""
-        self.cache.clear()
-        self.access_times.clear()
+        with self._lock:
+            self._lru.clear()
+            self._pinned.clear()
+            self.total_bytes = 0
 
     def size(self) -> int:
         """Get cache size"""
-        return len(self.cache)
+        return len(self._lru) + len(self._pinned)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current memory use"""
+        return {
+            "entries": self.size(),
+            "pinned": len(self._pinned),
+            "size_mb": round(self.total_bytes / 1024**2, 2),
+            "budget_mb": round(self.budget_bytes / 1024**2, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
 
 
 # Global instance
@@ -1,6 +1,7 @@
 import time
 import psutil  # type: ignore
 from typing import Dict, Any
+from .cache import data_cache
 
 
 class PerformanceMonitor:
@@ -11,6 +12,7 @@ class PerformanceMonitor:
         self.end_time = None
         self.cpu_usage = []
         self.memory_usage = []
+        self.data_loads: Dict[str, Dict[str, int]] = {}
 
     def start_monitoring(self):
         """Start performance monitoring"""
@@ -20,6 +22,10 @@ class PerformanceMonitor:
         """Stop performance monitoring"""
         self.end_time = time.time()
 
+    def record_data_loads(self, run: str, load_counts: Dict[str, int]):
+        """Record how many times each input was loaded during a metrics run"""
+        self.data_loads[run] = dict(load_counts)
+
     def get_current_stats(self) -> Dict[str, float]:
         """Get current system stats"""
         return {
@@ -38,6 +44,8 @@ class PerformanceMonitor:
                 "duration_seconds": round(duration, 2),
                 "duration_minutes": round(duration / 60, 2),
                 **current_stats,
+                "data_loads": self.data_loads,
+                "data_cache": data_cache.stats(),
             }
         return {}
 
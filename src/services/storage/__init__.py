@@ -0,0 +1,41 @@
+"""
+Storage backends for OHLC frames produced by the pipeline.
+"""
+
+from .base import FrameStorage
+from .ohlc_view import OhlcView
+from .csv_storage import CsvStorage
+from .binary_storage import BinaryStorage
+from .partitioned_storage import PartitionedStorage
+from .factory import get_storage
+from .anomaly_mask import (
+    anomaly_settings,
+    compute_anomaly_mask,
+    ensure_anomaly_mask,
+    load_anomaly_mask,
+)
+from .shared_arrays import (
+    SharedSegments,
+    active_shared_segments,
+    attach_shared_segments,
+    share_ohlc_view,
+    shared_segments_run,
+)
+
+__all__ = [
+    "FrameStorage",
+    "OhlcView",
+    "CsvStorage",
+    "BinaryStorage",
+    "PartitionedStorage",
+    "get_storage",
+    "anomaly_settings",
+    "compute_anomaly_mask",
+    "ensure_anomaly_mask",
+    "load_anomaly_mask",
+    "SharedSegments",
+    "active_shared_segments",
+    "attach_shared_segments",
+    "share_ohlc_view",
+    "shared_segments_run",
+]
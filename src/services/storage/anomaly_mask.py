@@ -0,0 +1,137 @@
+"""
+Anomaly masks: which candles of a stored frame are kept by the metrics.
+
+Masks are computed once when a timeframe store is written and saved as a
+bitmask next to it, so loads only apply them. A mask records the detection
+settings and the size and mtime of the data file it was computed for; a
+mask that does not match either is ignored and recomputed.
+
+File layout:
+    MAGIC | uint32 header length | JSON header | packed bits (1 = keep)
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+import numpy as np
+import pandas as pd  # type: ignore
+from config.settings import ANOMALY_SETTINGS
+from .base import FrameStorage, OHLC_COLUMNS
+
+MAGIC = b"ANOMMSK1"
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+def anomaly_settings(timeframe: str) -> dict:
+    """Detection settings for a timeframe, a mask is valid only for these"""
+    method = ANOMALY_SETTINGS["method"]
+    if method == "std":
+        return {
+            "method": method,
+            "n_std": ANOMALY_SETTINGS["std_thresholds"].get(
+                timeframe, ANOMALY_SETTINGS["std_threshold"]
+            ),
+        }
+    if method == "mad":
+        return {
+            "method": method,
+            "window": ANOMALY_SETTINGS["mad_window"],
+            "n_mad": ANOMALY_SETTINGS["mad_threshold"],
+        }
+    raise ValueError(f"Unknown anomaly detection method: {method}")
+
+
+def compute_anomaly_mask(df: pd.DataFrame, settings: dict) -> np.ndarray:
+    """Boolean array, True for candles within the thresholds on every column"""
+    if settings["method"] == "std":
+        # Column by column, so only one column's temporaries exist at a time
+        n_std = settings["n_std"]
+        keep = np.ones(len(df), dtype=bool)
+        for column in OHLC_COLUMNS:
+            values = df[column]
+            mean = values.mean()
+            std = values.std()
+            keep &= (
+                (values >= mean - n_std * std) & (values <= mean + n_std * std)
+            ).to_numpy()
+        return keep
+
+    frame = df[OHLC_COLUMNS]
+
+    # One rolling pass over all columns; a zero MAD (flat neighbourhood)
+    # gives no scale to judge by, so those candles are kept
+    rolling = frame.astype("float64").rolling(
+        settings["window"], center=True, min_periods=1
+    )
+    deviation = (frame - rolling.median()).abs()
+    scale = (
+        MAD_SCALE
+        * deviation.rolling(settings["window"], center=True, min_periods=1)
+        .median()
+        .to_numpy()
+    )
+    outliers = (deviation.to_numpy() > settings["n_mad"] * scale) & (scale > 0)
+    return ~outliers.any(axis=1)
+
+
+def save_anomaly_mask(
+    storage: FrameStorage, data_path: Path, mask: np.ndarray, settings: dict
+) -> Path:
+    stat = data_path.stat()
+    header = json.dumps(
+        {
+            "rows": len(mask),
+            "settings": settings,
+            "data_size": storage.size_bytes(data_path),
+            "data_mtime_ns": stat.st_mtime_ns,
+        }
+    ).encode()
+
+    path = storage.mask_path_for(data_path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        f.write(np.packbits(mask).tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_anomaly_mask(
+    storage: FrameStorage, data_path: Path, settings: dict
+) -> np.ndarray | None:
+    """Stored mask of a data file, None when missing or stale"""
+    path = storage.mask_path_for(data_path)
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_length))
+            bits = np.frombuffer(f.read(), dtype=np.uint8)
+        stat = data_path.stat()
+        size = storage.size_bytes(data_path)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if (
+        header["settings"] != settings
+        or header["data_size"] != size
+        or header["data_mtime_ns"] != stat.st_mtime_ns
+    ):
+        return None
+    return np.unpackbits(bits, count=header["rows"]).view(bool)
+
+
+def ensure_anomaly_mask(
+    storage: FrameStorage, data_path: Path, timeframe: str
+) -> np.ndarray:
+    """Return the stored mask of a data file, (re)computing it when stale"""
+    settings = anomaly_settings(timeframe)
+    mask = load_anomaly_mask(storage, data_path, settings)
+    if mask is None:
+        frame = storage.open_view(data_path, timeframe).to_frame()
+        mask = compute_anomaly_mask(frame, settings)
+        save_anomaly_mask(storage, data_path, mask, settings)
+    return mask
@@ -0,0 +1,160 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterator
+import pandas as pd  # type: ignore
+from .ohlc_view import OhlcView
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
+# Anomaly masks are stored next to the data file they belong to
+MASK_SUFFIX = ".mask"
+
+
+class FrameWriter(ABC):
+    """
+    Writes a stored frame chunk by chunk, for frames that should not be held
+    in memory at once. Chunks must be in time order. The file replaces any
+    previous one only on close(); as a context manager the writer closes on
+    success and aborts on error.
+    """
+
+    def __init__(self, path: Path, timeframe: str):
+        self.path = path
+        self.timeframe = timeframe
+        self.rows = 0
+        self.last_timestamp: pd.Timestamp | None = None
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> Path:
+        """Finish the file and return its path"""
+        pass
+
+    @abstractmethod
+    def abort(self) -> None:
+        """Drop everything written so far"""
+        pass
+
+    def _count(self, df: pd.DataFrame) -> None:
+        self.rows += len(df)
+        if not df.empty:
+            self.last_timestamp = df.index[-1]
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class FrameStorage(ABC):
+    """
+    Persists OHLC frames with a DatetimeIndex and Open/High/Low/Close columns.
+    Paths are passed without suffix, each backend appends its own.
+    """
+
+    suffix: str = ""
+    # Views are file mappings the OS shares between processes
+    memory_mapped: bool = False
+
+    def path_for(self, stem_path: Path) -> Path:
+        """Return the file path this backend uses for a suffix-less path"""
+        return stem_path.with_name(stem_path.name + self.suffix)
+
+    def exists(self, path: Path) -> bool:
+        return path.exists()
+
+    def size_bytes(self, path: Path) -> int:
+        """Bytes a stored frame takes on disk"""
+        return path.stat().st_size
+
+    def glob(self, directory: Path, pattern: str) -> list[Path]:
+        """Glob files of this backend, pattern is given without suffix"""
+        return sorted(directory.glob(pattern + self.suffix))
+
+    @abstractmethod
+    def save(self, df: pd.DataFrame, path: Path, timeframe: str) -> Path:
+        """Persist a frame and return the written path"""
+        pass
+
+    @abstractmethod
+    def load(self, path: Path, timeframe: str) -> pd.DataFrame:
+        """Load a frame previously written with save()"""
+        pass
+
+    @abstractmethod
+    def open_writer(self, path: Path, timeframe: str) -> FrameWriter:
+        """Writer storing a frame chunk by chunk, see FrameWriter"""
+        pass
+
+    def iter_chunks(
+        self, path: Path, timeframe: str, chunk_rows: int, rows: slice | None = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stored rows (default: all, otherwise the positions in rows, see
+        read_range) as consecutive frames of at most chunk_rows rows
+        """
+        view = self.open_view(path, timeframe)
+        first, last, _ = (rows or slice(None)).indices(len(view))
+        for start in range(first, last, chunk_rows):
+            yield view.rows(start, min(start + chunk_rows, last)).to_frame()
+
+    def append(self, df: pd.DataFrame, path: Path, timeframe: str, start=None) -> Path:
+        """
+        Replace the stored rows from start (default: first row of df) onwards
+        with df. Used by incremental runs to rewrite trailing candles.
+        """
+        if not self.exists(path):
+            return self.save(df, path, timeframe)
+
+        if start is None:
+            if df.empty:
+                return path
+            start = df.index[0]
+
+        existing = self.load(path, timeframe)
+        kept = existing[existing.index < pd.Timestamp(start)]
+        return self.save(pd.concat([kept, df[OHLC_COLUMNS]]), path, timeframe)
+
+    def mask_path_for(self, path: Path) -> Path:
+        """Anomaly mask file of a data file"""
+        return path.with_name(path.name + MASK_SUFFIX)
+
+    def rename(self, path: Path, new_path: Path) -> Path:
+        """Move a stored frame, e.g. when its file name year changes"""
+        mask_path = self.mask_path_for(path)
+        if mask_path.exists():
+            mask_path.replace(self.mask_path_for(new_path))
+        return path.replace(new_path)
+
+    def remove(self, path: Path) -> None:
+        self.mask_path_for(path).unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+
+    def open_view(self, path: Path, timeframe: str) -> OhlcView:
+        """Read-only array view of a stored frame"""
+        return OhlcView.from_frame(self.load(path, timeframe), timeframe)
+
+    def read_range(
+        self,
+        path: Path,
+        timeframe: str,
+        start=None,
+        end=None,
+        columns: list[str] | None = None,
+    ) -> tuple[OhlcView, slice]:
+        """
+        Stored rows with start <= timestamp < end, limited to the given
+        columns (default: all), and their positions among all stored rows.
+        Backends read no more than the range and the columns where their
+        layout allows; memory-mapped views only touch the range's pages.
+        """
+        view = self.open_view(path, timeframe)
+        rows = view.positions(start, end)
+        view = view.rows(rows.start, rows.stop)
+        return (view if columns is None else view.select(columns)), rows
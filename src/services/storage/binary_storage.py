@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+import struct
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd  # type: ignore
+from .base import FrameStorage, FrameWriter, OHLC_COLUMNS
+from .csv_storage import CsvStorage
+from .ohlc_view import OhlcView
+
+MAGIC = b"OHLCBIN1"
+ALIGNMENT = 64
+
+
+def _to_arrays(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Index as int64 epoch nanoseconds and float32 values, one row per column"""
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+
+    times = index.as_unit("ns").asi8.astype("<i8")
+    values = np.ascontiguousarray(df[OHLC_COLUMNS].to_numpy(dtype="<f4").T)
+    return times, values
+
+
+def _file_prefix(rows: int, index_name, timeframe: str) -> bytes:
+    """Magic, header and padding up to the data"""
+    header = json.dumps(
+        {
+            "rows": rows,
+            "columns": OHLC_COLUMNS,
+            "index_name": index_name,
+            "timeframe": timeframe,
+        }
+    ).encode()
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    return prefix + b"\0" * (-len(prefix) % ALIGNMENT)
+
+
+class BinaryStorage(FrameStorage):
+    """
+    Typed columnar binary files: a small JSON header followed by the index as
+    int64 epoch nanoseconds and one contiguous float32 array per column.
+    Files are memory-mapped on load, no text or datetime parsing involved.
+
+    File layout:
+        MAGIC | uint32 header length | JSON header | padding to 64 bytes
+        int64[rows] index | float32[columns, rows] values
+    """
+
+    suffix = ".ohlc"
+    memory_mapped = True
+
+    def __init__(self, export_csv: bool = False):
+        self.export_csv = export_csv
+        self._csv_storage = CsvStorage()
+
+    def save(self, df: pd.DataFrame, path: Path, timeframe: str) -> Path:
+        times, values = _to_arrays(df)
+        prefix = _file_prefix(len(df), df.index.name, timeframe)
+
+        # Write to a temporary file first so readers never see a partial file
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(prefix)
+            f.write(times.tobytes())
+            f.write(values.tobytes())
+        os.replace(tmp_path, path)
+
+        if self.export_csv:
+            self._csv_storage.save(df, self._csv_path(path), timeframe)
+
+        return path
+
+    def open_writer(self, path: Path, timeframe: str) -> "BinaryFrameWriter":
+        csv_writer = None
+        if self.export_csv:
+            csv_writer = self._csv_storage.open_writer(self._csv_path(path), timeframe)
+        return BinaryFrameWriter(path, timeframe, csv_writer)
+
+    def _csv_path(self, path: Path) -> Path:
+        return self._csv_storage.path_for(path.with_suffix(""))
+
+    def rename(self, path: Path, new_path: Path) -> Path:
+        if self.export_csv:
+            csv_path = self._csv_path(path)
+            if csv_path.exists():
+                self._csv_storage.rename(csv_path, self._csv_path(new_path))
+        return super().rename(path, new_path)
+
+    def remove(self, path: Path) -> None:
+        if self.export_csv:
+            self._csv_storage.remove(self._csv_path(path))
+        super().remove(path)
+
+    def load(self, path: Path, timeframe: str) -> pd.DataFrame:
+        return self.open_view(path, timeframe).to_frame()
+
+    def open_view(self, path: Path, timeframe: str) -> OhlcView:
+        """Map the file read-only, no data is read until it is accessed"""
+        header, data_offset = self.read_header(path)
+        rows = header["rows"]
+        columns = header["columns"]
+
+        if rows == 0:
+            times = np.empty(0, dtype="<i8")
+            values = np.empty((len(columns), 0), dtype="<f4")
+        else:
+            times = np.memmap(
+                path, dtype="<i8", mode="r", offset=data_offset, shape=(rows,)
+            )
+            values = np.memmap(
+                path,
+                dtype="<f4",
+                mode="r",
+                offset=data_offset + rows * 8,
+                shape=(len(columns), rows),
+            )
+
+        return OhlcView(times, values, columns, header["index_name"], timeframe)
+
+    def iter_chunks(
+        self, path: Path, timeframe: str, chunk_rows: int, rows: slice | None = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Chunks read into memory of their own rather than sliced from the
+        mapping, so pages of chunks already processed don't stay resident
+        """
+        header, data_offset = self.read_header(path)
+        total = header["rows"]
+        columns = header["columns"]
+        values_offset = data_offset + total * 8
+        first, last, _ = (rows or slice(None)).indices(total)
+
+        with open(path, "rb") as f:
+            for start in range(first, last, chunk_rows):
+                count = min(chunk_rows, last - start)
+                f.seek(data_offset + start * 8)
+                times = np.fromfile(f, dtype="<i8", count=count)
+                values = np.empty((len(columns), count), dtype="<f4")
+                for i in range(len(columns)):
+                    f.seek(values_offset + (i * total + start) * 4)
+                    values[i] = np.fromfile(f, dtype="<f4", count=count)
+                yield OhlcView(
+                    times, values, columns, header["index_name"], timeframe
+                ).to_frame()
+
+    @staticmethod
+    def read_header(path: Path) -> tuple[dict, int]:
+        """Return the JSON header and the byte offset where the data starts"""
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"Not an OHLC binary file: {path}")
+            (header_length,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_length))
+
+        prefix_length = len(MAGIC) + 4 + header_length
+        return header, prefix_length + (-prefix_length % ALIGNMENT)
+
+
+class BinaryFrameWriter(FrameWriter):
+    """
+    Spills the index and every column to temporary files while chunks come
+    in, then assembles them behind the header once the row count is known.
+    The result is the same file save() writes for the whole frame.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        timeframe: str,
+        csv_writer: FrameWriter | None = None,
+    ):
+        super().__init__(path, timeframe)
+        self.csv_writer = csv_writer
+        self.index_name = None
+        self._spill_paths = [
+            path.with_name(f"{path.name}.{part}.tmp")
+            for part in ["index", *OHLC_COLUMNS]
+        ]
+        self._spills = [open(spill_path, "wb") for spill_path in self._spill_paths]
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.rows == 0:
+            self.index_name = df.index.name
+        times, values = _to_arrays(df)
+        self._spills[0].write(times.tobytes())
+        for spill, column in zip(self._spills[1:], values):
+            spill.write(column.tobytes())
+        if self.csv_writer is not None:
+            self.csv_writer.write(df)
+        self._count(df)
+
+    def close(self) -> Path:
+        for spill in self._spills:
+            spill.close()
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_file_prefix(self.rows, self.index_name, self.timeframe))
+                for spill_path in self._spill_paths:
+                    with open(spill_path, "rb") as spill:
+                        shutil.copyfileobj(spill, f)
+            os.replace(tmp_path, self.path)
+        finally:
+            self._remove_spills()
+
+        if self.csv_writer is not None:
+            self.csv_writer.close()
+        return self.path
+
+    def abort(self) -> None:
+        for spill in self._spills:
+            spill.close()
+        self._remove_spills()
+        if self.csv_writer is not None:
+            self.csv_writer.abort()
+
+    def _remove_spills(self) -> None:
+        for spill_path in self._spill_paths:
+            spill_path.unlink(missing_ok=True)
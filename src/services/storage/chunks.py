@@ -0,0 +1,81 @@
+"""
+Chunked reading of long frames.
+
+Stages that stream bars work on chunks whose edges fall on period
+boundaries (weeks, trading days), so no candle or daily aggregate is split
+between two chunks. align_chunks carries the partial period at the end of
+every chunk over into the next one.
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator
+import numpy as np
+import pandas as pd  # type: ignore
+from config.settings import STREAMING_SETTINGS
+from services.performance import ConfigManager
+
+# Sunday 00:00, weekly bins end there and no trading day spans it
+WEEK_ORIGIN = pd.Timedelta(days=3)
+WEEK = pd.Timedelta(days=7)
+DAY = pd.Timedelta(days=1)
+EPOCH = pd.Timestamp(0)
+
+
+def chunk_rows_for(path: Path, size_bytes: int | None = None) -> int:
+    """Rows per chunk when streaming a file (or a store of size_bytes)"""
+    if STREAMING_SETTINGS["chunk_rows"] is not None:
+        return STREAMING_SETTINGS["chunk_rows"]
+    if size_bytes is None:
+        size_bytes = path.stat().st_size
+    return ConfigManager.get_chunk_size(size_bytes / 1024**2)
+
+
+def align_chunks(
+    chunks: Iterable[pd.DataFrame],
+    period: pd.Timedelta,
+    origin: pd.Timedelta = pd.Timedelta(0),
+) -> Iterator[pd.DataFrame]:
+    """
+    Regroup time-ordered chunks so every yielded frame ends on a period
+    boundary (origin + k * period after the epoch), except the last one.
+    Periods longer than a chunk are gathered from several chunks.
+    """
+    step = period.value
+    offset = origin.value
+    carry: list[pd.DataFrame] = []
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        times = chunk.index.as_unit("ns").asi8
+        # Start of the period the last row falls in
+        boundary = offset + (times[-1] - offset) // step * step
+        cut = int(np.searchsorted(times, boundary, side="left"))
+        if cut > 0:
+            yield pd.concat([*carry, chunk.iloc[:cut]]) if carry else chunk.iloc[:cut]
+            carry = []
+        carry.append(chunk.iloc[cut:])
+
+    if carry:
+        yield pd.concat(carry) if len(carry) > 1 else carry[0]
+
+
+def week_edge_before(timestamp: pd.Timestamp) -> pd.Timestamp:
+    """Last week edge (Sunday 00:00) at or before timestamp"""
+    weeks = (timestamp - EPOCH - WEEK_ORIGIN) // WEEK
+    return EPOCH + WEEK_ORIGIN + weeks * WEEK
+
+
+def history_spans(
+    first: pd.Timestamp | None, last: pd.Timestamp | None
+) -> list[tuple[pd.Timestamp | None, pd.Timestamp | None]]:
+    """
+    [start, end) spans of about a calendar year covering first..last, split
+    at the week edge before every new year. The outer bounds are None.
+    """
+    edges = []
+    if first is not None and last is not None:
+        for year in range(first.year + 1, last.year + 1):
+            edge = week_edge_before(pd.Timestamp(year=year, month=1, day=1))
+            if first < edge <= last:
+                edges.append(edge)
+    return list(zip([None, *edges], [*edges, None]))
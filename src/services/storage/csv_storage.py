@@ -0,0 +1,132 @@
+import os
+from pathlib import Path
+from typing import Iterator
+import pandas as pd  # type: ignore
+from .base import FrameStorage, FrameWriter, OHLC_COLUMNS
+from .ohlc_view import OhlcView
+
+
+class CsvStorage(FrameStorage):
+    """Human readable CSV files, the format every stage used originally."""
+
+    suffix = ".csv"
+
+    def save(self, df: pd.DataFrame, path: Path, timeframe: str) -> Path:
+        self._write_csv(df, path, timeframe, header=True)
+        return path
+
+    @staticmethod
+    def _write_csv(df: pd.DataFrame, target, timeframe: str, header: bool) -> None:
+        frame = df[OHLC_COLUMNS]
+        date_format = "%Y-%m-%d" if timeframe == "1d" else "%Y-%m-%d %H:%M:%S"
+
+        if timeframe == "1w":
+            # Weekly candles are labelled with their Monday-Friday span
+            frame = frame.set_axis(
+                frame.index.strftime("%Y-%m-%d")
+                + " to "
+                + (frame.index + pd.Timedelta(days=4)).strftime("%Y-%m-%d")
+            ).rename_axis(df.index.name)
+            date_format = None
+
+        frame.to_csv(
+            target,
+            sep=",",
+            index=True,
+            header=header,
+            date_format=date_format,
+            float_format="%.5f" if timeframe != "1m" else None,
+        )
+
+    def open_writer(self, path: Path, timeframe: str) -> "CsvFrameWriter":
+        return CsvFrameWriter(path, timeframe)
+
+    def load(self, path: Path, timeframe: str) -> pd.DataFrame:
+        df = pd.read_csv(
+            path,
+            index_col=0,
+            dtype={column: "float32" for column in OHLC_COLUMNS},
+        )
+        return self._parse_index(df, timeframe)
+
+    def read_range(
+        self,
+        path: Path,
+        timeframe: str,
+        start=None,
+        end=None,
+        columns: list[str] | None = None,
+    ) -> tuple[OhlcView, slice]:
+        """Text has to be parsed up to the range, only unused columns are skipped"""
+        if columns is None:
+            return super().read_range(path, timeframe, start, end)
+
+        df = pd.read_csv(
+            path,
+            index_col=0,
+            usecols=lambda name: name not in OHLC_COLUMNS or name in columns,
+            dtype={column: "float32" for column in columns},
+        )
+        view = OhlcView.from_frame(self._parse_index(df, timeframe)[columns], timeframe)
+        rows = view.positions(start, end)
+        return view.rows(rows.start, rows.stop), rows
+
+    def iter_chunks(
+        self, path: Path, timeframe: str, chunk_rows: int, rows: slice | None = None
+    ) -> Iterator[pd.DataFrame]:
+        """Lines before rows are skipped without parsing their values"""
+        first, last = (0, None) if rows is None else (rows.start or 0, rows.stop)
+        if last is not None and last <= first:
+            return
+        with pd.read_csv(
+            path,
+            index_col=0,
+            dtype={column: "float32" for column in OHLC_COLUMNS},
+            chunksize=chunk_rows,
+            skiprows=range(1, first + 1),
+            nrows=None if last is None else last - first,
+        ) as reader:
+            for df in reader:
+                yield self._parse_index(df, timeframe)
+
+    @staticmethod
+    def _parse_index(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        if timeframe == "1w":
+            labels = df.index.astype(str).str.split(" to ").str[0]
+            df.index = pd.DatetimeIndex(
+                pd.to_datetime(labels, format="%Y-%m-%d"), name=df.index.name
+            )
+        else:
+            df.index = pd.DatetimeIndex(
+                pd.to_datetime(df.index, format="ISO8601"), name=df.index.name
+            )
+
+        return df
+
+
+class CsvFrameWriter(FrameWriter):
+    """Appends chunks to a temporary CSV file, the header comes with the first"""
+
+    def __init__(self, path: Path, timeframe: str):
+        super().__init__(path, timeframe)
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self._file = open(self.tmp_path, "w", newline="")
+        self._header_written = False
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df.empty and self._header_written:
+            return
+        CsvStorage._write_csv(
+            df, self._file, self.timeframe, header=not self._header_written
+        )
+        self._header_written = True
+        self._count(df)
+
+    def close(self) -> Path:
+        self._file.close()
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        self._file.close()
+        self.tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,27 @@
+from config.settings import STORAGE_SETTINGS
+from .base import FrameStorage
+from .csv_storage import CsvStorage
+from .binary_storage import BinaryStorage
+from .partitioned_storage import PartitionedStorage
+
+
+def get_storage(storage_format: str | None = None) -> FrameStorage:
+    """
+    Create the storage backend configured in STORAGE_SETTINGS.
+
+    Args:
+        storage_format: "binary", "partitioned" or "csv", overrides the configured format
+
+    Returns:
+        FrameStorage instance
+    """
+    storage_format = storage_format or STORAGE_SETTINGS["format"]
+
+    if storage_format == "binary":
+        return BinaryStorage(export_csv=STORAGE_SETTINGS["export_csv"])
+    elif storage_format == "partitioned":
+        return PartitionedStorage()
+    elif storage_format == "csv":
+        return CsvStorage()
+    else:
+        raise ValueError(f"Unknown storage format: {storage_format}")
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd  # type: ignore
+
+
+class OhlcView:
+    """
+    Read-only OHLC arrays: int64 epoch-ns timestamps plus a float32
+    [columns, rows] block. Views over a memory-mapped file share the OS page
+    cache, so several processes reading the same file hold one physical copy.
+    Slicing and to_frame() never copy the underlying data.
+    """
+
+    def __init__(
+        self,
+        times: np.ndarray,
+        values: np.ndarray,
+        columns: list[str],
+        index_name: str | None = None,
+        timeframe: str | None = None,
+    ):
+        self.times = times
+        self.values = values
+        self.columns = list(columns)
+        self.index_name = index_name
+        self.timeframe = timeframe
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, timeframe: str | None = None) -> "OhlcView":
+        """Wrap an in-memory frame, used by backends without memory mapping"""
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+
+        values = np.ascontiguousarray(df.to_numpy(dtype="float32").T)
+        values.flags.writeable = False
+        return cls(
+            index.as_unit("ns").asi8, values, list(df.columns), df.index.name, timeframe
+        )
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(
+            self.times.view("datetime64[ns]"), name=self.index_name, copy=False
+        )
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only array of a single column"""
+        return self.values[self.columns.index(name)]
+
+    def slice(self, start=None, end=None) -> "OhlcView":
+        """
+        Rows with start <= timestamp < end, either bound may be None, like
+        positions(). Timestamps must be sorted, which holds for every
+        pipeline output.
+        """
+        rows = self.positions(start, end)
+        return self.rows(rows.start, rows.stop)
+
+    def positions(self, start=None, end=None) -> slice:
+        """Row positions with start <= timestamp < end, either bound may be None"""
+        first = 0
+        last = len(self.times)
+        if start is not None:
+            first = int(np.searchsorted(self.times, pd.Timestamp(start).value, "left"))
+        if end is not None:
+            last = int(np.searchsorted(self.times, pd.Timestamp(end).value, "left"))
+        return slice(first, max(first, last))
+
+    def rows(self, start: int, stop: int) -> "OhlcView":
+        """Rows start:stop by position"""
+        return OhlcView(
+            self.times[start:stop],
+            self.values[:, start:stop],
+            self.columns,
+            self.index_name,
+            self.timeframe,
+        )
+
+    def select(self, columns: list[str]) -> "OhlcView":
+        """
+        View of only the given columns, in that order. Adjacent columns stay
+        a view of the same memory, others are copied.
+        """
+        columns = list(columns)
+        if columns == self.columns:
+            return self
+        positions = [self.columns.index(name) for name in columns]
+        first = positions[0] if positions else 0
+        if positions == list(range(first, first + len(positions))):
+            values = self.values[first : first + len(positions)]
+        else:
+            values = self.values[positions]
+        return OhlcView(self.times, values, columns, self.index_name, self.timeframe)
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame sharing memory with the view"""
+        return pd.DataFrame(
+            self.values.T, index=self.index, columns=self.columns, copy=False
+        )
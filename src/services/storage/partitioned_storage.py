@@ -0,0 +1,301 @@
+import json
+import os
+import secrets
+import shutil
+from pathlib import Path
+from typing import Iterator
+import numpy as np
+import pandas as pd  # type: ignore
+from .base import FrameStorage, FrameWriter, OHLC_COLUMNS
+from .binary_storage import BinaryFrameWriter, BinaryStorage
+from .ohlc_view import OhlcView
+
+INDEX_FILE = "index.json"
+
+
+def _month_start(month: str) -> int:
+    """Epoch nanoseconds of the first instant of a "YYYY-MM" month"""
+    return int(np.datetime64(month, "M").astype("datetime64[ns]").astype(np.int64))
+
+
+def _month_end(month: str) -> int:
+    return int(
+        (np.datetime64(month, "M") + 1).astype("datetime64[ns]").astype(np.int64)
+    )
+
+
+class PartitionedStorage(FrameStorage):
+    """
+    Date-partitioned stores: a directory per stored frame holding one binary
+    file (BinaryStorage format) per calendar month and an index of the
+    months with their row counts and files.
+
+    Range reads open only the months overlapping the range and map only the
+    requested columns of them, so I/O follows the size of the slice rather
+    than of the store. Appends rewrite only the months from the first
+    replaced row on. Whole-store views concatenate the months, so unlike
+    BinaryStorage they are copies rather than file mappings.
+
+    The index is the version pointer: writers add month files under names
+    of their own and replace index.json in one step, so the directory
+    always holds a complete store. A writer then removes the month files
+    of the index it replaced; files of other writers still at work are
+    left alone.
+
+    Layout:
+        <stem>.parts/
+            index.json               {"index_name", "timeframe",
+                                      "months": [[month, rows, file]]}
+            2023-01.<version>.ohlc   rows of January 2023
+            ...
+    """
+
+    suffix = ".parts"
+
+    def __init__(self):
+        self._binary = BinaryStorage()
+
+    def exists(self, path: Path) -> bool:
+        return (path / INDEX_FILE).exists()
+
+    def size_bytes(self, path: Path) -> int:
+        files = [INDEX_FILE, *(file for _, _, file in self.read_index(path)["months"])]
+        return sum((path / file).stat().st_size for file in files)
+
+    @staticmethod
+    def read_index(path: Path) -> dict:
+        with open(path / INDEX_FILE) as f:
+            return json.load(f)
+
+    def save(self, df: pd.DataFrame, path: Path, timeframe: str) -> Path:
+        with self.open_writer(path, timeframe) as writer:
+            writer.write(df)
+        return path
+
+    def open_writer(self, path: Path, timeframe: str) -> "PartitionedFrameWriter":
+        return PartitionedFrameWriter(path, timeframe)
+
+    def load(self, path: Path, timeframe: str) -> pd.DataFrame:
+        return self.open_view(path, timeframe).to_frame()
+
+    def open_view(self, path: Path, timeframe: str) -> OhlcView:
+        return self.read_range(path, timeframe)[0]
+
+    def read_range(
+        self,
+        path: Path,
+        timeframe: str,
+        start=None,
+        end=None,
+        columns: list[str] | None = None,
+    ) -> tuple[OhlcView, slice]:
+        try:
+            return self._read_range(path, timeframe, start, end, columns)
+        except FileNotFoundError:
+            # A writer replaced the version between reading the index and
+            # opening its months, the new index names the current files
+            return self._read_range(path, timeframe, start, end, columns)
+
+    def _read_range(
+        self,
+        path: Path,
+        timeframe: str,
+        start,
+        end,
+        columns: list[str] | None,
+    ) -> tuple[OhlcView, slice]:
+        index = self.read_index(path)
+        columns = OHLC_COLUMNS if columns is None else list(columns)
+        first_ns = None if start is None else pd.Timestamp(start).value
+        end_ns = None if end is None else pd.Timestamp(end).value
+
+        views = []
+        offset = 0
+        first_row = None
+        for month, rows, file in index["months"]:
+            if end_ns is not None and _month_start(month) >= end_ns:
+                break
+            if first_ns is not None and _month_end(month) <= first_ns:
+                offset += rows
+                continue
+            view, month_rows = self._binary.read_range(
+                path / file, timeframe, start, end, columns
+            )
+            if first_row is None:
+                first_row = offset + month_rows.start
+            views.append(view)
+            offset += rows
+
+        if first_row is None:
+            first_row = offset
+        if not views:
+            return (
+                OhlcView(
+                    np.empty(0, dtype="<i8"),
+                    np.empty((len(columns), 0), dtype="<f4"),
+                    columns,
+                    index["index_name"],
+                    timeframe,
+                ),
+                slice(first_row, first_row),
+            )
+
+        if len(views) == 1:
+            view = views[0]
+        else:
+            view = OhlcView(
+                np.concatenate([view.times for view in views]),
+                np.concatenate([view.values for view in views], axis=1),
+                columns,
+                index["index_name"],
+                timeframe,
+            )
+        return view, slice(first_row, first_row + len(view))
+
+    def iter_chunks(
+        self, path: Path, timeframe: str, chunk_rows: int, rows: slice | None = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Chunks never span months, the last chunk of a month may be short.
+        Months outside rows are not opened.
+        """
+        months = self.read_index(path)["months"]
+        total = sum(month_rows for _, month_rows, _ in months)
+        first, last, _ = (rows or slice(None)).indices(total)
+        offset = 0
+        for _, month_rows, file in months:
+            if offset >= last:
+                break
+            if offset + month_rows > first:
+                yield from self._binary.iter_chunks(
+                    path / file,
+                    timeframe,
+                    chunk_rows,
+                    slice(max(first - offset, 0), min(last - offset, month_rows)),
+                )
+            offset += month_rows
+
+    def append(self, df: pd.DataFrame, path: Path, timeframe: str, start=None) -> Path:
+        """Month files before the month of start are kept as they are"""
+        if not self.exists(path):
+            return self.save(df, path, timeframe)
+
+        if start is None:
+            if df.empty:
+                return path
+            start = df.index[0]
+
+        start = pd.Timestamp(start)
+        first_month = str(np.datetime64(start.value, "ns").astype("datetime64[M]"))
+        index = self.read_index(path)
+        kept = [entry for entry in index["months"] if entry[0] < first_month]
+        rewritten_from = pd.Timestamp(_month_start(first_month))
+        tail = self.read_range(path, timeframe, rewritten_from, start)[0].to_frame()
+
+        with PartitionedFrameWriter(path, timeframe, kept) as writer:
+            writer.index_name = index["index_name"]
+            writer.write(tail)
+            writer.write(df[OHLC_COLUMNS])
+        return path
+
+    def rename(self, path: Path, new_path: Path) -> Path:
+        """Directories only replace empty ones, so any store at new_path goes first"""
+        if new_path != path:
+            self.remove(new_path)
+        return super().rename(path, new_path)
+
+    def remove(self, path: Path) -> None:
+        self.mask_path_for(path).unlink(missing_ok=True)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class PartitionedFrameWriter(FrameWriter):
+    """
+    Writes month files of a new version into the store directory as chunks
+    come in, one BinaryFrameWriter per month, and makes them the store by
+    replacing the index on close. Kept months (appends) stay as they are.
+    """
+
+    def __init__(self, path: Path, timeframe: str, kept: list[list] | None = None):
+        super().__init__(path, timeframe)
+        self.index_name = None
+        self.version = secrets.token_hex(4)
+        path.mkdir(parents=True, exist_ok=True)
+        # [month, rows, file] of kept and finished months
+        self.months: list[list] = [list(entry) for entry in kept or []]
+        self.rows = sum(entry[1] for entry in self.months)
+        self._month: str | None = None
+        self._writer: BinaryFrameWriter | None = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.index_name is None:
+            self.index_name = df.index.name
+        if df.empty:
+            return
+
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        months = index.as_unit("ns").asi8.view("datetime64[ns]").astype("datetime64[M]")
+        # Chunks are in time order, so every month is one run of rows
+        edges = np.flatnonzero(months[1:] != months[:-1]) + 1
+        for first, last in zip([0, *edges], [*edges, len(df)]):
+            month = str(months[first])
+            if month != self._month:
+                self._finish_month()
+                self._month = month
+                self._writer = BinaryFrameWriter(
+                    self.path / self._month_file(month), self.timeframe
+                )
+            self._writer.write(df.iloc[first:last])
+        self._count(df)
+
+    def _month_file(self, month: str) -> str:
+        return f"{month}.{self.version}{BinaryStorage.suffix}"
+
+    def _finish_month(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self.months.append(
+                [self._month, self._writer.rows, self._month_file(self._month)]
+            )
+            self._writer = None
+
+    def close(self) -> Path:
+        self._finish_month()
+        tmp_path = self.path / f"{INDEX_FILE}.{self.version}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "index_name": self.index_name,
+                    "timeframe": self.timeframe,
+                    "months": self.months,
+                },
+                f,
+            )
+        replaced = (
+            [file for _, _, file in PartitionedStorage.read_index(self.path)["months"]]
+            if (self.path / INDEX_FILE).exists()
+            else []
+        )
+        # The new version becomes the store in this one step
+        os.replace(tmp_path, self.path / INDEX_FILE)
+        current = {file for _, _, file in self.months}
+        self._remove_files(
+            [*replaced, *(file.name for file in self._own_files())], keep=current
+        )
+        return self.path
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+        self._remove_files([file.name for file in self._own_files()])
+
+    def _own_files(self) -> list[Path]:
+        return list(self.path.glob(f"*.{self.version}*"))
+
+    def _remove_files(self, names: list[str], keep: set[str] = frozenset()) -> None:
+        for name in names:
+            if name not in keep:
+                (self.path / name).unlink(missing_ok=True)
@@ -0,0 +1,283 @@
+"""
+Shared-memory segments for arrays several worker processes load.
+
+The first worker to load an array publishes it into a named
+multiprocessing.shared_memory segment; other workers attach read-only views
+by name instead of loading their own copy. Segments belong to a run: the
+process owning the worker pool creates the run, workers join it through
+the pool initializer, and the owner unlinks every segment of the run when
+the pool is done.
+
+Within a process attachments are reference counted and a segment is
+closed once no array views it anymore. Segments of a crashed worker are
+still unlinked by the owner, and if the owner dies as well the
+multiprocessing resource tracker unlinks them.
+
+Segment layout:
+    MAGIC | uint8 ready | padding | uint32 header length | JSON header |
+    padding to 64 bytes | arrays, each aligned to 64 bytes
+"""
+
+import ctypes
+import json
+import secrets
+import struct
+import tempfile
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Callable, Iterator
+import numpy as np
+from config.settings import SHARED_MEMORY_SETTINGS
+from services.build_manifest import hash_config
+from .ohlc_view import OhlcView
+
+MAGIC = b"SHMARR01"
+READY_OFFSET = len(MAGIC)
+HEADER_OFFSET = 16
+ALIGNMENT = 64
+SEGMENT_PREFIX = "fxm"
+POLL_INTERVAL = 0.01
+
+
+def _align(offset: int) -> int:
+    return offset + (-offset % ALIGNMENT)
+
+
+def _write_segment(
+    segment: shared_memory.SharedMemory,
+    header: bytes,
+    data_offset: int,
+    layout: dict,
+    arrays: dict[str, np.ndarray],
+) -> None:
+    buffer = np.ndarray(segment.size, dtype=np.uint8, buffer=segment.buf)
+    buffer[: len(MAGIC)] = np.frombuffer(MAGIC, dtype=np.uint8)
+    struct.pack_into("<I", segment.buf, HEADER_OFFSET, len(header))
+    start = HEADER_OFFSET + 4
+    buffer[start : start + len(header)] = np.frombuffer(header, dtype=np.uint8)
+    for array_name, array in arrays.items():
+        first = data_offset + layout[array_name]["offset"]
+        target = buffer[first : first + array.nbytes].view(array.dtype)
+        target.reshape(array.shape)[...] = array
+    # Readers only map the arrays once the segment is complete
+    buffer[READY_OFFSET] = 1
+
+
+class SharedSegments:
+    """Named shared-memory segments of one run"""
+
+    def __init__(
+        self,
+        run_id: str,
+        attach_timeout: float = SHARED_MEMORY_SETTINGS["attach_timeout"],
+    ):
+        self.run_id = run_id
+        self.attach_timeout = attach_timeout
+        # Names of every segment published in the run, appended by workers
+        self.registry_path = (
+            Path(tempfile.gettempdir()) / f"{SEGMENT_PREFIX}_{run_id}.segments"
+        )
+        # name -> [SharedMemory, number of live attachments in this process]
+        self._handles: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create_run(cls) -> "SharedSegments":
+        # Workers started afterwards share this tracker, so segments left by
+        # any of them are unlinked when the run owner exits
+        resource_tracker.ensure_running()
+        segments = cls(secrets.token_hex(4))
+        segments.registry_path.touch()
+        return segments
+
+    def segment_name(self, key) -> str:
+        # Short enough for the 31 character limit on macOS
+        return f"{SEGMENT_PREFIX}{self.run_id}_{hash_config(key)[:16]}"
+
+    def get_or_publish(
+        self, key, loader: Callable[[], tuple[dict[str, np.ndarray], dict]]
+    ) -> tuple[dict[str, np.ndarray], dict]:
+        """
+        Read-only arrays and their JSON metadata for key: attached from the
+        run's segment when another worker published it, otherwise loaded and
+        published here. Falls back to the loaded arrays when they cannot be
+        shared.
+        """
+        name = self.segment_name(key)
+        attached = self._attach(name)
+        if attached is not None:
+            return attached
+
+        arrays, meta = loader()
+        if sum(array.nbytes for array in arrays.values()) == 0:
+            return arrays, meta
+        try:
+            self._publish(name, arrays, meta)
+        except FileExistsError:
+            # Another worker started publishing first
+            return self._attach(name) or (arrays, meta)
+        except OSError as e:
+            print(f"⚠️ Could not share {name} across workers: {e}")
+            return arrays, meta
+        return self._attach(name) or (arrays, meta)
+
+    def _publish(self, name: str, arrays: dict[str, np.ndarray], meta: dict) -> None:
+        layout = {}
+        offset = 0
+        for array_name, array in arrays.items():
+            layout[array_name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": offset,
+            }
+            offset = _align(offset + array.nbytes)
+        header = json.dumps({"arrays": layout, "meta": meta}).encode()
+        data_offset = _align(HEADER_OFFSET + 4 + len(header))
+
+        segment = shared_memory.SharedMemory(
+            name=name, create=True, size=data_offset + offset
+        )
+        try:
+            # Registered before writing, so a crash mid-write is cleaned up too
+            with open(self.registry_path, "a") as f:
+                f.write(name + "\n")
+            _write_segment(segment, header, data_offset, layout, arrays)
+        finally:
+            segment.close()
+
+    def _attach(self, name: str) -> tuple[dict[str, np.ndarray], dict] | None:
+        self.close_idle()
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is None:
+                try:
+                    segment = shared_memory.SharedMemory(name=name)
+                except FileNotFoundError:
+                    return None
+                handle = self._handles[name] = [segment, 0]
+            # Counted right away so a concurrent release cannot close it
+            handle[1] += 1
+            segment = handle[0]
+
+        deadline = time.monotonic() + self.attach_timeout
+        while segment.buf[READY_OFFSET] != 1:
+            if time.monotonic() > deadline:
+                print(f"⚠️ Timed out waiting for shared segment {name}")
+                self._release(name)
+                return None
+            time.sleep(POLL_INTERVAL)
+
+        (header_length,) = struct.unpack_from("<I", segment.buf, HEADER_OFFSET)
+        start = HEADER_OFFSET + 4
+        header = json.loads(bytes(segment.buf[start : start + header_length]))
+        data_offset = _align(start + header_length)
+
+        # A buffer object of its own for this attachment: every array view
+        # keeps it alive, so it is collected exactly when the last one dies
+        holder = (ctypes.c_uint8 * segment.size).from_buffer(segment.buf)
+        base = np.frombuffer(holder, dtype=np.uint8)
+        base.flags.writeable = False
+        arrays = {}
+        for array_name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            first = data_offset + spec["offset"]
+            arrays[array_name] = (
+                base[first : first + count * dtype.itemsize]
+                .view(dtype)
+                .reshape(spec["shape"])
+            )
+
+        weakref.finalize(holder, self._release, name)
+        return arrays, header["meta"]
+
+    def _release(self, name: str) -> None:
+        # Runs while the last view is being collected, its buffer export is
+        # only gone afterwards, so closing happens on the next attach
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is not None:
+                handle[1] -= 1
+
+    def close_idle(self) -> None:
+        """Close segments no array of this process views anymore"""
+        with self._lock:
+            for name, (segment, count) in list(self._handles.items()):
+                if count > 0:
+                    continue
+                try:
+                    segment.close()
+                except BufferError:
+                    continue
+                del self._handles[name]
+
+    def cleanup(self) -> None:
+        """Unlink every segment of the run, called by the run owner"""
+        self.close_idle()
+        try:
+            names = set(self.registry_path.read_text().split())
+        except FileNotFoundError:
+            names = set()
+
+        for name in names:
+            try:
+                segment = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                continue
+            segment.close()
+            segment.unlink()
+        self.registry_path.unlink(missing_ok=True)
+
+
+def share_ohlc_view(
+    segments: SharedSegments, key, loader: Callable[[], OhlcView]
+) -> OhlcView:
+    """OhlcView backed by a shared segment of the run"""
+
+    def load() -> tuple[dict[str, np.ndarray], dict]:
+        view = loader()
+        arrays = {"times": view.times, "values": view.values}
+        meta = {
+            "columns": view.columns,
+            "index_name": view.index_name,
+            "timeframe": view.timeframe,
+        }
+        return arrays, meta
+
+    arrays, meta = segments.get_or_publish(key, load)
+    return OhlcView(arrays["times"], arrays["values"], **meta)
+
+
+# Run the current process takes part in, set by run owners and pool workers
+_active_segments: SharedSegments | None = None
+
+
+def attach_shared_segments(run_id: str) -> None:
+    """Pool initializer: join the run of the process that created the pool"""
+    global _active_segments
+    _active_segments = SharedSegments(run_id)
+
+
+def active_shared_segments() -> SharedSegments | None:
+    return _active_segments
+
+
+@contextmanager
+def shared_segments_run() -> Iterator[SharedSegments | None]:
+    """
+    Own a run of shared segments for a worker pool, yields None when shared
+    memory is disabled. Every segment is unlinked on exit.
+    """
+    if not SHARED_MEMORY_SETTINGS["enabled"]:
+        yield None
+        return
+
+    segments = SharedSegments.create_run()
+    try:
+        yield segments
+    finally:
+        segments.cleanup()
@@ -0,0 +1,41 @@
+"""
+parse_raw_datetimes reads the "YYYYMMDD HHMMSS" column of the raw files
+straight from its bytes; it must agree with strptime parsing and reject
+what strptime rejects.
+"""
+
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest
+from services.csv.ingestor import parse_raw_datetimes
+
+
+def raw(*values: str) -> np.ndarray:
+    return np.array(values, dtype=object)
+
+
+def test_matches_strptime_parse():
+    index = pd.date_range("2023-12-31 20:00", "2024-03-01 02:00", freq="17min")
+    values = index.strftime("%Y%m%d %H%M%S").to_numpy(dtype=object)
+
+    parsed = parse_raw_datetimes(values)
+
+    assert parsed.name == "Date Time"
+    assert parsed.equals(pd.DatetimeIndex(index.as_unit("s")))
+
+
+@pytest.mark.parametrize(
+    "malformed",
+    [
+        "2024-01-01 00:00",
+        "20241345 996099",
+        "abc",
+        "20230229 120000",
+        "20240101 0000001",
+        "20240101T000000",
+        "",
+    ],
+)
+def test_malformed_row_raises(malformed):
+    with pytest.raises(ValueError):
+        parse_raw_datetimes(raw("20240101 000000", malformed, "20240101 000100"))
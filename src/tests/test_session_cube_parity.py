@@ -0,0 +1,263 @@
+"""
+Parity of the session cube with the row-by-row reduction it replaced: the
+iterrows() loop over 5m bars that assigned every bar to the first session
+containing it and tracked per-day session highs and lows, and the loop
+counting first session breaks per session pair.
+
+The old per-day frame went through a CSV cache with a mix of float32 and
+float64 columns, so equal session levels could compare unequal there. The
+reference here runs on the float32 values of the stores: equal levels are
+ties, the earlier session keeps a tied daily extreme, and reaching a level
+exactly does not break it.
+"""
+
+import numpy as np
+import pandas as pd  # type: ignore
+import pytest
+from config.sessions_config import SESSIONS
+from services.metrics.calculators.session_distribution_metrics import (
+    SessionDistributionMetrics,
+)
+from services.metrics.session_cube import HIGH, LOW, SessionCube
+from utils.session_utils import SessionCalendar, is_time_in_session
+
+BAR_MINUTES = 5
+SESSION_ORDER = list(SESSIONS)
+
+
+def reference_daily_sessions(five_minute_data: pd.DataFrame) -> pd.DataFrame:
+    """The previous per-day reduction, kept as it was apart from logging"""
+    daily_groups = {}
+    for timestamp, row in five_minute_data.iterrows():
+        if timestamp.time() >= pd.Timestamp("21:00").time():
+            trading_date = (timestamp + pd.Timedelta(days=1)).date()
+        else:
+            trading_date = timestamp.date()
+        daily_groups.setdefault(trading_date, []).append((timestamp, row))
+
+    daily_results = []
+    for trading_date, day_data in daily_groups.items():
+        session_highs = {}
+        session_lows = {}
+        out_of_session_high = None
+        out_of_session_low = None
+
+        for timestamp, row in day_data:
+            session_found = False
+            for session_name, session_times in SESSIONS.items():
+                if is_time_in_session(timestamp.time(), session_times):
+                    if session_name not in session_highs:
+                        session_highs[session_name] = row["High"]
+                        session_lows[session_name] = row["Low"]
+                    else:
+                        session_highs[session_name] = max(
+                            session_highs[session_name], row["High"]
+                        )
+                        session_lows[session_name] = min(
+                            session_lows[session_name], row["Low"]
+                        )
+                    session_found = True
+                    break
+
+            if not session_found:
+                if out_of_session_high is None:
+                    out_of_session_high = row["High"]
+                    out_of_session_low = row["Low"]
+                else:
+                    out_of_session_high = max(out_of_session_high, row["High"])
+                    out_of_session_low = min(out_of_session_low, row["Low"])
+
+        all_highs = dict(session_highs)
+        all_lows = dict(session_lows)
+        if out_of_session_high is not None:
+            all_highs["Out of Session"] = out_of_session_high
+            all_lows["Out of Session"] = out_of_session_low
+
+        result = {
+            "trading_date": pd.Timestamp(trading_date),
+            "daily_high_session": max(all_highs.items(), key=lambda x: x[1])[0],
+            "daily_low_session": min(all_lows.items(), key=lambda x: x[1])[0],
+        }
+        for session_name in SESSIONS:
+            result[f"{session_name}_high"] = session_highs.get(session_name, np.nan)
+            result[f"{session_name}_low"] = session_lows.get(session_name, np.nan)
+        daily_results.append(result)
+
+    return pd.DataFrame(daily_results)
+
+
+def reference_breaks(daily: pd.DataFrame, side: str) -> dict:
+    """The previous first-break loop: (session2, session1) -> (breaks, days)"""
+    column = "high" if side == "High" else "low"
+    broken = (
+        (lambda level, base: level > base)
+        if side == "High"
+        else (lambda level, base: level < base)
+    )
+    counts = {}
+    for i, session1 in enumerate(SESSION_ORDER):
+        for j, session2 in enumerate(SESSION_ORDER):
+            if j <= i:
+                continue
+            first_col = f"{session1}_{column}"
+            second_col = f"{session2}_{column}"
+            valid = daily.dropna(subset=[first_col, second_col])
+            breaks_count = 0
+            for _, row in valid.iterrows():
+                if not broken(row[second_col], row[first_col]):
+                    continue
+                already_broken = any(
+                    pd.notna(row[f"{SESSION_ORDER[k]}_{column}"])
+                    and broken(row[f"{SESSION_ORDER[k]}_{column}"], row[first_col])
+                    for k in range(i + 1, j)
+                )
+                if not already_broken:
+                    breaks_count += 1
+            counts[(session2, session1)] = (breaks_count, len(valid))
+    return counts
+
+
+def build_cube(bars: pd.DataFrame) -> SessionCube:
+    return SessionCube.from_bars(bars, SessionCalendar(SESSIONS), BAR_MINUTES)
+
+
+def make_bars(days: int = 15, seed: int = 7) -> pd.DataFrame:
+    """
+    5m bars with 5-decimal prices stored as float32, like the timeframe
+    stores, including days missing whole sessions and exact ties
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(
+        "2024-01-07 21:00", periods=days * 288, freq="5min", name="Datetime"
+    )
+    close = np.round(1.1 + np.cumsum(rng.normal(0, 0.0004, len(index))), 5)
+    spread = np.round(np.abs(rng.normal(0, 0.0003, (2, len(index)))), 5)
+    bars = pd.DataFrame(
+        {
+            "Open": close,
+            "High": close + spread[0],
+            "Low": close - spread[1],
+            "Close": close,
+        },
+        index=index,
+    ).astype("float32")
+
+    minutes = index.hour * 60 + index.minute
+    dates = (index + pd.Timedelta(hours=3)).normalize()
+    day = lambda n: dates == dates[0] + pd.Timedelta(days=n)
+    # Days without a session: no Frankfurt, no London and Lunch, nothing
+    # from Frankfurt to the NY close
+    drop = (day(2) & (minutes >= 8 * 60) & (minutes < 9 * 60)) | (
+        day(4) & (minutes >= 9 * 60) & (minutes < 14 * 60)
+    )
+    drop |= day(6) & (minutes >= 8 * 60) & (minutes < 21 * 60)
+
+    # Exact ties of the daily extreme: an Asia bar and a London (NY) bar
+    # make the same high (low), and a day where every bar has one range
+    for n, later, field, step in (
+        (8, 9 * 60, "High", 0.001),
+        (9, 14 * 60, "Low", -0.001),
+    ):
+        extreme = bars.loc[day(n), field].agg("max" if step > 0 else "min")
+        tied = day(n) & ((minutes == 60) | (minutes == later + 30))
+        bars.loc[tied, field] = np.float32(round(float(extreme) + step, 5))
+    flat = day(11)
+    bars.loc[flat, "High"] = np.float32(1.10050)
+    bars.loc[flat, "Low"] = np.float32(1.09950)
+
+    return bars[~drop]
+
+
+@pytest.fixture(scope="module")
+def bars() -> pd.DataFrame:
+    return make_bars()
+
+
+def test_daily_session_extremes_match_reference(bars):
+    reference = reference_daily_sessions(bars)
+    cube = build_cube(bars)
+
+    assert list(cube.dates) == list(reference["trading_date"])
+    high_labels = [cube.slot_names[slot] for slot in cube.extreme_slots[:, 0]]
+    low_labels = [cube.slot_names[slot] for slot in cube.extreme_slots[:, 1]]
+    assert high_labels == reference["daily_high_session"].tolist()
+    assert low_labels == reference["daily_low_session"].tolist()
+
+    for session in SESSIONS:
+        slot = cube.slot_index(session)
+        for field, column in ((HIGH, "high"), (LOW, "low")):
+            expected = reference[f"{session}_{column}"].to_numpy(dtype="float32")
+            np.testing.assert_array_equal(cube.price(field, slot), expected)
+
+
+def test_missing_sessions_are_nan(bars):
+    cube = build_cube(bars)
+    frankfurt = cube.price(HIGH, cube.slot_index("Frankfurt"))
+    london = cube.price(HIGH, cube.slot_index("London"))
+    assert np.isnan(frankfurt[2]) and np.isnan(london[4]) and np.isnan(london[6])
+
+
+@pytest.mark.parametrize("side", ["High", "Low"])
+def test_session_breaks_match_reference(bars, side):
+    breaks = SessionDistributionMetrics.compute_session_breaks(build_cube(bars))
+    expected = reference_breaks(reference_daily_sessions(bars), side)
+
+    sessions = breaks["sessions"]
+    for (session2, session1), (count, days) in expected.items():
+        i, j = sessions.index(session1), sessions.index(session2)
+        assert breaks[side]["breaks"][i, j] == count, (session2, session1)
+        assert breaks[side]["days"][i, j] == days, (session2, session1)
+
+
+def one_day(levels: dict[str, tuple[float, float]]) -> pd.DataFrame:
+    """One trading day of 5m bars with given (high, low) per session"""
+    index = pd.date_range("2024-01-09 21:00", periods=288, freq="5min", name="Datetime")
+    calendar = SessionCalendar(SESSIONS)
+    names = calendar.session_names
+    bars = pd.DataFrame(index=index, columns=["Open", "High", "Low", "Close"])
+    for timestamp in index:
+        session = next(
+            name
+            for name in names
+            if is_time_in_session(timestamp.time(), SESSIONS[name])
+        )
+        high, low = levels.get(session, (1.1001, 1.0999))
+        bars.loc[timestamp] = [1.1, high, low, 1.1]
+    return bars.astype("float32")
+
+
+def test_extreme_tie_goes_to_earlier_session():
+    cube = build_cube(one_day({"Asia": (1.1010, 1.0990), "London": (1.1010, 1.0990)}))
+    assert cube.slot_names[cube.extreme_slots[0, 0]] == "Asia"
+    assert cube.slot_names[cube.extreme_slots[0, 1]] == "Asia"
+
+
+def test_equal_level_is_not_a_break():
+    """A later session reaching the same level exactly does not break it"""
+    cube = build_cube(one_day({"Asia": (1.1010, 1.0990), "London": (1.1010, 1.0980)}))
+    breaks = SessionDistributionMetrics.compute_session_breaks(cube)
+    asia, london = breaks["sessions"].index("Asia"), breaks["sessions"].index("London")
+    assert breaks["High"]["breaks"][asia, london] == 0
+    assert breaks["High"]["days"][asia, london] == 1
+    assert breaks["Low"]["breaks"][asia, london] == 1
+
+
+def test_tie_with_earlier_breaker_keeps_first_break():
+    """
+    Frankfurt breaks Asia's high first; London only equals Frankfurt, so
+    London-Asia is not a first break either
+    """
+    cube = build_cube(
+        one_day(
+            {
+                "Asia": (1.1010, 1.0990),
+                "Frankfurt": (1.1020, 1.0990),
+                "London": (1.1020, 1.0990),
+            }
+        )
+    )
+    breaks = SessionDistributionMetrics.compute_session_breaks(cube)
+    sessions = breaks["sessions"]
+    asia = sessions.index("Asia")
+    assert breaks["High"]["breaks"][asia, sessions.index("Frankfurt")] == 1
+    assert breaks["High"]["breaks"][asia, sessions.index("London")] == 0
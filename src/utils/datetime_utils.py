@@ -1,16 +1,80 @@
 import datetime
+from functools import lru_cache
+import numpy as np
+import pandas as pd
 import pytz
 
+EASTERN = pytz.timezone("US/Eastern")
 
-def determine_day_start_hour(date: datetime.datetime) -> int:
-    eastern = pytz.timezone("US/Eastern")
 
-    if date.tzinfo is None:
-        date = pytz.utc.localize(date)
+@lru_cache(maxsize=None)
+def _eastern_dst_transitions(
+    first_year: int, last_year: int
+) -> tuple[np.ndarray, bool]:
+    """
+    UTC instants (epoch ns) where US/Eastern switches DST on or off within
+    [first_year, last_year], plus whether DST is active at the range start.
+    Transitions happen on whole UTC hours, so an hourly grid finds them exactly.
+    """
+    hours = pd.date_range(
+        f"{first_year}-01-01", f"{last_year + 1}-01-01", freq="h", tz="UTC"
+    ).as_unit("ns")
+    offsets = hours.tz_convert(EASTERN).tz_localize(None) - hours.tz_localize(None)
+    is_dst = np.asarray(offsets != offsets.min())
+
+    flips = np.flatnonzero(is_dst[1:] != is_dst[:-1]) + 1
+    return hours.asi8[flips], bool(is_dst[0])
+
+
+def _naive_index(timestamps: pd.DatetimeIndex) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    """Split an index into wall-clock timestamps and UTC epoch nanoseconds"""
+    if timestamps.tz is None:
+        return timestamps, timestamps.as_unit("ns").asi8
+    utc_ns = timestamps.tz_convert("UTC").as_unit("ns").asi8
+    return timestamps.tz_localize(None), utc_ns
+
+
+def determine_day_start_hours(timestamps: pd.DatetimeIndex) -> np.ndarray:
+    """
+    Vectorized determine_day_start_hour: 21 while US/Eastern is on DST,
+    22 otherwise. Naive timestamps are treated as UTC.
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    if len(timestamps) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    _, utc_ns = _naive_index(timestamps)
+    years = timestamps.year
+    transitions, dst_at_start = _eastern_dst_transitions(
+        int(years.min()) - 1, int(years.max()) + 1
+    )
+
+    # Each transition passed flips the DST state
+    flips = np.searchsorted(transitions, utc_ns, side="right")
+    is_dst = (flips % 2 == 1) ^ dst_at_start
+    return np.where(is_dst, 21, 22)
 
-    date_eastern = date.astimezone(eastern)
-    is_dst = date_eastern.dst() != datetime.timedelta(0)
-    return 21 if is_dst else 22
+
+def get_forex_trading_dates(timestamps: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    """
+    Vectorized get_forex_trading_date. Returns a naive DatetimeIndex of
+    trading dates (midnight) aligned with the input timestamps.
+    """
+    timestamps = pd.DatetimeIndex(timestamps)
+    if len(timestamps) == 0:
+        return pd.DatetimeIndex([])
+
+    wall_clock, _ = _naive_index(timestamps)
+    day_start_hours = determine_day_start_hours(timestamps)
+
+    rolls = (wall_clock.weekday == 6) | (wall_clock.hour >= day_start_hours)
+    return wall_clock.normalize() + pd.to_timedelta(
+        np.asarray(rolls, dtype=np.int64), unit="D"
+    )
+
+
+def determine_day_start_hour(date: datetime.datetime) -> int:
+    return int(determine_day_start_hours(pd.DatetimeIndex([date]))[0])
 
 
 def get_forex_week_start(date: datetime.datetime) -> datetime.datetime:
@@ -31,16 +95,4 @@ def get_forex_week_start(date: datetime.datetime) -> datetime.datetime:
 
 
 def get_forex_trading_date(timestamp: datetime.datetime) -> datetime.date:
-    if timestamp.tzinfo is None:
-        timestamp = pytz.utc.localize(timestamp)
-
-    day_start_hour = determine_day_start_hour(timestamp)
-    weekday = timestamp.weekday()
-
-    if weekday == 6:
-        return (timestamp + datetime.timedelta(days=1)).date()
-
-    if timestamp.hour >= day_start_hour:
-        return (timestamp + datetime.timedelta(days=1)).date()
-    else:
-        return timestamp.date()
+    return get_forex_trading_dates(pd.DatetimeIndex([timestamp]))[0].date()
@@ -2,10 +2,100 @@
 Утиліти для роботи з торговими сесіями
 """
 
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from config.pairs_config import PAIRS
 from config.sessions_config import SESSIONS
 
+MINUTES_PER_DAY = 24 * 60
+
+
+@lru_cache(maxsize=None)
+def _session_bounds(start: str, end: str) -> tuple[int, int]:
+    """Parse "HH:MM" session boundaries into minutes of day"""
+    start_time = pd.to_datetime(start).time()
+    end_time = pd.to_datetime(end).time()
+    return (
+        start_time.hour * 60 + start_time.minute,
+        end_time.hour * 60 + end_time.minute,
+    )
+
+
+def minutes_of_day(index: pd.DatetimeIndex) -> np.ndarray:
+    """Return minute of day (0..1439) for every timestamp of the index"""
+    if index.tz is None:
+        minutes = index.values.astype("datetime64[m]").astype(np.int64)
+        return minutes % MINUTES_PER_DAY
+    return (index.hour * 60 + index.minute).to_numpy()
+
+
+class SessionCalendar:
+    """
+    Sessions config compiled into minute-of-day lookup tables.
+
+    Every minute of the day maps to the first session (in config order) that
+    contains it, or to out_of_session_code when no session does. Per-session
+    membership is kept separately so overlapping sessions still report their
+    full span.
+    """
+
+    def __init__(self, sessions: dict):
+        self.session_names = list(sessions.keys())
+        self.out_of_session_code = len(self.session_names)
+        self._codes_by_name = {
+            name: code for code, name in enumerate(self.session_names)
+        }
+
+        minutes = np.arange(MINUTES_PER_DAY)
+        self.membership = np.zeros(
+            (len(self.session_names), MINUTES_PER_DAY), dtype=bool
+        )
+        for code, session_times in enumerate(sessions.values()):
+            start, end = _session_bounds(session_times["start"], session_times["end"])
+            # Handle sessions that cross midnight
+            if start > end:
+                self.membership[code] = (minutes >= start) | (minutes < end)
+            else:
+                self.membership[code] = (minutes >= start) & (minutes < end)
+
+        self.minute_table = np.full(
+            MINUTES_PER_DAY, self.out_of_session_code, dtype=np.int8
+        )
+        # Walk backwards so earlier sessions win where definitions overlap
+        for code in reversed(range(len(self.session_names))):
+            self.minute_table[self.membership[code]] = code
+
+    def session_code(self, time_to_check) -> int:
+        """Session code for a single datetime.time / datetime value"""
+        return int(self.minute_table[time_to_check.hour * 60 + time_to_check.minute])
+
+    def session_codes(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """Session codes for every timestamp of the index"""
+        return self.minute_table[minutes_of_day(index)]
+
+    def session_name(self, code: int) -> str:
+        """Session name for a code, "Out of Session" for unmatched minutes"""
+        if code == self.out_of_session_code:
+            return "Out of Session"
+        return self.session_names[code]
+
+    def contains(self, session_name: str, time_to_check) -> bool:
+        """Check whether a single time falls inside the session"""
+        code = self._codes_by_name[session_name]
+        return bool(
+            self.membership[code, time_to_check.hour * 60 + time_to_check.minute]
+        )
+
+    def session_mask(self, session_name: str, index: pd.DatetimeIndex) -> np.ndarray:
+        """Boolean mask of the timestamps that fall inside the session"""
+        code = self._codes_by_name[session_name]
+        return self.membership[code][minutes_of_day(index)]
+
+
+# Глобальний календар сесій, зібраний з SESSIONS
+session_calendar = SessionCalendar(SESSIONS)
+
 
 def get_session_range(session_name: str, data: pd.DataFrame, symbol: str) -> float:
     """
@@ -16,28 +106,34 @@ def get_session_range(session_name: str, data: pd.DataFrame, symbol: str) -> flo
     :param symbol: Trading symbol (e.g. 'EURUSD')
     :return: Average session range in pips
     """
-    if data.empty:
-        return 0.0
+    return average_session_range(session_daily_ranges(session_name, data), symbol)
 
-    session = SESSIONS[session_name]
-    start_time = pd.to_datetime(session["start"]).time()
-    end_time = pd.to_datetime(session["end"]).time()
-    pip_factor = PAIRS[symbol.upper()]["pip_factor"]
 
-    # Handle sessions that cross midnight
-    if start_time > end_time:
-        mask = (data.index.time >= start_time) | (data.index.time < end_time)
-    else:
-        mask = (data.index.time >= start_time) & (data.index.time < end_time)
+def session_daily_ranges(session_name: str, data: pd.DataFrame) -> pd.Series:
+    """
+    High - low of the session per calendar date. Dates never span two frames
+    split at midnight, so ranges of such frames can be concatenated.
+    """
+    if data.empty:
+        return pd.Series(dtype=np.float32)
 
+    mask = session_calendar.session_mask(session_name, data.index)
     session_data = data[mask]
     if session_data.empty:
-        return 0.0  # Group by date to get daily session ranges
+        return pd.Series(dtype=np.float32)
+    # Group by date to get daily session ranges
     session_data = session_data.groupby(session_data.index.date).agg(
         {"High": "max", "Low": "min"}
     )
+    return session_data["High"] - session_data["Low"]
+
 
-    return round(((session_data["High"] - session_data["Low"]) * pip_factor).mean(), 2)
+def average_session_range(daily_ranges: pd.Series, symbol: str) -> float:
+    """Average of session_daily_ranges in pips"""
+    if daily_ranges.empty:
+        return 0.0
+    pip_factor = PAIRS[symbol.upper()]["pip_factor"]
+    return round((daily_ranges * pip_factor).mean(), 2)
 
 
 def is_time_in_session(time_to_check, session_times):
@@ -48,11 +144,11 @@ def is_time_in_session(time_to_check, session_times):
     :param session_times: Dictionary with session start and end times
     :return: True if time is in session, False otherwise
     """
-    start_time = pd.to_datetime(session_times["start"]).time()
-    end_time = pd.to_datetime(session_times["end"]).time()
+    start, end = _session_bounds(session_times["start"], session_times["end"])
+    minute = time_to_check.hour * 60 + time_to_check.minute
 
     # Handle sessions that cross midnight
-    if start_time > end_time:
-        return time_to_check >= start_time or time_to_check < end_time
+    if start > end:
+        return minute >= start or minute < end
     else:
-        return start_time <= time_to_check < end_time
+        return start <= minute < end